@@ -0,0 +1,162 @@
+"""
+Admission control and load shedding.
+
+Requests are put in a route class (logins, task reads, writes), each with
+its own ADMISSION_LIMITS: how many run at once, how many may wait for a
+slot and how long. Waiting requests are admitted in arrival order. A
+request is rejected with 503 and Retry-After right away when the queue is
+full or when the expected wait, from the queue length and the class's
+recent request durations, is past the deadline, and after the deadline if
+it is still queued. Cheap reads keep flowing while logins pile up.
+"""
+
+import math
+import time
+import asyncio
+from collections import deque
+from typing import Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app import settings
+from app.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_SHED_REQUESTS,
+    ADMISSION_WAIT_SECONDS,
+)
+
+AUTH_PATHS = ("/users/login", "/users/register", "/users/refresh")
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+# Streams would hold a slot for the whole connection.
+EXEMPT_PATHS = ("/metrics", "/tasks/events")
+
+# Weight of the newest request in the average duration.
+DURATION_SMOOTHING = 0.2
+
+
+def get_route_class(scope: Scope) -> Optional[str]:
+    path = scope["path"]
+    if path.startswith(EXEMPT_PATHS):
+        return None
+    if path.startswith(AUTH_PATHS):
+        return "auth"
+    return "reads" if scope["method"] in READ_METHODS else "writes"
+
+
+class RequestShed(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionQueue:
+    def __init__(
+        self, route_class: str, concurrency: int, queue_size: int, deadline: float
+    ):
+        self.route_class = route_class
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.deadline = deadline
+        self.active = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.average_duration: Optional[float] = None
+
+    def expected_wait(self) -> float:
+        # Slots free up every average_duration / concurrency seconds.
+        if self.average_duration is None:
+            return 0.0
+        return (len(self.waiters) + 1) * self.average_duration / self.concurrency
+
+    async def acquire(self) -> None:
+        if self.active < self.concurrency and not self.waiters:
+            self._take_slot()
+            ADMISSION_WAIT_SECONDS.labels(self.route_class).observe(0)
+            return
+        if len(self.waiters) >= self.queue_size:
+            raise RequestShed("queue_full", self.expected_wait() or self.deadline)
+        expected_wait = self.expected_wait()
+        if expected_wait > self.deadline:
+            raise RequestShed("deadline", expected_wait)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.labels(self.route_class).inc()
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.deadline)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                raise RequestShed("timeout", self.expected_wait() or self.deadline)
+        except asyncio.CancelledError:
+            # Handed a slot just as the client went away, pass it on.
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            ADMISSION_QUEUE_DEPTH.labels(self.route_class).dec()
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+        ADMISSION_WAIT_SECONDS.labels(self.route_class).observe(
+            time.perf_counter() - queued_at
+        )
+
+    def _take_slot(self) -> None:
+        self.active += 1
+        ADMISSION_IN_FLIGHT.labels(self.route_class).inc()
+
+    def release(self, duration: Optional[float]) -> None:
+        self.active -= 1
+        ADMISSION_IN_FLIGHT.labels(self.route_class).dec()
+        if duration is not None:
+            self.average_duration = (
+                duration
+                if self.average_duration is None
+                else DURATION_SMOOTHING * duration
+                + (1 - DURATION_SMOOTHING) * self.average_duration
+            )
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                # The slot goes straight to the oldest waiter.
+                self._take_slot()
+                waiter.set_result(None)
+                return
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app: ASGIApp, limits: dict = settings.ADMISSION_LIMITS):
+        self.app = app
+        self.queues = {
+            route_class: AdmissionQueue(route_class, **class_limits)
+            for route_class, class_limits in limits.items()
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route_class = get_route_class(scope) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        queue = self.queues[route_class]
+        try:
+            await queue.acquire()
+        except RequestShed as e:
+            ADMISSION_SHED_REQUESTS.labels(route_class, e.reason).inc()
+            response = JSONResponse(
+                {"detail": "Server is overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            queue.release(time.perf_counter() - started)
@@ -0,0 +1,108 @@
+"""
+Measures the cold import cost of a module, app.main by default, in fresh
+interpreters with -X importtime, and lists the packages it spends the most
+time on. The run fails when the import is slower than the stored baseline
+by more than --threshold, or when it loads a module only needed once a
+notification is sent (see app.observers.notification_tasks).
+
+    python -m app.benchmarks.import_time
+    python -m app.benchmarks.import_time --module app.celery.celery --top 20
+    python -m app.benchmarks.import_time --save-baseline
+
+Baselines are machine specific, regenerate them with --save-baseline on the
+machine that runs the comparison.
+"""
+
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+from pathlib import Path
+from collections import Counter
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "import_time.json"
+
+# Loaded on first use, importing the API must not pull them in.
+LAZY_MODULES = [
+    "app.celery.celery",
+    "celery",
+    "app.observers.notification_tasks",
+    "opentelemetry.instrumentation.celery",
+    "requests",
+    "mailersend",
+]
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Microseconds spent importing each module itself, by module name."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # The fastest run has the least noise from the rest of the machine.
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    times = min(runs, key=lambda run: sum(run.values()))
+    total = sum(times.values()) / 1e6
+
+    by_package = Counter()
+    for name, self_us in times.items():
+        by_package[name.split(".")[0]] += self_us
+    print(f"import {args.module}: {total * 1000:.0f}ms, {len(times)} modules")
+    for package, self_us in by_package.most_common(args.top):
+        print(f"{package:>30} {self_us / 1000:>8.1f}ms")
+
+    loaded = [name for name in LAZY_MODULES if name in times]
+    if args.module == "app.main" and loaded:
+        print(f"REGRESSION loaded eagerly: {', '.join(loaded)}")
+        sys.exit(1)
+
+    if args.save_baseline:
+        stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        stored.setdefault("results", {})[args.module] = total
+        stored["python"] = platform.python_version()
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --save-baseline")
+        return
+    before = json.loads(args.baseline.read_text())["results"].get(args.module)
+    if before and total > before * (1 + args.threshold):
+        print(
+            f"REGRESSION import {args.module}: "
+            f"{before * 1000:.0f}ms -> {total * 1000:.0f}ms"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
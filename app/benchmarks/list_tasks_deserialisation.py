@@ -0,0 +1,104 @@
+"""
+Compares the CPU cost of `TaskService.list_tasks` with full `Task.model_validate`
+on every stored item against the trusted-storage `TaskRecord` path.
+
+    python -m app.benchmarks.list_tasks_deserialisation --sizes 10000 100000
+"""
+
+import time
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+from app.schemas.task import Task, async_iterator_to_list, to_storage_datetime
+from app.schemas.user import User
+from app.services.task_service import TaskService
+from app.repositories.task_repository import TaskRepository
+from app.strategies.task_sort_strategy import SortByPriorityStrategy
+from app.strategies.task_filter_strategy import StatusFilterStrategy
+
+OWNER_EMAIL = "benchmark@example.com"
+
+
+class StaticItemsClient:
+    """Serves pre-built storage items so only deserialisation is measured."""
+
+    def __init__(self, items: list[dict]):
+        self.items = items
+
+    def get_key_condition_equals(self, key, value):
+        return (key, value)
+
+    async def query(self, key_conditions, index_name=None, **kwargs):
+        for item in self.items:
+            yield item
+
+
+class ValidatingTaskService(TaskService):
+    """`list_tasks` as it was before the trusted-storage path."""
+
+    async def list_tasks(self, user, filter_strategy=None, sort_strategy=None):
+        tasks = await async_iterator_to_list(
+            self.repository.get_task_by_owner(user.email)
+        )
+        if filter_strategy:
+            tasks = filter_strategy.filter(tasks)
+        if sort_strategy:
+            tasks = sort_strategy.sort(tasks)
+        return tasks
+
+
+def build_items(count: int) -> list[dict]:
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    statuses = ["pending", "completed", "cancelled"]
+    return [
+        {
+            "owner_email": OWNER_EMAIL,
+            "task_id": f"task-{i}",
+            "title": f"Task {i}",
+            "description": "Lorem ipsum dolor sit amet " * 4,
+            "status": statuses[i % 3],
+            "priority": float(i % 5 + 1),
+            "notifier_id": None,
+            "due_date": to_storage_datetime(now + timedelta(hours=i)),
+            "created_at": to_storage_datetime(now - timedelta(minutes=i)),
+            "updated_at": to_storage_datetime(now),
+        }
+        for i in range(count)
+    ]
+
+
+def measure(service: TaskService, user: User, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        asyncio.run(
+            service.list_tasks(
+                user=user,
+                filter_strategy=StatusFilterStrategy("pending"),
+                sort_strategy=SortByPriorityStrategy(),
+            )
+        )
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    user = User(username="benchmark", email=OWNER_EMAIL, password="x" * 8)
+    print(f"{'items':>8} {'validated (s)':>14} {'trusted (s)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        repository = TaskRepository(dynamo_client=StaticItemsClient(build_items(size)))
+        validated = measure(ValidatingTaskService(repository), user, args.repeat)
+        trusted = measure(TaskService(repository), user, args.repeat)
+        print(
+            f"{size:>8} {validated:>14.3f} {trusted:>12.3f} {validated / trusted:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
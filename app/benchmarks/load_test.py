@@ -0,0 +1,444 @@
+"""
+Load test driving every route of the tasks and users routers against a
+running API, reporting throughput and p50/p95/p99 latency per route to JSON.
+
+Run the API against DynamoDB Local (docker-compose `database` service) with
+Celery publishing to an in-memory broker:
+
+    CELERY_BROKER_URL=memory:// CELERY_RESULT_BACKEND=cache+memory:// \\
+    DYNAMO_ENDPOINT_URL=http://localhost:8000 \\
+    uvicorn app.main:app --port 8001
+
+    DYNAMO_ENDPOINT_URL=http://localhost:8000 \\
+    python -m app.benchmarks.load_test --create-tables \\
+        --scenario list_heavy --output list_heavy.json --compare baseline.json
+
+With --in-process the API is served from this process on the memory
+DynamoDB backend (DYNAMO_BACKEND=memory), no DynamoDB Local or server
+needed; --latency-profile adds simulated DynamoDB latency and throttling.
+Redis is still used for task events and Idempotency-Key handling.
+
+Scenarios: login_burst, list_heavy, write_heavy, large_owner, all_routes.
+With --compare the run fails when a route's p95 latency grows, or its
+throughput drops, by more than --threshold against the baseline report.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional
+
+from aiohttp import ClientSession, DummyCookieJar
+from yarl import URL
+
+from app import settings
+from app.clients.dynamo_client import DynamoDBClient
+from app.clients.dynamo_tables import create_tables
+from app.clients.memory_dynamo import LATENCY_PROFILES, memory_dynamo
+
+PASSWORD = "loadtest-password1"
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+
+    def record(self, route: str, seconds: float, ok: bool) -> None:
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def summary(self) -> dict:
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        routes = {}
+        all_latencies = []
+        for route, latencies in sorted(self.latencies.items()):
+            all_latencies += latencies
+            routes[route] = self._stats(latencies, self.errors[route], elapsed)
+        total = self._stats(all_latencies, sum(self.errors.values()), elapsed)
+        return {"elapsed_s": round(elapsed, 3), "routes": routes, "total": total}
+
+    def _stats(self, latencies: list[float], errors: int, elapsed: float) -> dict:
+        values = sorted(latencies)
+        return {
+            "requests": len(values),
+            "errors": errors,
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+        }
+
+
+class ApiClient:
+    def __init__(self, session: ClientSession, base_url: str, recorder: Recorder):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+
+    async def request(
+        self,
+        route: str,
+        method: str,
+        path: str,
+        token: Optional[str] = None,
+        expected: tuple[int, ...] = (200, 201, 204),
+        stream: bool = False,
+        **kwargs,
+    ):
+        headers = kwargs.pop("headers", {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        start = time.perf_counter()
+        async with self.session.request(
+            method, f"{self.base_url}{path}", headers=headers, **kwargs
+        ) as response:
+            # Streams are measured to the first byte, then closed.
+            body = None if stream else await response.read()
+            elapsed = time.perf_counter() - start
+        self.recorder.record(route, elapsed, response.status in expected)
+        if body and response.content_type == "application/json":
+            return response.status, json.loads(body)
+        return response.status, None
+
+
+class VirtualUser:
+    def __init__(self, api: ApiClient, email: str):
+        self.api = api
+        self.email = email
+        self.access_token: Optional[str] = None
+        self.refresh_token: Optional[str] = None
+        self.task_ids: list[str] = []
+
+    async def register(self) -> None:
+        await self.api.request(
+            "POST /users/register",
+            "POST",
+            "/users/register",
+            json={
+                "username": self.email.split("@")[0],
+                "email": self.email,
+                "password": PASSWORD,
+            },
+            expected=(201, 400),
+        )
+
+    async def login(self) -> None:
+        _, body = await self.api.request(
+            "POST /users/login",
+            "POST",
+            "/users/login",
+            json={"email": self.email, "password": PASSWORD},
+        )
+        self.access_token = body["access_token"]
+        self.refresh_token = body["refresh_token"]
+
+    async def create_task(self) -> Optional[str]:
+        due_date = datetime.now(timezone.utc) + timedelta(days=30)
+        _, body = await self.api.request(
+            "POST /tasks",
+            "POST",
+            "/tasks",
+            token=self.access_token,
+            json={
+                "title": f"Task {uuid.uuid4().hex}",
+                "description": "Load test task " * 8,
+                "priority": random.randint(1, 5),
+                "due_date": due_date.isoformat(),
+            },
+            headers={"Idempotency-Key": str(uuid.uuid4())},
+        )
+        if body:
+            self.task_ids.append(body["task_id"])
+            return body["task_id"]
+        return None
+
+    async def seed_tasks(self, count: int, concurrency: int = 20) -> None:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def create():
+            async with semaphore:
+                await self.create_task()
+
+        await asyncio.gather(*(create() for _ in range(count)))
+
+    def get(self, route: str, path: str, **kwargs):
+        return self.api.request(route, "GET", path, token=self.access_token, **kwargs)
+
+
+async def list_heavy_step(user: VirtualUser) -> None:
+    roll = random.random()
+    task_id = random.choice(user.task_ids) if user.task_ids else "missing"
+    if roll < 0.55:
+        await user.get("GET /tasks", "/tasks")
+    elif roll < 0.65:
+        await user.get("GET /tasks?fields", "/tasks?fields=task_id,title,status")
+    elif roll < 0.80:
+        await user.get("GET /tasks/{task_id}", f"/tasks/{task_id}")
+    elif roll < 0.88:
+        await user.get("GET /tasks/stats", "/tasks/stats")
+    elif roll < 0.95:
+        await user.get("GET /tasks/changes", "/tasks/changes")
+    else:
+        await user.get("GET /users/me", "/users/me")
+
+
+async def write_heavy_step(user: VirtualUser) -> None:
+    task_id = await user.create_task()
+    if not task_id:
+        return
+    await user.api.request(
+        "PUT /tasks/{task_id}",
+        "PUT",
+        f"/tasks/{task_id}",
+        token=user.access_token,
+        json={"priority": random.randint(1, 5)},
+    )
+    await user.api.request(
+        "POST /tasks/{task_id}/complete",
+        "POST",
+        f"/tasks/{task_id}/complete",
+        token=user.access_token,
+    )
+    await user.api.request(
+        "DELETE /tasks/{task_id}",
+        "DELETE",
+        f"/tasks/{task_id}",
+        token=user.access_token,
+    )
+    user.task_ids.remove(task_id)
+
+
+async def large_owner_step(user: VirtualUser) -> None:
+    if random.random() < 0.5:
+        await user.get("GET /tasks", "/tasks")
+    else:
+        await user.get("GET /tasks?sort_by", "/tasks?sort_by=priority&status=pending")
+
+
+async def login_burst_step(user: VirtualUser) -> None:
+    await user.login()
+
+
+async def all_routes_step(user: VirtualUser) -> None:
+    api = user.api
+    await user.login()
+    await user.get("GET /users/me", "/users/me")
+    await api.request(
+        "GET /users/refresh", "GET", "/users/refresh", token=user.refresh_token
+    )
+    await api.request(
+        "PUT /users/{email}",
+        "PUT",
+        f"/users/{user.email}",
+        token=user.access_token,
+        json={"full_name": "Load Test"},
+    )
+    # Regular users may not delete users, the route is measured on its rejection.
+    await api.request(
+        "DELETE /users/{email}",
+        "DELETE",
+        f"/users/missing-{user.email}",
+        token=user.access_token,
+        expected=(401, 403),
+    )
+    await user.get("GET /tasks/events", "/tasks/events", stream=True)
+    task_id = await user.create_task()
+    if not task_id:
+        return
+    await user.get("GET /tasks", "/tasks")
+    await user.get("GET /tasks/{task_id}", f"/tasks/{task_id}")
+    await user.get("GET /tasks/stats", "/tasks/stats")
+    await user.get("GET /tasks/changes", "/tasks/changes")
+    await write_heavy_step(user)
+    user.task_ids.remove(task_id)
+    await api.request(
+        "DELETE /tasks/{task_id}",
+        "DELETE",
+        f"/tasks/{task_id}",
+        token=user.access_token,
+    )
+
+
+Step = Callable[[VirtualUser], Awaitable[None]]
+
+# scenario -> (step, number of users, tasks seeded per user)
+SCENARIOS: dict[str, Callable[[argparse.Namespace], tuple[Step, int, int]]] = {
+    "login_burst": lambda args: (login_burst_step, args.concurrency, 0),
+    "list_heavy": lambda args: (list_heavy_step, args.concurrency, args.tasks_per_user),
+    "write_heavy": lambda args: (write_heavy_step, args.concurrency, 0),
+    "large_owner": lambda args: (large_owner_step, 1, args.large_owner_tasks),
+    "all_routes": lambda args: (all_routes_step, args.concurrency, 0),
+}
+
+
+@asynccontextmanager
+async def in_process_server(base_url: str):
+    """Serves the API on `base_url` from this event loop."""
+    import uvicorn
+
+    # Imported late so the Celery and DynamoDB settings from main() apply.
+    from app.main import app
+
+    url = URL(base_url)
+    server = uvicorn.Server(
+        uvicorn.Config(app, host=url.host, port=url.port, log_level="warning")
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.05)
+    try:
+        yield
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def run_scenario(args: argparse.Namespace) -> dict:
+    if args.in_process:
+        async with in_process_server(args.base_url):
+            return await run_load(args)
+    return await run_load(args)
+
+
+async def run_load(args: argparse.Namespace) -> dict:
+    random.seed(args.seed)
+    step, user_count, tasks_per_user = SCENARIOS[args.scenario](args)
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+
+    # Tokens go in headers, login cookies would be shared between virtual users.
+    async with ClientSession(cookie_jar=DummyCookieJar()) as session:
+        api = ApiClient(session, args.base_url, recorder)
+        users = [
+            VirtualUser(api, f"load-{run_id}-{i}@example.com")
+            for i in range(user_count)
+        ]
+        for user in users:
+            await user.register()
+            await user.login()
+            await user.seed_tasks(tasks_per_user)
+
+        # Only the measured phase is reported, not registration and seeding.
+        recorder.reset()
+        deadline = time.perf_counter() + args.duration
+
+        async def worker(user: VirtualUser):
+            while time.perf_counter() < deadline:
+                await step(user)
+
+        await asyncio.gather(
+            *(worker(users[i % len(users)]) for i in range(args.concurrency))
+        )
+        recorder.finished_at = time.perf_counter()
+
+    return {
+        "scenario": args.scenario,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "seed": args.seed,
+        "dynamo_backend": settings.DYNAMO_BACKEND,
+        **recorder.summary(),
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for route, stats in report["routes"].items():
+        before = baseline.get("routes", {}).get(route)
+        if not before or not before["requests"]:
+            continue
+        if stats["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{route}: p95 {before['p95_ms']}ms -> {stats['p95_ms']}ms"
+            )
+        if stats["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{route}: throughput {before['throughput_rps']} -> "
+                f"{stats['throughput_rps']} req/s"
+            )
+    return regressions
+
+
+async def setup_tables() -> None:
+    async with DynamoDBClient.create_client(table_name="tasks") as client:
+        await create_tables(client.client)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="list_heavy")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--tasks-per-user", type=int, default=50)
+    parser.add_argument("--large-owner-tasks", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_test.json")
+    parser.add_argument("--compare", help="Baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--create-tables", action="store_true")
+    parser.add_argument("--in-process", action="store_true")
+    parser.add_argument("--latency-profile", choices=LATENCY_PROFILES, default="none")
+    args = parser.parse_args()
+
+    if args.in_process:
+        os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+        os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+        settings.DYNAMO_BACKEND = "memory"
+        memory_dynamo.latency = LATENCY_PROFILES[args.latency_profile]
+
+    if args.create_tables:
+        asyncio.run(setup_tables())
+    report = asyncio.run(run_scenario(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"{'route':<32} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    )
+    for route, stats in {**report["routes"], "total": report["total"]}.items():
+        print(
+            f"{route:<32} {stats['requests']:>7} {stats['errors']:>5} "
+            f"{stats['throughput_rps']:>8} {stats['p50_ms']:>8} "
+            f"{stats['p95_ms']:>8} {stats['p99_ms']:>8}"
+        )
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
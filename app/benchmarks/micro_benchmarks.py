@@ -0,0 +1,166 @@
+"""
+Micro-benchmarks of the list_tasks hot path: filter and sort strategies and
+Task (de)serialisation, at several list sizes. Results are compared with a
+stored baseline and the run fails when a case slows down past --threshold.
+
+    python -m app.benchmarks.micro_benchmarks
+    python -m app.benchmarks.micro_benchmarks --sizes 1000 --cases sort_
+    python -m app.benchmarks.micro_benchmarks --save-baseline
+
+Baselines are machine specific, regenerate them with --save-baseline on the
+machine that runs the comparison.
+"""
+
+import sys
+import json
+import timeit
+import argparse
+import platform
+from pathlib import Path
+from datetime import datetime
+from typing import Callable
+
+from app import settings
+from app.schemas.task import Task, TaskRecord
+from app.benchmarks.list_tasks_deserialisation import build_items
+from app.strategies.task_filter_strategy import get_filter_strategy
+from app.strategies.task_query_strategy import TaskColumns, get_query_strategy
+from app.strategies.task_sort_strategy import (
+    CompositeSortStrategy,
+    SortByCreatedAtStrategy,
+    SortByPriorityStrategy,
+    get_sort_strategy,
+)
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "micro_benchmarks.json"
+
+DUE_BEFORE = datetime(2025, 3, 1, tzinfo=settings.TIMEZONE)
+
+
+class Fixtures:
+    def __init__(self, size: int):
+        self.items = build_items(size)
+        self.tasks = [Task.model_validate(item) for item in self.items]
+        self.records = [TaskRecord.from_item(item) for item in self.items]
+
+
+Case = Callable[[Fixtures], Callable[[], object]]
+
+CASES: dict[str, Case] = {
+    "filter_status": lambda f: lambda: get_filter_strategy("pending").filter(f.tasks),
+    "filter_due_date": lambda f: lambda: get_filter_strategy(
+        due_before=DUE_BEFORE
+    ).filter(f.tasks),
+    "filter_status_due_date": lambda f: lambda: get_filter_strategy(
+        "pending", DUE_BEFORE
+    ).filter(f.tasks),
+    "filter_status_due_date_records": lambda f: lambda: get_filter_strategy(
+        "pending", DUE_BEFORE
+    ).filter(f.records),
+    "sort_priority": lambda f: lambda: get_sort_strategy(["priority"]).sort(f.tasks),
+    "sort_created_at": lambda f: lambda: get_sort_strategy(["created_at"]).sort(
+        f.tasks
+    ),
+    "sort_composite": lambda f: lambda: CompositeSortStrategy(
+        [SortByPriorityStrategy(), SortByCreatedAtStrategy()]
+    ).sort(f.tasks),
+    "sort_composite_records": lambda f: lambda: get_sort_strategy(
+        ["priority", "created_at"]
+    ).sort(f.records),
+    "query_columns_filter_sort": lambda f: lambda: get_query_strategy(
+        "status:pending due<=2025-03-01", "priority,created_at"
+    ).select(TaskColumns(f.items)),
+    "query_columns_to_tasks": lambda f: lambda: [
+        TaskRecord.from_item(f.items[i]).to_task()
+        for i in get_query_strategy("status:pending due<=2025-03-01", "priority")
+        .select(TaskColumns(f.items))
+        .tolist()
+    ],
+    "task_model_validate": lambda f: lambda: [
+        Task.model_validate(item) for item in f.items
+    ],
+    "task_model_dump": lambda f: lambda: [task.model_dump() for task in f.tasks],
+    "task_model_dump_json_mode": lambda f: lambda: [
+        task.model_dump(mode="json") for task in f.tasks
+    ],
+    "task_to_item": lambda f: lambda: [task.to_item() for task in f.tasks],
+    "task_record_from_item": lambda f: lambda: [
+        TaskRecord.from_item(item) for item in f.items
+    ],
+    "task_record_to_task": lambda f: lambda: [record.to_task() for record in f.records],
+}
+
+
+def run(sizes: list[int], cases: list[str], repeat: int) -> dict[str, dict]:
+    results: dict[str, dict] = {case: {} for case in cases}
+    for size in sizes:
+        fixtures = Fixtures(size)
+        for case in cases:
+            timer = timeit.Timer(CASES[case](fixtures))
+            results[case][str(size)] = min(timer.repeat(repeat=repeat, number=1))
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for case, by_size in results.items():
+        for size, seconds in by_size.items():
+            before = baseline.get(case, {}).get(size)
+            if before and seconds > before * (1 + threshold):
+                regressions.append(
+                    f"{case}[{size}]: {before * 1000:.2f}ms -> {seconds * 1000:.2f}ms"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument(
+        "--cases", nargs="+", default=[], help="Only cases starting with these"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    cases = [
+        case
+        for case in CASES
+        if not args.cases or any(case.startswith(prefix) for prefix in args.cases)
+    ]
+    results = run(args.sizes, cases, args.repeat)
+
+    print(f"{'case':<32}" + "".join(f"{size:>12}" for size in args.sizes))
+    for case, by_size in results.items():
+        print(
+            f"{case:<32}"
+            + "".join(f"{by_size[str(size)] * 1000:>10.2f}ms" for size in args.sizes)
+        )
+
+    if args.save_baseline:
+        stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        for case, by_size in results.items():
+            stored.setdefault("results", {}).setdefault(case, {}).update(by_size)
+        stored["python"] = platform.python_version()
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --save-baseline")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results, baseline["results"], args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the CPU cost of encoding a list_tasks response: FastAPI's default
+path (response_model validation, serialisation to Python objects and
+json.dumps) against ModelJSONResponse, and checks both produce the same JSON.
+
+    python -m app.benchmarks.task_response_encoding --sizes 10000
+"""
+
+import json
+import time
+import asyncio
+import argparse
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.responses import ModelJSONResponse
+from app.schemas.task import Task, TaskRecord
+from app.benchmarks.list_tasks_deserialisation import build_items
+
+RESPONSE_FIELD = create_model_field(
+    name="Response_list_tasks", type_=list[Task], mode="serialization"
+)
+
+
+def fastapi_default(tasks: list[Task]) -> bytes:
+    content = asyncio.run(
+        serialize_response(field=RESPONSE_FIELD, response_content=tasks)
+    )
+    return JSONResponse(content).body
+
+
+def model_json_response(tasks: list[Task]) -> bytes:
+    return ModelJSONResponse(tasks).body
+
+
+def measure(encode, tasks: list[Task], repeat: int) -> tuple[float, bytes]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        body = encode(tasks)
+        best = min(best, time.process_time() - start)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'tasks':>8} {'default (s)':>12} {'fast (s)':>9} "
+        f"{'fast tasks/s':>13} {'fast MB/s':>10} {'speedup':>8}"
+    )
+    for size in args.sizes:
+        tasks = [TaskRecord.from_item(item).to_task() for item in build_items(size)]
+        default, expected = measure(fastapi_default, tasks, args.repeat)
+        fast, body = measure(model_json_response, tasks, args.repeat)
+        assert json.loads(body) == json.loads(expected), "encodings differ"
+        print(
+            f"{size:>8} {default:>12.3f} {fast:>9.3f} {size / fast:>13,.0f} "
+            f"{len(body) / fast / 1e6:>10.1f} {default / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
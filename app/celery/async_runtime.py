@@ -0,0 +1,111 @@
+"""
+Asyncio runtime of the Celery worker for I/O-bound tasks.
+
+Every worker process runs one event loop in a background thread with one
+pooled aiohttp session. A task calls `async_runtime.run(coro_fn, *args)`,
+which runs `coro_fn(session, *args)` on the loop and blocks its pool
+thread until it is done. With the threads pool (`-P threads -c 256`) one
+process then has hundreds of deliveries waiting on the network at once;
+the prefork pool still works, each child gets its own loop.
+
+At most CELERY_ASYNC_CONCURRENCY coroutines run at once. When the worker
+shuts down, coroutines in flight get CELERY_ASYNC_SHUTDOWN_TIMEOUT to
+finish, the rest are cancelled and their tasks fail, then the session is
+closed.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from celery.signals import worker_process_shutdown, worker_shutdown
+
+from app import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HTTP_TIMEOUT = ClientTimeout(total=30)
+
+
+class AsyncRuntime:
+    def __init__(self, concurrency: int, shutdown_timeout: float):
+        self.concurrency = concurrency
+        self.shutdown_timeout = shutdown_timeout
+        self.lock = threading.Lock()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.session: Optional[ClientSession] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.pid: Optional[int] = None
+
+    def run(self, coro_fn: Callable[..., Awaitable[T]], *args: Any) -> T:
+        """Runs `coro_fn(session, *args)` on the loop and returns its result."""
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(
+            self._limited(coro_fn, *args), loop
+        ).result()
+
+    async def _limited(self, coro_fn: Callable[..., Awaitable[T]], *args: Any) -> T:
+        async with self.semaphore:
+            return await coro_fn(self.session, *args)
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self.lock:
+            # Forked pool processes inherit the runtime but not its thread.
+            if self.loop is None or self.pid != os.getpid():
+                self._start()
+            return self.loop
+
+    def _start(self) -> None:
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(
+            target=loop.run_forever, name="celery-async-runtime", daemon=True
+        )
+        thread.start()
+
+        async def setup():
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            self.session = ClientSession(
+                connector=TCPConnector(limit=self.concurrency), timeout=HTTP_TIMEOUT
+            )
+
+        asyncio.run_coroutine_threadsafe(setup(), loop).result()
+        self.loop, self.thread, self.pid = loop, thread, os.getpid()
+
+    def stop(self) -> None:
+        with self.lock:
+            if self.loop is None or self.pid != os.getpid():
+                return
+            loop, self.loop = self.loop, None
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            self.thread.join()
+            loop.close()
+
+    async def _shutdown(self) -> None:
+        in_flight = asyncio.all_tasks() - {asyncio.current_task()}
+        if in_flight:
+            _, unfinished = await asyncio.wait(in_flight, timeout=self.shutdown_timeout)
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                logger.warning(f"Cancelled {len(unfinished)} unfinished deliveries")
+        await self.session.close()
+
+
+async_runtime = AsyncRuntime(
+    settings.CELERY_ASYNC_CONCURRENCY, settings.CELERY_ASYNC_SHUTDOWN_TIMEOUT
+)
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def _stop_async_runtime(**kwargs):
+    async_runtime.stop()
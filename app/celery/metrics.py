@@ -0,0 +1,57 @@
+"""
+Celery signal handlers recording the Celery metrics of app.metrics, and the
+worker's metrics endpoint. Registered by importing app.celery.celery, so
+processes that never publish a task do not load Celery.
+"""
+
+import time
+from typing import Optional
+
+from celery.signals import (
+    after_task_publish,
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_init,
+)
+from prometheus_client import start_http_server
+
+from app import settings
+from app.metrics import CELERY_PUBLISH_SECONDS, CELERY_TASK_SECONDS, get_registry
+
+_started: dict[str, float] = {}
+
+
+def _elapsed(key: Optional[str]) -> Optional[float]:
+    start = _started.pop(key, None) if key else None
+    return time.perf_counter() - start if start is not None else None
+
+
+@before_task_publish.connect
+def _before_task_publish(headers=None, **kwargs):
+    if headers and "id" in headers:
+        _started[f"publish:{headers['id']}"] = time.perf_counter()
+
+
+@after_task_publish.connect
+def _after_task_publish(sender=None, headers=None, **kwargs):
+    elapsed = _elapsed(f"publish:{headers['id']}" if headers else None)
+    if elapsed is not None:
+        CELERY_PUBLISH_SECONDS.labels(sender).observe(elapsed)
+
+
+@task_prerun.connect
+def _task_prerun(task_id=None, **kwargs):
+    _started[f"run:{task_id}"] = time.perf_counter()
+
+
+@task_postrun.connect
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    elapsed = _elapsed(f"run:{task_id}")
+    if elapsed is not None:
+        CELERY_TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(elapsed)
+
+
+@worker_init.connect
+def _start_worker_metrics_server(**kwargs):
+    start_http_server(settings.CELERY_METRICS_PORT, registry=get_registry())
@@ -1,11 +1,15 @@
 import os
+import time
+import asyncio
 import logging
 
 from yarl import URL
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Optional, Union
+from functools import reduce, wraps
+from typing import Any, AsyncIterator, Iterable, Mapping, Optional, Sequence, Union
 
 from aiodynamo.errors import ItemNotFound
+from aiodynamo.models import BatchWriteRequest, ReturnValues, RetryTimeout
 from aiodynamo.client import Client, Table
 from aiodynamo.http.aiohttp import AIOHTTP
 from aiodynamo.credentials import Credentials
@@ -13,6 +17,7 @@ from aiodynamo.expressions import (
     Condition,
     F,
     HashKey,
+    ProjectionExpression,
     RangeKey,
     UpdateExpression,
     KeyCondition,
@@ -23,6 +28,9 @@ from botocore.exceptions import BotoCoreError
 from pydantic import BaseModel
 
 from app import settings
+from app.metrics import DYNAMO_CONSUMED_CAPACITY, DYNAMO_OPERATION_SECONDS
+from app.tracing import tracer
+from app.clients.memory_dynamo import MemoryDynamo, MemoryTable, memory_dynamo
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +48,95 @@ class DynamoPage(BaseModel):
     last_evaluated_key: Optional[dict]
 
 
+# Data plane actions asked to report the capacity they consumed.
+CAPACITY_ACTIONS = {
+    "GetItem",
+    "PutItem",
+    "UpdateItem",
+    "DeleteItem",
+    "Query",
+    "Scan",
+    "BatchWriteItem",
+}
+
+# Most puts and deletes DynamoDB accepts in one BatchWriteItem request.
+BATCH_WRITE_ITEMS = 25
+
+
+class MeteredClient(Client):
+    """Client recording the capacity consumed by every data plane request."""
+
+    async def send_request(
+        self, *, action: str, payload: Mapping[str, Any]
+    ) -> dict[str, Any]:
+        if action not in CAPACITY_ACTIONS:
+            return await super().send_request(action=action, payload=payload)
+        response = await super().send_request(
+            action=action, payload={**payload, "ReturnConsumedCapacity": "TOTAL"}
+        )
+        capacity = response.get("ConsumedCapacity")
+        if isinstance(capacity, list):
+            # Batch requests report the capacity of each of their tables.
+            for table_capacity in capacity:
+                DYNAMO_CONSUMED_CAPACITY.labels(
+                    table_capacity["TableName"], action
+                ).inc(table_capacity["CapacityUnits"])
+        elif capacity:
+            DYNAMO_CONSUMED_CAPACITY.labels(payload["TableName"], action).inc(
+                capacity["CapacityUnits"]
+            )
+        return response
+
+
+def _span_attributes(table_name: str, operation: str) -> dict:
+    return {
+        "db.system": "dynamodb",
+        "db.operation": operation,
+        "aws.dynamodb.table_names": [table_name],
+    }
+
+
+def timed(operation: str):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            with (
+                tracer.start_as_current_span(
+                    f"DynamoDB.{operation}",
+                    attributes=_span_attributes(self.table.name, operation),
+                ),
+                DYNAMO_OPERATION_SECONDS.labels(self.table.name, operation).time(),
+            ):
+                return await func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+async def timed_iterator(
+    table_name: str, operation: str, iterator: AsyncIterator[dict]
+) -> AsyncIterator[dict]:
+    """Times the whole iteration, without the time spent by the consumer."""
+    elapsed = 0.0
+    span = tracer.start_span(
+        f"DynamoDB.{operation}", attributes=_span_attributes(table_name, operation)
+    )
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = await anext(iterator)
+            except StopAsyncIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        DYNAMO_OPERATION_SECONDS.labels(table_name, operation).observe(elapsed)
+        span.end()
+
+
 def dynamo_error_handler(func):
     async def wrapper(*args, **kwargs):
         try:
@@ -52,9 +149,11 @@ def dynamo_error_handler(func):
 
 
 class DynamoDBClient:
-    def __init__(self, table: Table, client: Client):
-        self.table: Table = table
-        self.client: Client = client
+    def __init__(
+        self, table: Union[Table, MemoryTable], client: Union[Client, MemoryDynamo]
+    ):
+        self.table: Union[Table, MemoryTable] = table
+        self.client: Union[Client, MemoryDynamo] = client
         self.logger = logging.getLogger(__name__)
 
     def get_key_condition_equals(self, key: str, value: Union[str, int]) -> HashKey:
@@ -63,9 +162,17 @@ class DynamoDBClient:
     def get_key_condition_begins_with(self, key: str, value: str) -> Condition:
         return RangeKey(key).begins_with(value)
 
+    def get_key_condition_greater_than(
+        self, key: str, value: Union[str, int]
+    ) -> Condition:
+        return RangeKey(key).gt(value)
+
     def get_filter_condition_equals(self, key: str, value: str) -> Condition:
         return F(key).equals(value)
 
+    def get_projection(self, fields: Iterable[str]) -> ProjectionExpression:
+        return reduce(lambda acc, field: acc & field, (F(f) for f in fields))
+
     @property
     def table_name(self) -> str:
         return settings.TABLE_ARNS[self.table.name]
@@ -75,21 +182,29 @@ class DynamoDBClient:
         key_conditions: HashKey,
         filter_expression: Optional[Condition] = None,
         index_name: Optional[str] = None,
+        projection: Optional[ProjectionExpression] = None,
     ) -> AsyncIterator[dict]:
         if filter_expression:
-            return self.table.query(
+            items = self.table.query(
                 key_condition=key_conditions,
                 index=index_name,
                 filter_expression=filter_expression,
+                projection=projection,
+            )
+        else:
+            items = self.table.query(
+                key_condition=key_conditions, index=index_name, projection=projection
             )
-        return self.table.query(key_condition=key_conditions, index=index_name)
+        return timed_iterator(self.table.name, "query", items)
 
+    @timed("query_single_page")
     async def query_single_page(
         self,
         key_conditions: HashKey,
         dynamo_page_request: DynamoPageRequest,
         filter_expression: Optional[Condition] = None,
         index_name: Optional[str] = None,
+        projection: Optional[ProjectionExpression] = None,
     ) -> DynamoPage:
         page = await self.table.query_single_page(
             key_condition=key_conditions,
@@ -97,32 +212,88 @@ class DynamoDBClient:
             filter_expression=filter_expression,
             start_key=dynamo_page_request.last_evaluated_key,
             limit=dynamo_page_request.records,
+            projection=projection,
         )
         return DynamoPage(items=page.items, last_evaluated_key=page.last_evaluated_key)
 
     @dynamo_error_handler
-    async def get_item(self, key: dict[str, str]):
+    @timed("get_item")
+    async def get_item(
+        self,
+        key: dict[str, str],
+        projection: Optional[ProjectionExpression] = None,
+    ):
         try:
-            return await self.table.get_item(key=key)
+            return await self.table.get_item(key=key, projection=projection)
         except ItemNotFound:
             return None
 
     @dynamo_error_handler
-    async def put_item(self, item: dict) -> Optional[dict]:
-        return await self.table.put_item(item=item)
+    @timed("put_item")
+    async def put_item(
+        self, item: dict, return_values: ReturnValues = ReturnValues.none
+    ) -> Optional[dict]:
+        return await self.table.put_item(item=item, return_values=return_values)
 
     @dynamo_error_handler
+    @timed("batch_write")
+    async def batch_write(
+        self,
+        items_to_put: Sequence[dict] = (),
+        keys_to_delete: Sequence[dict] = (),
+    ) -> None:
+        """
+        Puts and deletes items in concurrent BatchWriteItem requests of up to
+        BATCH_WRITE_ITEMS, resending unprocessed ones with the client's
+        throttling backoff. An item may only be written once per call.
+        """
+        writes = [("put", item) for item in items_to_put]
+        writes += [("delete", key) for key in keys_to_delete]
+        await asyncio.gather(
+            *(
+                self._batch_write(writes[start : start + BATCH_WRITE_ITEMS])
+                for start in range(0, len(writes), BATCH_WRITE_ITEMS)
+            )
+        )
+
+    async def _batch_write(self, writes: list[tuple[str, dict]]) -> None:
+        request = BatchWriteRequest(
+            keys_to_delete=[item for op, item in writes if op == "delete"],
+            items_to_put=[item for op, item in writes if op == "put"],
+        )
+        try:
+            async for _ in self.client.throttle_config.attempts():
+                results = await self.client.batch_write({self.table.name: request})
+                result = results.get(self.table.name)
+                if not result or not (result.undeleted_keys or result.unput_items):
+                    return
+                request = BatchWriteRequest(
+                    keys_to_delete=result.undeleted_keys,
+                    items_to_put=result.unput_items,
+                )
+        except RetryTimeout:
+            pass
+        raise DynamoDBClientError(
+            f"{len(request.keys_to_delete) + len(request.items_to_put)} items "
+            f"of a batch write to {self.table.name} were left unprocessed"
+        )
+
+    @dynamo_error_handler
+    @timed("update_item")
     async def update_item(
         self,
         key: dict[str, str],
         update_expression: UpdateExpression,
+        condition: Optional[Condition] = None,
     ) -> Optional[dict]:
         return await self.table.update_item(
             key=key,
             update_expression=update_expression,
+            condition=condition,
         )
 
     @dynamo_error_handler
+    @timed("count_items")
     async def count_items(
         self, key_condition: KeyCondition, index_name: str, table: str
     ) -> int:
@@ -132,32 +303,84 @@ class DynamoDBClient:
 
     @dynamo_error_handler
     async def get_all_items(self) -> AsyncIterator[dict]:
-        async def async_gen():
-            async for item in self.table.scan():
-                yield item
-
-        return async_gen()
+        return timed_iterator(self.table.name, "scan", self.table.scan())
 
     @asynccontextmanager
     @staticmethod
     async def create_client(table_name: str):
-        async with ClientSession() as session:
-            client = Client(
-                AIOHTTP(session),
-                Credentials.auto(),
-                region=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
-                endpoint=(
-                    URL(os.environ.get("DYNAMO_ENDPOINT_URL", ""))
-                    if os.environ.get("DYNAMO_ENDPOINT_URL")
-                    else None
-                ),
+        """
+        Uses the process's shared connection when it is open, as in the API,
+        otherwise opens one for the lifetime of the context.
+        """
+        if settings.DYNAMO_BACKEND == "memory":
+            yield DynamoDBClient(
+                table=memory_dynamo.table(table_name), client=memory_dynamo
             )
-            table = client.table(table_name)
-            yield DynamoDBClient(table=table, client=client)
+            return
+        if shared_dynamo_connection.client:
+            client = shared_dynamo_connection.client
+            yield DynamoDBClient(table=client.table(table_name), client=client)
+            return
+        async with ClientSession() as session:
+            client = create_metered_client(session)
+            yield DynamoDBClient(table=client.table(table_name), client=client)
 
-    async def delete_item(self, key: dict[str, str]) -> None:
-        await self.table.delete_item(key=key)
+    @timed("delete_item")
+    async def delete_item(
+        self, key: dict[str, str], condition: Optional[Condition] = None
+    ) -> None:
+        await self.table.delete_item(key=key, condition=condition)
 
-    async def scan(self) -> AsyncIterator[dict]:
-        async for item in self.table.scan():
-            yield item
+    @timed("scan_single_page")
+    async def scan_single_page(
+        self,
+        dynamo_page_request: DynamoPageRequest,
+        filter_expression: Optional[Condition] = None,
+    ) -> DynamoPage:
+        page = await self.table.scan_single_page(
+            start_key=dynamo_page_request.last_evaluated_key,
+            limit=dynamo_page_request.records,
+            filter_expression=filter_expression,
+        )
+        return DynamoPage(items=page.items, last_evaluated_key=page.last_evaluated_key)
+
+    def scan(self) -> AsyncIterator[dict]:
+        return timed_iterator(self.table.name, "scan", self.table.scan())
+
+
+def create_metered_client(session: ClientSession) -> MeteredClient:
+    return MeteredClient(
+        AIOHTTP(session),
+        Credentials.auto(),
+        region=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
+        endpoint=(
+            URL(os.environ.get("DYNAMO_ENDPOINT_URL", ""))
+            if os.environ.get("DYNAMO_ENDPOINT_URL")
+            else None
+        ),
+    )
+
+
+class SharedDynamoConnection:
+    """
+    One aiohttp session, with its connection pool, and one client whose
+    tables every DynamoDBClient of the process uses while it is open.
+    """
+
+    def __init__(self):
+        self.session: Optional[ClientSession] = None
+        self.client: Optional[MeteredClient] = None
+
+    async def open(self) -> None:
+        if settings.DYNAMO_BACKEND == "memory" or self.session:
+            return
+        self.session = ClientSession()
+        self.client = create_metered_client(self.session)
+
+    async def close(self) -> None:
+        if self.session:
+            session, self.session, self.client = self.session, None, None
+            await session.close()
+
+
+shared_dynamo_connection = SharedDynamoConnection()
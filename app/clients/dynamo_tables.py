@@ -0,0 +1,81 @@
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from aiodynamo.client import Client
+from aiodynamo.models import (
+    GlobalSecondaryIndex,
+    KeySchema,
+    KeySpec,
+    KeyType,
+    PayPerRequest,
+    Projection,
+    ProjectionType,
+)
+
+from app import settings
+
+
+@dataclass(frozen=True)
+class TableSchema:
+    keys: KeySchema
+    indexes: dict[str, KeySchema] = field(default_factory=dict)
+    ttl_attribute: Optional[str] = None
+
+
+def _keys(hash_key: str, range_key: Optional[str] = None, range_type=KeyType.string):
+    return KeySchema(
+        hash_key=KeySpec(hash_key, KeyType.string),
+        range_key=KeySpec(range_key, range_type) if range_key else None,
+    )
+
+
+# Key schemas of every table the application uses, by TABLE_ARNS name.
+TABLE_SCHEMAS = {
+    "tasks": TableSchema(
+        keys=_keys("task_id"),
+        indexes={
+            "tasks_owner_email": _keys("owner_email"),
+            "tasks_owner_email_updated_at": _keys(
+                "owner_email", "updated_at", KeyType.number
+            ),
+            "tasks_owner_shard": _keys("owner_shard"),
+            "tasks_owner_shard_updated_at": _keys(
+                "owner_shard", "updated_at", KeyType.number
+            ),
+        },
+    ),
+    "tasks_archive": TableSchema(
+        keys=_keys("task_id"),
+        indexes={"tasks_owner_email": _keys("owner_email")},
+    ),
+    "users": TableSchema(keys=_keys("email")),
+    "task_stats": TableSchema(keys=_keys("owner_email")),
+    "task_tombstones": TableSchema(
+        keys=_keys("owner_email", "tombstone_id"), ttl_attribute="expires_at"
+    ),
+    "task_search": TableSchema(keys=_keys("owner_email", "posting_id")),
+}
+
+
+async def create_tables(client: Client, names: Optional[Iterable[str]] = None) -> None:
+    """Creates the missing application tables, e.g. in DynamoDB Local."""
+    for name in names or TABLE_SCHEMAS:
+        schema = TABLE_SCHEMAS[name]
+        table_name = settings.TABLE_ARNS[name]
+        if await client.table_exists(table_name):
+            continue
+        await client.create_table(
+            table_name,
+            PayPerRequest(),
+            schema.keys,
+            gsis=[
+                GlobalSecondaryIndex(
+                    index_name, keys, Projection(ProjectionType.all), None
+                )
+                for index_name, keys in schema.indexes.items()
+            ]
+            or None,
+            wait_for_active=True,
+        )
+        if schema.ttl_attribute:
+            await client.table(table_name).time_to_live.enable(schema.ttl_attribute)
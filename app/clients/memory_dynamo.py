@@ -0,0 +1,683 @@
+"""
+In-process stand-in for DynamoDB, selected with DYNAMO_BACKEND=memory.
+
+MemoryTable implements the aiodynamo Table methods DynamoDBClient uses on top
+of dicts. Tables and their indexes come from TABLE_SCHEMAS, so queries see
+the same key conditions, range key order, filters, projections and
+pagination keys as on DynamoDB. Items pass through the aiodynamo
+serializers, so callers get the same types back (numbers as floats) and
+never share mutable state with the store.
+"""
+
+import asyncio
+import bisect
+import operator
+import random
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, AsyncIterator, Optional
+
+from aiodynamo.errors import (
+    ConditionalCheckFailed,
+    ItemNotFound,
+    TableNotFound,
+    Throttled,
+    ValidationException,
+)
+from aiodynamo.expressions import (
+    AndCondition,
+    Append,
+    AttributeTypeCondition,
+    BeginsWith,
+    Between,
+    Comparison,
+    Condition,
+    Contains,
+    DoesNotExist,
+    Exists,
+    F,
+    FieldList,
+    HashAndRangeKeyCondition,
+    HashKey,
+    IfNotExists,
+    In,
+    KeyCondition,
+    KeyPath,
+    Modify,
+    NotCondition,
+    OrCondition,
+    ProjectionExpression,
+    SizeCondition,
+    UpdateExpression,
+    Value,
+)
+from aiodynamo.models import (
+    BatchWriteRequest,
+    BatchWriteResult,
+    KeySchema,
+    KeyType,
+    Page,
+    RetryConfig,
+    RetryTimeout,
+    ReturnValues,
+)
+from aiodynamo.utils import deserialize, dy2py, low_level_serialize, py2dy, serialize
+
+from app import settings
+from app.clients.dynamo_tables import TABLE_SCHEMAS, TableSchema
+
+# Items per query or scan page when no limit is given, standing in for the
+# 1 MB DynamoDB page with ~1 KB tasks.
+PAGE_ITEMS = 1000
+
+MISSING = object()
+
+NUMBERS = (int, float, Decimal)
+
+COMPARISONS = {
+    "=": operator.eq,
+    "<>": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """
+    Latency added to every request and the share of requests throttled.
+    Throttled requests are retried with the client's backoff, like aiodynamo
+    does, and raise Throttled once it gives up.
+    """
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    throttle_rate: float = 0.0
+
+    async def request(self, retry: RetryConfig) -> None:
+        if not (self.latency_ms or self.jitter_ms or self.throttle_rate):
+            return
+        try:
+            async for _ in retry.attempts():
+                delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+                await asyncio.sleep(delay / 1000)
+                if random.random() >= self.throttle_rate:
+                    return
+        except RetryTimeout:
+            raise Throttled()
+
+
+LATENCY_PROFILES = {
+    "none": LatencyProfile(),
+    "local": LatencyProfile(latency_ms=1, jitter_ms=2),
+    "aws": LatencyProfile(latency_ms=4, jitter_ms=6),
+    "throttled": LatencyProfile(latency_ms=4, jitter_ms=6, throttle_rate=0.05),
+}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, NUMBERS) and not isinstance(value, bool)
+
+
+def _normalize(value):
+    """The value as DynamoDB stores it, numbers as Decimal."""
+    return deserialize(serialize(value), Decimal)
+
+
+def _get_path(item: dict, path: KeyPath):
+    value = item.get(path.root, MISSING)
+    for part in path.parts:
+        try:
+            value = value[part]
+        except (KeyError, IndexError, TypeError):
+            return MISSING
+    return value
+
+
+def _set_path(item: dict, path: KeyPath, value) -> None:
+    if not path.parts:
+        item[path.root] = value
+        return
+    try:
+        target = item[path.root]
+        for part in path.parts[:-1]:
+            target = target[part]
+        target[path.parts[-1]] = value
+    except (KeyError, IndexError, TypeError):
+        raise ValidationException("The document path provided is invalid for update")
+
+
+def _remove_path(item: dict, path: KeyPath) -> None:
+    if not path.parts:
+        item.pop(path.root, None)
+        return
+    parent = _get_path(item, KeyPath(path.root, path.parts[:-1]))
+    try:
+        del parent[path.parts[-1]]
+    except (KeyError, IndexError, TypeError):
+        pass
+
+
+def _compare(left, op: str, right) -> bool:
+    if left is MISSING or right is MISSING:
+        return False
+    if op in ("=", "<>"):
+        return COMPARISONS[op](left, right)
+    # Ordering is only defined between numbers, strings or binaries.
+    if _is_number(left) and _is_number(right):
+        return COMPARISONS[op](left, right)
+    if type(left) is type(right) and isinstance(left, (str, bytes)):
+        return COMPARISONS[op](left, right)
+    return False
+
+
+def _size(value):
+    if _is_number(value) or isinstance(value, bool) or value is None:
+        return MISSING
+    return len(value)
+
+
+def evaluate(condition: Condition, item: dict) -> bool:
+    if isinstance(condition, AndCondition):
+        return all(evaluate(child, item) for child in condition.children)
+    if isinstance(condition, OrCondition):
+        return any(evaluate(child, item) for child in condition.children)
+    if isinstance(condition, NotCondition):
+        return not evaluate(condition.base, item)
+
+    value = _get_path(item, condition.field.path)
+    if isinstance(condition, Exists):
+        return value is not MISSING
+    if isinstance(condition, DoesNotExist):
+        return value is MISSING
+    if value is MISSING:
+        return False
+    if isinstance(condition, AttributeTypeCondition):
+        return low_level_serialize(value)[0] == condition.attribute_type.value
+    if isinstance(condition, BeginsWith):
+        return type(value) is type(condition.substr) and value.startswith(
+            condition.substr
+        )
+    if isinstance(condition, Between):
+        return _compare(value, ">=", _normalize(condition.low)) and _compare(
+            value, "<=", _normalize(condition.high)
+        )
+    if isinstance(condition, Contains):
+        other = _normalize(condition.value)
+        if isinstance(value, str):
+            return isinstance(other, str) and other in value
+        return isinstance(value, (set, list)) and other in value
+    if isinstance(condition, In):
+        return any(_compare(value, "=", _normalize(v)) for v in condition.values)
+    if isinstance(condition, Comparison):
+        other = condition.other
+        other = (
+            _get_path(item, other.path) if isinstance(other, F) else _normalize(other)
+        )
+        return _compare(value, condition.operator, other)
+    if isinstance(condition, SizeCondition):
+        other = condition.value
+        other = (
+            _get_path(item, other.path) if isinstance(other, F) else _normalize(other)
+        )
+        return _compare(_size(value), condition.operator, other)
+    raise ValidationException(f"Unsupported condition {condition!r}")
+
+
+def apply_update(item: dict, update_expression: UpdateExpression) -> None:
+    for field, action in update_expression.set_updates:
+        current = _get_path(item, field.path)
+        if isinstance(action, Value):
+            value = _normalize(action.value)
+        elif isinstance(action, IfNotExists):
+            value = current if current is not MISSING else _normalize(action.value)
+        elif isinstance(action, Modify):
+            if not _is_number(current):
+                raise ValidationException(f"{field!r} is not a number")
+            value = current + _normalize(action.change)
+        elif isinstance(action, Append):
+            if not isinstance(current, list):
+                raise ValidationException(f"{field!r} is not a list")
+            value = current + _normalize(action.values)
+        else:
+            raise ValidationException(f"Unsupported update {action!r}")
+        _set_path(item, field.path, value)
+
+    for field in update_expression.remove:
+        _remove_path(item, field.path)
+
+    for field, value in update_expression.add:
+        current, value = _get_path(item, field.path), _normalize(value)
+        if current is MISSING:
+            _set_path(item, field.path, value)
+        elif _is_number(current) and _is_number(value):
+            _set_path(item, field.path, current + value)
+        elif isinstance(current, set) and isinstance(value, set):
+            _set_path(item, field.path, current | value)
+        else:
+            raise ValidationException(f"Cannot ADD to {field!r}")
+
+    for field, value in update_expression.delete:
+        current = _get_path(item, field.path)
+        if isinstance(current, set):
+            remaining = current - _normalize(value)
+            if remaining:
+                _set_path(item, field.path, remaining)
+            else:
+                _remove_path(item, field.path)
+
+
+def _project(item: dict, projection: Optional[ProjectionExpression]) -> dict:
+    if projection is None:
+        return item
+    fields = projection.fields if isinstance(projection, FieldList) else [projection]
+    # Nested paths return their whole top-level attribute.
+    return {
+        field.path.root: item[field.path.root]
+        for field in fields
+        if field.path.root in item
+    }
+
+
+class _Index:
+    """
+    Primary keys of the items in a table or index, per hash key, sorted by
+    range key and then primary key. Items missing a key attribute, or
+    holding one of the wrong type, are not in the index.
+    """
+
+    def __init__(self, keys: KeySchema):
+        self.hash_key = keys.hash_key
+        self.range_key = keys.range_key
+        self.partitions: dict[Any, list[tuple]] = {}
+
+    @property
+    def key_names(self) -> list[str]:
+        return [key.name for key in (self.hash_key, self.range_key) if key]
+
+    def position(self, item: dict, primary_key: tuple) -> Optional[tuple]:
+        for key in (self.hash_key, self.range_key):
+            if key and not _has_type(item.get(key.name, MISSING), key.type):
+                return None
+        if self.range_key:
+            return (item[self.range_key.name], primary_key)
+        return (primary_key,)
+
+    def add(self, item: dict, primary_key: tuple) -> None:
+        position = self.position(item, primary_key)
+        if position is not None:
+            partition = self.partitions.setdefault(item[self.hash_key.name], [])
+            bisect.insort(partition, position)
+
+    def remove(self, item: dict, primary_key: tuple) -> None:
+        position = self.position(item, primary_key)
+        if position is None:
+            return
+        partition = self.partitions[item[self.hash_key.name]]
+        del partition[bisect.bisect_left(partition, position)]
+        if not partition:
+            del self.partitions[item[self.hash_key.name]]
+
+    def split_key_condition(
+        self, key_condition: KeyCondition
+    ) -> tuple[HashKey, Optional[Condition]]:
+        if isinstance(key_condition, HashAndRangeKeyCondition):
+            hash_condition = key_condition.hash_key
+            range_condition = key_condition.range_key_condition
+        else:
+            hash_condition, range_condition = key_condition, None
+        range_name = self.range_key.name if self.range_key else None
+        if hash_condition.name != self.hash_key.name or (
+            range_condition is not None
+            and range_condition.field.path.root != range_name
+        ):
+            raise ValidationException("Query condition missed key schema element")
+        return hash_condition, range_condition
+
+
+def _has_type(value, key_type: KeyType) -> bool:
+    if key_type is KeyType.number:
+        return _is_number(value)
+    if key_type is KeyType.binary:
+        return isinstance(value, bytes)
+    return isinstance(value, str)
+
+
+class MemoryTable:
+    def __init__(self, dynamo: "MemoryDynamo", name: str, schema: TableSchema):
+        self.dynamo = dynamo
+        self.name = name
+        self.schema = schema
+        self.items: dict[tuple, dict] = {}
+        # Sorted primary keys, scans return items in this order.
+        self.keys: list[tuple] = []
+        self.indexes: dict[Optional[str], _Index] = {
+            None: _Index(schema.keys),
+            **{name: _Index(keys) for name, keys in schema.indexes.items()},
+        }
+
+    def _primary_key(self, key: dict) -> tuple:
+        table_index = self.indexes[None]
+        values = []
+        for key_spec in (table_index.hash_key, table_index.range_key):
+            if not key_spec:
+                continue
+            value = _normalize(key.get(key_spec.name))
+            if not _has_type(value, key_spec.type):
+                raise ValidationException(
+                    f"Missing or invalid key attribute {key_spec.name}"
+                )
+            values.append(value)
+        return tuple(values)
+
+    def _index(self, index: Optional[str]) -> _Index:
+        try:
+            return self.indexes[index]
+        except KeyError:
+            raise ValidationException(f"The table does not have the index: {index}")
+
+    def _output(
+        self, item: Optional[dict], projection: Optional[ProjectionExpression] = None
+    ) -> Optional[dict]:
+        if item is None:
+            return None
+        return dy2py(py2dy(_project(item, projection)), self.dynamo.numeric_type)
+
+    def _evaluated_key(self, index: _Index, item: dict) -> dict:
+        names = dict.fromkeys([*self.indexes[None].key_names, *index.key_names])
+        return self._output({name: item[name] for name in names})
+
+    def _check(self, condition: Optional[Condition], item: Optional[dict]) -> None:
+        if condition is not None and not evaluate(condition, item or {}):
+            raise ConditionalCheckFailed()
+
+    def _store(
+        self, primary_key: tuple, item: Optional[dict], old: Optional[dict]
+    ) -> None:
+        if old is not None:
+            for index in self.indexes.values():
+                index.remove(old, primary_key)
+        if item is None:
+            del self.items[primary_key]
+            del self.keys[bisect.bisect_left(self.keys, primary_key)]
+            return
+        if old is None:
+            bisect.insort(self.keys, primary_key)
+        self.items[primary_key] = item
+        for index in self.indexes.values():
+            index.add(item, primary_key)
+
+    def _returned(
+        self, return_values: ReturnValues, old: Optional[dict], new: Optional[dict]
+    ) -> Optional[dict]:
+        if return_values in (ReturnValues.all_old, ReturnValues.updated_old):
+            return self._output(old)
+        if return_values in (ReturnValues.all_new, ReturnValues.updated_new):
+            return self._output(new)
+        return None
+
+    async def get_item(
+        self,
+        key: dict,
+        *,
+        projection: Optional[ProjectionExpression] = None,
+        consistent_read: bool = False,
+    ) -> dict:
+        await self.dynamo.request()
+        item = self.items.get(self._primary_key(key))
+        if item is None:
+            raise ItemNotFound(key)
+        return self._output(item, projection)
+
+    async def put_item(
+        self,
+        item: dict,
+        *,
+        return_values: ReturnValues = ReturnValues.none,
+        condition: Optional[Condition] = None,
+    ) -> Optional[dict]:
+        await self.dynamo.request()
+        item = dy2py(py2dy(item), Decimal)
+        primary_key = self._primary_key(item)
+        old = self.items.get(primary_key)
+        self._check(condition, old)
+        self._store(primary_key, item, old)
+        return self._returned(return_values, old, None)
+
+    async def update_item(
+        self,
+        key: dict,
+        update_expression: UpdateExpression,
+        *,
+        return_values: ReturnValues = ReturnValues.none,
+        condition: Optional[Condition] = None,
+    ) -> Optional[dict]:
+        await self.dynamo.request()
+        primary_key = self._primary_key(key)
+        old = self.items.get(primary_key)
+        self._check(condition, old)
+        item = dy2py(py2dy(old or key), Decimal)
+        apply_update(item, update_expression)
+        if self._primary_key(item) != primary_key:
+            raise ValidationException("Cannot update attribute of the primary key")
+        self._store(primary_key, item, old)
+        return self._returned(return_values, old, item)
+
+    async def delete_item(
+        self,
+        key: dict,
+        *,
+        return_values: ReturnValues = ReturnValues.none,
+        condition: Optional[Condition] = None,
+    ) -> Optional[dict]:
+        await self.dynamo.request()
+        primary_key = self._primary_key(key)
+        old = self.items.get(primary_key)
+        self._check(condition, old)
+        if old is not None:
+            self._store(primary_key, None, old)
+        return self._returned(return_values, old, None)
+
+    def _page(
+        self,
+        index: _Index,
+        candidates,
+        limit: Optional[int],
+        filter_expression: Optional[Condition],
+        projection: Optional[ProjectionExpression],
+        range_condition: Optional[Condition] = None,
+    ) -> Page:
+        page_size = min(limit or PAGE_ITEMS, PAGE_ITEMS)
+        items, evaluated = [], 0
+        for primary_key in candidates:
+            item = self.items[primary_key]
+            if range_condition is not None and not evaluate(range_condition, item):
+                continue
+            evaluated += 1
+            if filter_expression is None or evaluate(filter_expression, item):
+                items.append(self._output(item, projection))
+            if evaluated == page_size:
+                return Page(items, self._evaluated_key(index, item))
+        return Page(items, None)
+
+    async def query_single_page(
+        self,
+        key_condition: KeyCondition,
+        *,
+        start_key: Optional[dict] = None,
+        filter_expression: Optional[Condition] = None,
+        scan_forward: bool = True,
+        index: Optional[str] = None,
+        limit: Optional[int] = None,
+        projection: Optional[ProjectionExpression] = None,
+        select=None,
+        consistent_read: bool = False,
+    ) -> Page:
+        await self.dynamo.request()
+        table_index = self._index(index)
+        hash_condition, range_condition = table_index.split_key_condition(key_condition)
+        partition = table_index.partitions.get(_normalize(hash_condition.value), [])
+        if scan_forward:
+            start = 0
+            if start_key:
+                start_key = _normalize(start_key)
+                position = table_index.position(start_key, self._primary_key(start_key))
+                start = bisect.bisect_right(partition, position)
+            positions = partition[start:]
+        else:
+            end = len(partition)
+            if start_key:
+                start_key = _normalize(start_key)
+                position = table_index.position(start_key, self._primary_key(start_key))
+                end = bisect.bisect_left(partition, position)
+            positions = reversed(partition[:end])
+        return self._page(
+            table_index,
+            (position[-1] for position in positions),
+            limit,
+            filter_expression,
+            projection,
+            range_condition,
+        )
+
+    async def query(
+        self, key_condition: KeyCondition, *, limit: Optional[int] = None, **kwargs
+    ) -> AsyncIterator[dict]:
+        start_key = kwargs.pop("start_key", None)
+        while True:
+            page = await self.query_single_page(
+                key_condition, start_key=start_key, limit=limit, **kwargs
+            )
+            for item in page.items:
+                yield item
+            if limit is not None:
+                limit -= len(page.items)
+            if page.is_last_page or (limit is not None and limit <= 0):
+                return
+            start_key = page.last_evaluated_key
+
+    async def count(self, key_condition: KeyCondition, **kwargs) -> int:
+        return sum([1 async for _ in self.query(key_condition, **kwargs)])
+
+    async def scan_single_page(
+        self,
+        *,
+        index: Optional[str] = None,
+        limit: Optional[int] = None,
+        start_key: Optional[dict] = None,
+        projection: Optional[ProjectionExpression] = None,
+        filter_expression: Optional[Condition] = None,
+        consistent_read: bool = False,
+    ) -> Page:
+        await self.dynamo.request()
+        table_index = self._index(index)
+        start = 0
+        if start_key:
+            start = bisect.bisect_right(self.keys, self._primary_key(start_key))
+        return self._page(
+            table_index,
+            (
+                primary_key
+                for primary_key in self.keys[start:]
+                if index is None
+                or table_index.position(self.items[primary_key], primary_key)
+            ),
+            limit,
+            filter_expression,
+            projection,
+        )
+
+    async def scan(
+        self, *, limit: Optional[int] = None, **kwargs
+    ) -> AsyncIterator[dict]:
+        start_key = kwargs.pop("start_key", None)
+        while True:
+            page = await self.scan_single_page(
+                start_key=start_key, limit=limit, **kwargs
+            )
+            for item in page.items:
+                yield item
+            if limit is not None:
+                limit -= len(page.items)
+            if page.is_last_page or (limit is not None and limit <= 0):
+                return
+            start_key = page.last_evaluated_key
+
+    async def scan_count(self, **kwargs) -> int:
+        return sum([1 async for _ in self.scan(**kwargs)])
+
+
+class MemoryDynamo:
+    """
+    The memory backend's tables, shared by every DynamoDBClient in the
+    process. Stands in for aiodynamo's Client where DynamoDBClient uses it.
+    """
+
+    def __init__(
+        self,
+        latency: LatencyProfile = LatencyProfile(),
+        throttle_config: RetryConfig = RetryConfig.default(),
+        numeric_type=float,
+    ):
+        self.latency = latency
+        self.throttle_config = throttle_config
+        self.numeric_type = numeric_type
+        self.tables: dict[str, MemoryTable] = {}
+
+    async def request(self) -> None:
+        await self.latency.request(self.throttle_config)
+
+    def table(self, name: str) -> MemoryTable:
+        if name not in self.tables:
+            schema = next(
+                (
+                    TABLE_SCHEMAS[key]
+                    for key, table_name in settings.TABLE_ARNS.items()
+                    if table_name == name and key in TABLE_SCHEMAS
+                ),
+                None,
+            )
+            if schema is None:
+                raise TableNotFound(name)
+            self.tables[name] = MemoryTable(self, name, schema)
+        return self.tables[name]
+
+    async def batch_write(
+        self, request: dict[str, BatchWriteRequest]
+    ) -> dict[str, BatchWriteResult]:
+        """Applies every write, nothing is left unprocessed."""
+        writes = sum(
+            len(write.keys_to_delete or ()) + len(write.items_to_put or ())
+            for write in request.values()
+        )
+        if not 0 < writes <= 25:
+            raise ValidationException("A batch write takes 1 to 25 requests")
+        await self.request()
+        for name, write in request.items():
+            table = self.table(name)
+            for key in write.keys_to_delete or ():
+                primary_key = table._primary_key(key)
+                old = table.items.get(primary_key)
+                if old is not None:
+                    table._store(primary_key, None, old)
+            for item in write.items_to_put or ():
+                item = dy2py(py2dy(item), Decimal)
+                primary_key = table._primary_key(item)
+                table._store(primary_key, item, table.items.get(primary_key))
+        return {}
+
+    async def table_exists(self, name: str) -> bool:
+        return name in settings.TABLE_ARNS.values()
+
+    async def count(
+        self, table: str, key_condition: KeyCondition, *, index=None, **kwargs
+    ) -> int:
+        return await self.table(table).count(key_condition, index=index, **kwargs)
+
+    def clear(self) -> None:
+        self.tables.clear()
+
+
+memory_dynamo = MemoryDynamo(latency=LATENCY_PROFILES[settings.DYNAMO_LATENCY_PROFILE])
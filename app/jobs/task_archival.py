@@ -0,0 +1,123 @@
+"""
+Moves completed and cancelled tasks that were not updated for
+TASK_ARCHIVE_AFTER_DAYS from the tasks table to the archive table, in scan
+batches of `--batch-size`. A task is only removed from the tasks table if
+it was not updated after it was copied, otherwise the copy is dropped.
+Archived tasks get a tombstone, syncing clients drop them like deleted ones.
+
+    python -m app.jobs.task_archival --batch-size 100 [--dry-run]
+"""
+
+import json
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from typing import Optional
+
+from aiodynamo.errors import ConditionalCheckFailed
+from aiodynamo.expressions import F
+
+from app import settings
+from app.clients.dynamo_client import DynamoPageRequest
+from app.repositories.factories import (
+    task_archive_repository_factory,
+    task_repository_factory,
+    task_stats_repository_factory,
+    task_tombstone_repository_factory,
+)
+from app.repositories.task_archive_repository import TaskArchiveRepository
+from app.repositories.task_repository import TaskRepository
+from app.repositories.task_stats_repository import TaskStatsRepository
+from app.repositories.task_tombstone_repository import TaskTombstoneRepository
+from app.schemas.task import Task, TaskStatuses, to_epoch_ms
+
+logger = logging.getLogger(__name__)
+
+
+async def archive_item(
+    task_repo: TaskRepository,
+    archive_repo: TaskArchiveRepository,
+    stats_repo: TaskStatsRepository,
+    tombstone_repo: TaskTombstoneRepository,
+    item: dict,
+) -> bool:
+    await archive_repo.archive_item(item)
+    try:
+        await task_repo.client.delete_item(
+            {"task_id": item["task_id"]},
+            condition=F("updated_at").equals(item["updated_at"]),
+        )
+    except ConditionalCheckFailed:
+        logger.info(f"Task {item['task_id']} updated during archival, skipping")
+        await archive_repo.delete_task(item["task_id"])
+        return False
+    # The task left the tasks_owner_email_updated_at index /tasks/changes reads.
+    await tombstone_repo.create_tombstone(
+        Task.model_validate(item), datetime.now(ZoneInfo("Europe/Warsaw"))
+    )
+    # The task left the owner's list, cached responses of it are stale.
+    await stats_repo.touch_list_version(item["owner_email"])
+    return True
+
+
+async def archive(
+    batch_size: int, start_key: Optional[dict] = None, dry_run: bool = False
+) -> None:
+    cutoff = to_epoch_ms(datetime.now(timezone.utc) - settings.TASK_ARCHIVE_AFTER)
+    # Legacy string timestamps never match the numeric comparison, run
+    # app.migrations.task_timestamps first.
+    filter_expression = F("status").is_in(
+        [TaskStatuses.COMPLETED.value, TaskStatuses.CANCELLED.value]
+    ) & F("updated_at").lt(cutoff)
+
+    scanned = archived = 0
+    async with (
+        task_repository_factory() as task_repo,
+        task_archive_repository_factory() as archive_repo,
+        task_stats_repository_factory() as stats_repo,
+        task_tombstone_repository_factory() as tombstone_repo,
+    ):
+        while True:
+            page = await task_repo.client.scan_single_page(
+                DynamoPageRequest(records=batch_size, last_evaluated_key=start_key),
+                filter_expression=filter_expression,
+            )
+            scanned += len(page.items)
+            if dry_run:
+                archived += len(page.items)
+            else:
+                results = await asyncio.gather(
+                    *(
+                        archive_item(
+                            task_repo, archive_repo, stats_repo, tombstone_repo, item
+                        )
+                        for item in page.items
+                    )
+                )
+                archived += sum(results)
+
+            start_key = page.last_evaluated_key
+            logger.info(
+                f"matched={scanned} archived={archived} "
+                f"start_key={json.dumps(start_key) if start_key else '-'}"
+            )
+            if not start_key:
+                break
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--start-key", type=json.loads, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    # authx configures the root logger on import, at WARNING.
+    logging.basicConfig(level=logging.INFO, force=True)
+    asyncio.run(archive(args.batch_size, args.start_key, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Rebuilds the task search index from a full scan of the tasks and archive
+tables: writes the postings of every task and deletes postings of tasks or
+tokens that no longer exist. Needed once for tasks created before the index
+and after writes made outside `TaskService`.
+
+    python -m app.jobs.task_search_index [--dry-run]
+"""
+
+import asyncio
+import logging
+import argparse
+
+from app.schemas.task import Task
+from app.repositories.factories import (
+    task_archive_repository_factory,
+    task_repository_factory,
+    task_search_repository_factory,
+)
+from app.repositories.task_search_repository import posting_id, token_weights
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild(dry_run: bool = False) -> None:
+    async with (
+        task_repository_factory() as task_repo,
+        task_archive_repository_factory() as archive_repo,
+        task_search_repository_factory() as search_repo,
+    ):
+        postings: set[tuple[str, str]] = set()
+        tasks = 0
+        for repo in (task_repo, archive_repo):
+            async for item in repo.client.scan():
+                task = Task.model_validate(item)
+                weights = token_weights(task)
+                postings.update(
+                    (task.owner_email, posting_id(token, task.task_id))
+                    for token in weights
+                )
+                tasks += 1
+                if not dry_run:
+                    await search_repo.put_postings(
+                        task.owner_email, task.task_id, weights
+                    )
+
+        stale = [
+            (item["owner_email"], item["posting_id"])
+            async for item in search_repo.client.scan()
+            if (item["owner_email"], item["posting_id"]) not in postings
+        ]
+        logger.info(
+            f"Indexed {tasks} tasks with {len(postings)} postings, "
+            f"{len(stale)} stale postings"
+        )
+        if dry_run:
+            return
+
+        for owner_email, stale_posting_id in stale:
+            await search_repo.client.delete_item(
+                {"owner_email": owner_email, "posting_id": stale_posting_id}
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    # authx configures the root logger on import, at WARNING.
+    logging.basicConfig(level=logging.INFO, force=True)
+    asyncio.run(rebuild(args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
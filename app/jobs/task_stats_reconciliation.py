@@ -0,0 +1,72 @@
+"""
+Recomputes the per-owner task counters from a full scan of the tasks and
+archive tables and overwrites the stored ones, fixing any drift (failed observer calls,
+writes made outside `TaskService`). Increments applied while the scan runs
+are overwritten too, so run it when write traffic is low.
+
+    python -m app.jobs.task_stats_reconciliation [--dry-run]
+"""
+
+import asyncio
+import logging
+import argparse
+from collections import Counter, defaultdict
+
+from app.repositories.factories import (
+    task_archive_repository_factory,
+    task_repository_factory,
+    task_stats_repository_factory,
+)
+from app.repositories.task_stats_repository import (
+    TOTAL_COUNTER,
+    priority_counter,
+    status_counter,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile(dry_run: bool = False) -> None:
+    counters: dict[str, Counter] = defaultdict(Counter)
+    async with (
+        task_repository_factory() as task_repo,
+        task_archive_repository_factory() as archive_repo,
+        task_stats_repository_factory() as stats_repo,
+    ):
+        for repo in (task_repo, archive_repo):
+            async for item in repo.client.scan():
+                owner_counters = counters[item["owner_email"]]
+                owner_counters[TOTAL_COUNTER] += 1
+                owner_counters[status_counter(item.get("status", "pending"))] += 1
+                owner_counters[priority_counter(item.get("priority", 1))] += 1
+
+        stale_owners = [
+            owner_email
+            async for owner_email in stats_repo.get_owner_emails()
+            if owner_email not in counters
+        ]
+        logger.info(
+            f"Recomputed counters for {len(counters)} owners, "
+            f"{len(stale_owners)} stale stats items"
+        )
+        if dry_run:
+            return
+
+        for owner_email, owner_counters in counters.items():
+            await stats_repo.put_stats(owner_email, dict(owner_counters))
+        for owner_email in stale_owners:
+            await stats_repo.delete_stats(owner_email)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    # authx configures the root logger on import, at WARNING.
+    logging.basicConfig(level=logging.INFO, force=True)
+    asyncio.run(reconcile(args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
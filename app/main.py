@@ -1,13 +1,49 @@
 import traceback
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Response
+from app import settings
+from app.admission import AdmissionControlMiddleware
+from app.clients.dynamo_client import shared_dynamo_connection
+from app.metrics import metrics_response, track_request_latency
+from app.profiling import ProfilingMiddleware
+from app.routers.profiles import router as profile_router
 from app.routers.task import router as task_router
 from app.routers.users import router as user_router
+from app.services.idempotency import idempotency_store
+from app.services.task_events import task_event_broker
+from app.services.utils import login_prefetcher, task_write_buffer
 from app.settings import security
+from app.tracing import instrument_app
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await shared_dynamo_connection.open()
+    yield
+    await login_prefetcher.close()
+    await task_write_buffer.close()
+    await task_event_broker.close()
+    await idempotency_store.close()
+    # Last, the buffered updates above are written through it.
+    await shared_dynamo_connection.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.middleware("http")(track_request_latency)
+app.add_middleware(ProfilingMiddleware)
+if settings.ADMISSION_CONTROL:
+    # Added last so it runs first and shed requests cost next to nothing.
+    app.add_middleware(AdmissionControlMiddleware)
 app.include_router(task_router)
 app.include_router(user_router)
+app.include_router(profile_router)
 security.handle_errors(app)
+instrument_app(app)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
 
 
 # @app.exception_handler(Exception)
@@ -0,0 +1,113 @@
+"""
+Prometheus metrics of the API and the Celery worker.
+
+The API serves them on /metrics, the worker on CELERY_METRICS_PORT (see
+app.celery.metrics). Set
+PROMETHEUS_MULTIPROC_DIR when running several processes (uvicorn workers,
+the prefork Celery pool) so every process' samples are collected.
+"""
+
+import os
+import time
+
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+DYNAMO_OPERATION_SECONDS = Histogram(
+    "dynamo_operation_seconds",
+    "Duration of DynamoDBClient operations",
+    ["table", "operation"],
+)
+DYNAMO_CONSUMED_CAPACITY = Counter(
+    "dynamo_consumed_capacity_units",
+    "Capacity units consumed by DynamoDB requests",
+    ["table", "operation"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds",
+    "Duration of HTTP requests until the response starts",
+    ["method", "route", "status"],
+)
+OBSERVER_SECONDS = Histogram(
+    "task_observer_seconds",
+    "Duration of task observer updates",
+    ["observer", "action"],
+)
+CELERY_PUBLISH_SECONDS = Histogram(
+    "celery_publish_seconds",
+    "Duration of publishing Celery tasks to the broker",
+    ["task"],
+)
+CELERY_TASK_SECONDS = Histogram(
+    "celery_task_seconds",
+    "Duration of Celery tasks run by the worker",
+    ["task", "state"],
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight_requests",
+    "Requests admitted and running",
+    ["route_class"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requests waiting for admission",
+    ["route_class"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "admission_wait_seconds",
+    "Time admitted requests waited in the queue",
+    ["route_class"],
+)
+ADMISSION_SHED_REQUESTS = Counter(
+    "admission_shed_requests",
+    "Requests rejected with 503 by admission control",
+    ["route_class", "reason"],
+)
+TASK_UPDATES_COALESCED = Counter(
+    "task_updates_coalesced",
+    "Buffered task updates merged into a later write",
+)
+LOGIN_PREFETCHES = Counter(
+    "login_prefetches",
+    "Task list prefetches started by logins, by how they ended",
+    ["result"],
+)
+PREFETCH_CACHE_REQUESTS = Counter(
+    "prefetch_cache_requests",
+    "Lookups of users and task lists prefetched at login",
+    ["cache", "result"],
+)
+
+
+def get_registry() -> CollectorRegistry:
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(get_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+async def track_request_latency(request: Request, call_next) -> Response:
+    start = time.perf_counter()
+    response = await call_next(request)
+    # The route template, not the path, keeps task ids out of the labels.
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.labels(
+        request.method, route.path if route else "unmatched", response.status_code
+    ).observe(time.perf_counter() - start)
+    return response
@@ -0,0 +1,89 @@
+"""
+Online backfill setting the `owner_shard` attribute used by the sharded
+owner indexes. Run it before enabling TASK_SHARDED_READS and again after
+raising an owner's shard count in TASK_OWNER_SHARDS.
+
+    python -m app.migrations.task_owner_shards --batch-size 100 [--dry-run]
+"""
+
+import json
+import asyncio
+import logging
+import argparse
+from typing import Optional
+
+from aiodynamo.errors import ConditionalCheckFailed
+from aiodynamo.expressions import F
+
+from app import settings
+from app.clients.dynamo_client import DynamoDBClient, DynamoPageRequest
+from app.repositories.task_repository import get_owner_shard
+
+logger = logging.getLogger(__name__)
+
+
+def needs_migration(item: dict) -> bool:
+    return item.get("owner_shard") != get_owner_shard(
+        item["owner_email"], item["task_id"]
+    )
+
+
+async def migrate_item(client: DynamoDBClient, item: dict) -> bool:
+    if not needs_migration(item):
+        return False
+    try:
+        # The condition keeps tasks deleted meanwhile from being recreated.
+        await client.update_item(
+            {"task_id": item["task_id"]},
+            F("owner_shard").set(get_owner_shard(item["owner_email"], item["task_id"])),
+            condition=F("task_id").exists(),
+        )
+    except ConditionalCheckFailed:
+        logger.info(f"Task {item['task_id']} deleted during migration, skipping")
+        return False
+    return True
+
+
+async def migrate(
+    batch_size: int, start_key: Optional[dict] = None, dry_run: bool = False
+) -> None:
+    scanned = migrated = 0
+    async with DynamoDBClient.create_client(
+        table_name=settings.TABLE_ARNS["tasks"]
+    ) as client:
+        while True:
+            page = await client.scan_single_page(
+                DynamoPageRequest(records=batch_size, last_evaluated_key=start_key)
+            )
+            scanned += len(page.items)
+            if dry_run:
+                migrated += sum(1 for item in page.items if needs_migration(item))
+            else:
+                results = await asyncio.gather(
+                    *(migrate_item(client, item) for item in page.items)
+                )
+                migrated += sum(results)
+
+            start_key = page.last_evaluated_key
+            logger.info(
+                f"scanned={scanned} migrated={migrated} "
+                f"start_key={json.dumps(start_key) if start_key else '-'}"
+            )
+            if not start_key:
+                break
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--start-key", type=json.loads, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    # authx configures the root logger on import, at WARNING.
+    logging.basicConfig(level=logging.INFO, force=True)
+    asyncio.run(migrate(args.batch_size, args.start_key, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
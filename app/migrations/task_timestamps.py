@@ -0,0 +1,99 @@
+"""
+Online backfill rewriting legacy string task timestamps as epoch milliseconds.
+
+Items are read in scan pages of `--batch-size` and each legacy item is
+updated with a condition on its old values, so a task rewritten by the API
+while the migration runs is left alone. The last evaluated key is printed
+after every batch and can be passed back with `--start-key` to resume.
+
+    python -m app.migrations.task_timestamps --batch-size 100 [--dry-run]
+"""
+
+import json
+import asyncio
+import logging
+import argparse
+from functools import reduce
+from operator import and_
+from typing import Optional
+
+from aiodynamo.errors import ConditionalCheckFailed
+from aiodynamo.expressions import F
+
+from app import settings
+from app.clients.dynamo_client import DynamoDBClient, DynamoPageRequest
+from app.schemas.task import TASK_DATETIME_FIELDS, parse_datetime, to_epoch_ms
+
+logger = logging.getLogger(__name__)
+
+
+def get_legacy_fields(item: dict) -> list[str]:
+    return [field for field in TASK_DATETIME_FIELDS if isinstance(item.get(field), str)]
+
+
+async def migrate_item(client: DynamoDBClient, item: dict) -> bool:
+    legacy_fields = get_legacy_fields(item)
+    if not legacy_fields:
+        return False
+
+    update_expression = reduce(
+        and_,
+        (
+            F(field).set(to_epoch_ms(parse_datetime(item[field])))
+            for field in legacy_fields
+        ),
+    )
+    condition = reduce(and_, (F(field).equals(item[field]) for field in legacy_fields))
+    try:
+        await client.update_item(
+            {"task_id": item["task_id"]}, update_expression, condition=condition
+        )
+    except ConditionalCheckFailed:
+        logger.info(f"Task {item['task_id']} changed during migration, skipping")
+        return False
+    return True
+
+
+async def migrate(
+    batch_size: int, start_key: Optional[dict] = None, dry_run: bool = False
+) -> None:
+    scanned = migrated = 0
+    async with DynamoDBClient.create_client(
+        table_name=settings.TABLE_ARNS["tasks"]
+    ) as client:
+        while True:
+            page = await client.scan_single_page(
+                DynamoPageRequest(records=batch_size, last_evaluated_key=start_key)
+            )
+            scanned += len(page.items)
+            if dry_run:
+                migrated += sum(1 for item in page.items if get_legacy_fields(item))
+            else:
+                results = await asyncio.gather(
+                    *(migrate_item(client, item) for item in page.items)
+                )
+                migrated += sum(results)
+
+            start_key = page.last_evaluated_key
+            logger.info(
+                f"scanned={scanned} migrated={migrated} "
+                f"start_key={json.dumps(start_key) if start_key else '-'}"
+            )
+            if not start_key:
+                break
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--start-key", type=json.loads, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    # authx configures the root logger on import, at WARNING.
+    logging.basicConfig(level=logging.INFO, force=True)
+    asyncio.run(migrate(args.batch_size, args.start_key, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,12 @@ import os
 import logging
 
 from pathlib import Path
-from mailersend import emails
-from dotenv import load_dotenv
+from aiohttp import ClientSession
 from pydantic import BaseModel
 
 from app import settings
 
-load_dotenv(Path(__file__).parent.parent / "var.env")
+ENV_FILE = Path(__file__).parent.parent / "var.env"
 
 logger = logging.getLogger(__name__)
 
@@ -47,10 +46,20 @@ def create_mail_body(mailer, email_info: EmailBody):
     return mail_body
 
 
-def send_mail(email_info: EmailBody):
+async def send_mail(session: ClientSession, email_info: EmailBody):
+    # Only the worker sends mail, the API never loads the client.
+    from dotenv import load_dotenv
+    from mailersend import emails
+
+    load_dotenv(ENV_FILE)
     mailer = emails.NewEmail(os.getenv("MAILERSEND_API_KEY"))
     mail_body = create_mail_body(mailer, email_info)
 
-    res = mailer.send(mail_body)
-    if "202" not in res:
-        logger.exception(f"Failed to send email: {res}")
+    # What mailer.send does, on the worker's shared session.
+    async with session.post(
+        f"{mailer.api_base}/email", headers=mailer.headers_default, json=mail_body
+    ) as response:
+        if response.status != 202:
+            logger.error(
+                f"Failed to send email: {response.status}\n{await response.text()}"
+            )
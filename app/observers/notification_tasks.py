@@ -0,0 +1,72 @@
+"""
+Celery tasks sending notifications, and the helpers scheduling them.
+
+Importing this module constructs the Celery app, which the API only needs
+once it sends a notification; task_observers imports it on first use. Task
+names are those the tasks had when they were defined in task_observers, so
+queued messages stay valid. Deliveries run on the worker's asyncio runtime,
+see app.celery.async_runtime.
+"""
+
+import logging
+
+from aiohttp import ClientSession
+from celery import shared_task
+from celery.result import AsyncResult
+
+from app.celery.celery import app as celery_app
+from app.celery.async_runtime import async_runtime
+from app.schemas.task import Task
+from app.observers.emailer import EmailRecipient, EmailBody, send_mail
+
+logger = logging.getLogger(__name__)
+
+TASK_NAME_PREFIX = "app.observers.task_observers."
+
+
+def generate_email_info_model(task: dict) -> EmailBody:
+    return EmailBody(
+        recipients=[EmailRecipient(name="Test", email=task["owner_email"])],
+        body=f"Task {task['title']} is overdue! Please take action!",
+        subject=f"Task {task['title']} is overdue!",
+    )
+
+
+# Acknowledged once sent, a worker lost mid-send leaves the email queued.
+@shared_task(
+    queue="emails",
+    acks_late=True,
+    name=TASK_NAME_PREFIX + "create_due_date_notification",
+)
+def create_due_date_notification(task_serialized: dict):
+    email_info: EmailBody = generate_email_info_model(task_serialized)
+    async_runtime.run(send_mail, email_info)
+    return f'Email sent to {", ".join([r.email for r in email_info.recipients])}'
+
+
+# Fire and forget, nothing reads the results.
+@shared_task(
+    queue="slack",
+    ignore_result=True,
+    name=TASK_NAME_PREFIX + "send_slack_message",
+)
+def send_slack_message(webhook_url: str, message: str):
+    logger.info(f"[Slack] {message}. Sending message to Slack...")
+    async_runtime.run(post_slack_message, webhook_url, message)
+    logger.info(f"[Slack] Message ({message}) sent!")
+
+
+async def post_slack_message(session: ClientSession, webhook_url: str, message: str):
+    async with session.post(webhook_url, json={"text": message}) as response:
+        await response.read()
+
+
+@shared_task(
+    queue="tasks", ignore_result=True, name=TASK_NAME_PREFIX + "celery_test_task"
+)
+def celery_test_task(task: Task):
+    logger.info(f"Task {task.task_id} is overdue! Please take action!")
+
+
+def revoke_notification(notifier_id: str) -> None:
+    AsyncResult(notifier_id, app=celery_app).revoke()
@@ -1,47 +1,43 @@
 import logging
 from typing import Optional
-import requests
+from collections import Counter
 
 from zoneinfo import ZoneInfo
-from celery import shared_task
 from abc import ABC, abstractmethod
 from aiodynamo.expressions import F
-from celery.result import AsyncResult
 from datetime import datetime, timedelta
 
-from app.celery.celery import app as celery_app
+from redis.exceptions import RedisError
+
+from app.services.task_events import TaskEventBroker
 from app.schemas.task import Task, TaskServiceActions
 from app.repositories.factories import task_repository_factory
-from app.observers.emailer import EmailRecipient, EmailBody, send_mail
+from app.repositories.task_tombstone_repository import TaskTombstoneRepository
+from app.repositories.task_search_repository import (
+    TaskSearchRepository,
+    token_weights,
+)
+from app.repositories.task_stats_repository import (
+    TOTAL_COUNTER,
+    TaskStatsRepository,
+    priority_counter,
+    status_counter,
+)
 
 logger = logging.getLogger(__name__)
 
+# Priorities of Slack messages, up to app.celery.celery.MAX_PRIORITY.
+# Escalations overtake the messages still waiting in the queue.
+SLACK_NOTICE_PRIORITY = 3
+SLACK_ESCALATION_PRIORITY = 9
 
-def generate_email_info_model(task: dict) -> EmailBody:
-    return EmailBody(
-        recipients=[EmailRecipient(name="Test", email=task["owner_email"])],
-        body=f"Task {task['title']} is overdue! Please take action!",
-        subject=f"Task {task['title']} is overdue!",
-    )
-
-
-@shared_task(queue="tasks")
-def create_due_date_notification(task_serialized: dict):
-    email_info: EmailBody = generate_email_info_model(task_serialized)
-    send_mail(email_info)
-    return f'Email sent to {", ".join([r.email for r in email_info.recipients])}'
 
+def notification_tasks():
+    # Celery, requests and the mail client are loaded by the first
+    # notification rather than by every process importing the observers.
+    from app.observers import notification_tasks
 
-@shared_task(queue="tasks")
-def send_slack_message(webhook_url: str, message: str):
-    logger.info(f"[Slack] {message}. Sending message to Slack...")
-    requests.post(webhook_url, json={"text": message})
-    logger.info(f"[Slack] Message ({message}) sent!")
-
-
-@shared_task(queue="tasks")
-def celery_test_task(task: Task):
-    logger.info(f"Task {task.task_id} is overdue! Please take action!")
+    return notification_tasks
 
 
 class TaskObserver(ABC):
@@ -71,8 +67,12 @@ class SlackNotifier(TaskObserver):
         if action == TaskServiceActions.mark_task_completed:
             self._send_slack_message(f"Task {task.task_id} completed! Good job!")
 
-    def _send_slack_message(self, message: str) -> None:
-        send_slack_message.apply_async(args=[self.webhook_url, message])
+    def _send_slack_message(
+        self, message: str, priority: int = SLACK_NOTICE_PRIORITY
+    ) -> None:
+        notification_tasks().send_slack_message.apply_async(
+            args=[self.webhook_url, message], priority=priority
+        )
 
 
 class ChangeHistoryObserver(TaskObserver):
@@ -105,7 +105,9 @@ class OverdueNotifier(TaskObserver):
     ) -> None:
         async with task_repository_factory() as repo:
             if action == TaskServiceActions.task_created:
-                res = create_due_date_notification.apply_async(
+                if old_task and old_task.notifier_id:
+                    notification_tasks().revoke_notification(old_task.notifier_id)
+                res = notification_tasks().create_due_date_notification.apply_async(
                     args=[task.model_dump()],
                     eta=task.due_date - timedelta(hours=1),
                 )
@@ -116,9 +118,8 @@ class OverdueNotifier(TaskObserver):
                 and task.due_date != old_task.due_date
             ):
                 if old_task.notifier_id:
-                    prev_res = AsyncResult(old_task.notifier_id, app=celery_app)
-                    prev_res.revoke()
-                res = create_due_date_notification.apply_async(
+                    notification_tasks().revoke_notification(old_task.notifier_id)
+                res = notification_tasks().create_due_date_notification.apply_async(
                     args=[task.model_dump()],
                     eta=task.due_date - timedelta(hours=1),
                 )
@@ -136,9 +137,114 @@ class PriorityEscalationNotifier(TaskObserver):
     async def update(
         self, action: TaskServiceActions, task: Task, old_task: Optional[Task] = None
     ) -> None:
+        if action == TaskServiceActions.task_deleted:
+            return
         old_priority = old_task.priority if old_task else 1
         new_priority = task.priority
         if new_priority == 5 and old_priority < 5:
             message = f"Task {task.title} priority escalated to 5! Immediate attention required!"
             logger.warning(message)
-            self.slack_notifier._send_slack_message(message)
+            self.slack_notifier._send_slack_message(
+                message, priority=SLACK_ESCALATION_PRIORITY
+            )
+
+
+class TaskStatsObserver(TaskObserver):
+    """
+    Keeps the per-owner task counters in sync with created, updated,
+    completed and deleted tasks.
+    """
+
+    def __init__(self, stats_repository: TaskStatsRepository):
+        self.stats_repository = stats_repository
+
+    async def update(
+        self, action: TaskServiceActions, task: Task, old_task: Optional[Task] = None
+    ) -> None:
+        deltas = Counter()
+        if action == TaskServiceActions.task_deleted:
+            self._count(deltas, task, -1)
+        else:
+            self._count(deltas, task, 1)
+            if old_task:
+                self._count(deltas, old_task, -1)
+        await self.stats_repository.increment(task.owner_email, deltas)
+
+    def _count(self, deltas: Counter, task: Task, sign: int) -> None:
+        deltas[TOTAL_COUNTER] += sign
+        deltas[status_counter(task.status)] += sign
+        deltas[priority_counter(task.priority)] += sign
+
+
+class TaskTombstoneObserver(TaskObserver):
+    """
+    Records deleted tasks so syncing clients can drop them.
+    """
+
+    def __init__(self, tombstone_repository: TaskTombstoneRepository):
+        self.tombstone_repository = tombstone_repository
+
+    async def update(
+        self, action: TaskServiceActions, task: Task, old_task: Optional[Task] = None
+    ) -> None:
+        if action == TaskServiceActions.task_deleted:
+            await self.tombstone_repository.create_tombstone(
+                task, datetime.now(ZoneInfo("Europe/Warsaw"))
+            )
+
+
+class TaskSearchObserver(TaskObserver):
+    """
+    Keeps the owner's search index in sync, writing only the postings whose
+    weight changed and deleting the ones of tokens no longer in the task.
+    """
+
+    def __init__(self, search_repository: TaskSearchRepository):
+        self.search_repository = search_repository
+
+    async def update(
+        self, action: TaskServiceActions, task: Task, old_task: Optional[Task] = None
+    ) -> None:
+        if action == TaskServiceActions.task_deleted:
+            old_weights, new_weights = token_weights(task), {}
+        else:
+            old_weights = token_weights(old_task) if old_task else {}
+            new_weights = token_weights(task)
+        changed = {
+            token: weight
+            for token, weight in new_weights.items()
+            if old_weights.get(token) != weight
+        }
+        removed = [token for token in old_weights if token not in new_weights]
+        await self.search_repository.put_postings(
+            task.owner_email, task.task_id, changed
+        )
+        await self.search_repository.delete_postings(
+            task.owner_email, task.task_id, removed
+        )
+
+
+class TaskEventsObserver(TaskObserver):
+    """
+    Pushes task changes to the owner's connected clients.
+    """
+
+    def __init__(self, broker: TaskEventBroker):
+        self.broker = broker
+
+    async def update(
+        self, action: TaskServiceActions, task: Task, old_task: Optional[Task] = None
+    ) -> None:
+        event = {
+            "action": action.value,
+            "task_id": task.task_id,
+            "task": (
+                None
+                if action == TaskServiceActions.task_deleted
+                else task.model_dump(mode="json")
+            ),
+        }
+        try:
+            await self.broker.publish(task.owner_email, event)
+        except RedisError as e:
+            logger.exception(f"Failed to publish event for task {task.task_id}: {e}")
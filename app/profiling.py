@@ -0,0 +1,154 @@
+"""
+Sampling profiler for live requests.
+
+A request is profiled with pyinstrument when an admin sends the X-Profile
+header, or when it is picked with PROFILE_SAMPLE_RATE. Only one request per
+process is profiled at a time and only the profiled request's task is
+sampled, so concurrent requests do not pay for it. Profiles are kept in
+PROFILE_DIR, pruned to PROFILE_MAX_COUNT files and PROFILE_MAX_BYTES, and
+served by /admin/profiles as speedscope JSON, HTML or text.
+"""
+
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request
+from pyinstrument import Profiler
+from pyinstrument.renderers import ConsoleRenderer, HTMLRenderer, SpeedscopeRenderer
+from pyinstrument.session import Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import settings
+from app.schemas.user import UserPermission
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+# Streams would keep the profiler running for the whole connection.
+EXCLUDED_PATHS = ("/metrics", "/tasks/events", "/admin/profiles")
+
+RENDERERS = {
+    "speedscope": (SpeedscopeRenderer, "application/json", "speedscope.json"),
+    "html": (HTMLRenderer, "text/html", "html"),
+    "text": (lambda: ConsoleRenderer(unicode=True, color=False), "text/plain", "txt"),
+}
+
+
+class ProfileNotFoundError(Exception): ...
+
+
+class ProfileStore:
+    """Profiles saved as pyinstrument sessions with a metadata file each."""
+
+    def __init__(self, directory: str, max_count: int, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+
+    def save(self, profile_id: str, session: Session, metadata: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        session.save(str(self.directory / f"{profile_id}.pyisession"))
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(metadata))
+        self._prune()
+
+    def _prune(self) -> None:
+        profiles = sorted(self.directory.glob("*.pyisession"), reverse=True)
+        total = 0
+        for index, path in enumerate(profiles):
+            total += path.stat().st_size
+            if index >= self.max_count or total > self.max_bytes:
+                path.unlink(missing_ok=True)
+                path.with_suffix(".json").unlink(missing_ok=True)
+
+    def list(self) -> list[dict]:
+        if not self.directory.exists():
+            return []
+        return [
+            json.loads(path.read_text())
+            for path in sorted(self.directory.glob("*.json"), reverse=True)
+        ]
+
+    def render(self, profile_id: str, output_format: str) -> str:
+        path = self.directory / f"{Path(profile_id).name}.pyisession"
+        if not path.exists():
+            raise ProfileNotFoundError(profile_id)
+        renderer = RENDERERS[output_format][0]()
+        return renderer.render(Session.load(str(path)))
+
+
+profile_store = ProfileStore(
+    settings.PROFILE_DIR, settings.PROFILE_MAX_COUNT, settings.PROFILE_MAX_BYTES
+)
+
+
+async def is_profile_admin(request: Request) -> bool:
+    try:
+        payload = await settings.security.access_token_required(request)
+    except Exception:
+        return False
+    roles = getattr(payload, "roles", None) or []
+    return any(
+        UserPermission.PROFILE_REQUESTS in settings.ROLE_PERMISSIONS.get(role, ())
+        for role in roles
+    )
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+        self.busy = False
+
+    async def should_profile(self, scope: Scope) -> bool:
+        if self.busy or scope["path"].startswith(EXCLUDED_PATHS):
+            return False
+        request = Request(scope)
+        if PROFILE_HEADER in request.headers:
+            return await is_profile_admin(request)
+        return random.random() < settings.PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not await self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self.busy = True
+        created_at = int(time.time() * 1000)
+        profile_id = f"{created_at}-{uuid.uuid4().hex[:8]}"
+        status_code: Optional[int] = None
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        profiler = Profiler(interval=settings.PROFILER_INTERVAL, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session = profiler.stop()
+            self.busy = False
+            metadata = {
+                "profile_id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status_code": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "created_at": created_at,
+            }
+            try:
+                await asyncio.to_thread(self.store.save, profile_id, session, metadata)
+            except OSError:
+                logger.exception(f"Failed to store profile {profile_id}")
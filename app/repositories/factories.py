@@ -4,6 +4,10 @@ from contextlib import asynccontextmanager
 from app import settings
 from app.clients.dynamo_client import DynamoDBClient
 from app.repositories.task_repository import TaskRepository
+from app.repositories.task_archive_repository import TaskArchiveRepository
+from app.repositories.task_search_repository import TaskSearchRepository
+from app.repositories.task_stats_repository import TaskStatsRepository
+from app.repositories.task_tombstone_repository import TaskTombstoneRepository
 from app.repositories.user_repository import UserRepository
 
 
@@ -15,6 +19,44 @@ async def task_repository_factory() -> AsyncGenerator[TaskRepository, None]:
         yield TaskRepository(dynamo_client=operational_client)
 
 
+@asynccontextmanager
+async def task_archive_repository_factory() -> (
+    AsyncGenerator[TaskArchiveRepository, None]
+):
+    async with DynamoDBClient.create_client(
+        table_name=settings.TABLE_ARNS["tasks_archive"]
+    ) as operational_client:
+        yield TaskArchiveRepository(dynamo_client=operational_client)
+
+
+@asynccontextmanager
+async def task_stats_repository_factory() -> AsyncGenerator[TaskStatsRepository, None]:
+    async with DynamoDBClient.create_client(
+        table_name=settings.TABLE_ARNS["task_stats"]
+    ) as operational_client:
+        yield TaskStatsRepository(dynamo_client=operational_client)
+
+
+@asynccontextmanager
+async def task_tombstone_repository_factory() -> (
+    AsyncGenerator[TaskTombstoneRepository, None]
+):
+    async with DynamoDBClient.create_client(
+        table_name=settings.TABLE_ARNS["task_tombstones"]
+    ) as operational_client:
+        yield TaskTombstoneRepository(dynamo_client=operational_client)
+
+
+@asynccontextmanager
+async def task_search_repository_factory() -> (
+    AsyncGenerator[TaskSearchRepository, None]
+):
+    async with DynamoDBClient.create_client(
+        table_name=settings.TABLE_ARNS["task_search"]
+    ) as operational_client:
+        yield TaskSearchRepository(dynamo_client=operational_client)
+
+
 @asynccontextmanager
 async def user_repository_factory() -> AsyncGenerator[UserRepository, None]:
     async with DynamoDBClient.create_client(
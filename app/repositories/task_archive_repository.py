@@ -0,0 +1,35 @@
+from typing import Optional
+
+from app.clients.dynamo_client import DynamoDBClient, DynamoPage, DynamoPageRequest
+from app.tracing import traced
+from app.repositories.task_repository import TaskRepository
+
+
+class TaskArchiveRepository(TaskRepository):
+    """
+    Completed and cancelled tasks moved out of the tasks table. The archive
+    table has the same key and tasks_owner_email index, and is rarely read,
+    so owners are never sharded there.
+    """
+
+    def __init__(self, dynamo_client: DynamoDBClient):
+        super().__init__(dynamo_client)
+        self.sharded_reads = False
+
+    @traced
+    async def get_task_items_page_by_owner(
+        self,
+        owner_email: str,
+        page_request: DynamoPageRequest,
+        fields: Optional[list[str]] = None,
+    ) -> DynamoPage:
+        return await self.client.query_single_page(
+            self.client.get_key_condition_equals("owner_email", owner_email),
+            page_request,
+            index_name="tasks_owner_email",
+            projection=self._get_projection(fields) if fields else None,
+        )
+
+    @traced
+    async def archive_item(self, item: dict) -> None:
+        await self.client.put_item(item)
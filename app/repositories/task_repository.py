@@ -1,22 +1,110 @@
-from typing import AsyncIterator, Optional
-from aiodynamo.expressions import UpdateExpression
+import asyncio
+import heapq
+from zlib import crc32
+from itertools import chain
+from typing import AsyncIterator, Callable, Optional, Union
+from aiodynamo.expressions import Condition, ProjectionExpression, UpdateExpression
+from aiodynamo.models import ReturnValues
 
-from app.schemas.task import Task
+from app import settings
+from app.schemas.task import (
+    Task,
+    TaskPartial,
+    TaskRecord,
+    TASK_KEY_FIELDS,
+    async_iterator_to_list,
+)
 from app.clients.dynamo_client import DynamoDBClient
+from app.tracing import traced
+
+# Index keyed by owner_email -> the same index keyed by owner_shard.
+SHARDED_INDEXES = {
+    "tasks_owner_email": "tasks_owner_shard",
+    "tasks_owner_email_updated_at": "tasks_owner_shard_updated_at",
+}
+
+
+def get_owner_shard_count(owner_email: str) -> int:
+    return settings.TASK_OWNER_SHARDS.get(owner_email, 1)
+
+
+def get_owner_shard(owner_email: str, task_id: str) -> str:
+    shard = crc32(task_id.encode()) % get_owner_shard_count(owner_email)
+    return f"{owner_email}#{shard}"
 
 
 class TaskRepository:
     def __init__(self, dynamo_client: DynamoDBClient):
         self.client = dynamo_client
+        self.sharded_reads = settings.TASK_SHARDED_READS
+
+    @traced
+    async def create_task(self, task: Task) -> Optional[Task]:
+        """Returns the task stored under the same id before, if any."""
+        item = task.to_item()
+        item["owner_shard"] = get_owner_shard(task.owner_email, task.task_id)
+        old_item = await self.client.put_item(item, return_values=ReturnValues.all_old)
+        return Task.model_validate(old_item) if old_item else None
+
+    def _get_projection(self, fields: list[str]):
+        return self.client.get_projection(dict.fromkeys([*TASK_KEY_FIELDS, *fields]))
+
+    async def _query_owner(
+        self,
+        owner_email: str,
+        index_name: str,
+        range_condition: Optional[Condition] = None,
+        projection: Optional[ProjectionExpression] = None,
+        sort_key: Optional[Callable[[dict], object]] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Queries `index_name` by owner_email or, with sharded reads, every
+        owner_shard partition of its sharded counterpart concurrently, merging
+        the per-shard results by `sort_key` (the index range key order).
+        """
+        if not self.sharded_reads:
+            hash_keys = [("owner_email", owner_email)]
+        else:
+            index_name = SHARDED_INDEXES[index_name]
+            hash_keys = [
+                ("owner_shard", f"{owner_email}#{shard}")
+                for shard in range(get_owner_shard_count(owner_email))
+            ]
 
-    async def create_task(self, task: Task) -> Task:
-        await self.client.put_item(task.model_dump())
-        return task
+        def query(key: str, value: str) -> AsyncIterator[dict]:
+            key_conditions = self.client.get_key_condition_equals(key, value)
+            if range_condition is not None:
+                key_conditions = key_conditions & range_condition
+            return self.client.query(
+                key_conditions=key_conditions,
+                index_name=index_name,
+                projection=projection,
+            )
 
-    async def get_task(self, task_id: str) -> Optional[Task]:
+        if len(hash_keys) == 1:
+            async for item in query(*hash_keys[0]):
+                yield item
+            return
+
+        shards = await asyncio.gather(
+            *(async_iterator_to_list(query(*hash_key)) for hash_key in hash_keys)
+        )
+        for item in heapq.merge(*shards, key=sort_key) if sort_key else chain(*shards):
+            yield item
+
+    @traced
+    async def get_task(
+        self, task_id: str, fields: Optional[list[str]] = None
+    ) -> Optional[Union[Task, TaskPartial]]:
+        if fields:
+            item = await self.client.get_item(
+                {"task_id": task_id}, projection=self._get_projection(fields)
+            )
+            return TaskPartial.model_validate(item) if item else None
         item = await self.client.get_item({"task_id": task_id})
-        return Task.model_validate(item)
+        return Task.model_validate(item) if item else None
 
+    @traced
     async def update_task(
         self, task_id: str, update_expression: UpdateExpression
     ) -> Optional[Task]:
@@ -24,6 +112,7 @@ class TaskRepository:
         task = await self.client.get_item({"task_id": task_id})
         return Task.model_validate(task)
 
+    @traced
     async def delete_task(self, task_id: str) -> None:
         await self.client.delete_item({"task_id": task_id})
 
@@ -31,11 +120,46 @@ class TaskRepository:
         async for item in self.client.query():
             yield Task.model_validate(item)
 
-    async def get_task_by_owner(self, owner_email: str) -> AsyncIterator[dict]:
-        async for item in self.client.query(
-            key_conditions=self.client.get_key_condition_equals(
-                "owner_email", owner_email
+    @traced
+    async def get_task_by_owner(
+        self, owner_email: str, fields: Optional[list[str]] = None
+    ) -> AsyncIterator[dict]:
+        model = TaskPartial if fields else Task
+        async for item in self._query_owner(
+            owner_email,
+            "tasks_owner_email",
+            projection=self._get_projection(fields) if fields else None,
+        ):
+            yield model.model_validate(item)
+
+    @traced
+    async def get_task_items_by_owner(
+        self, owner_email: str, fields: Optional[list[str]] = None
+    ) -> AsyncIterator[dict]:
+        async for item in self._query_owner(
+            owner_email,
+            "tasks_owner_email",
+            projection=self._get_projection(fields) if fields else None,
+        ):
+            yield item
+
+    @traced
+    async def get_task_records_by_owner(
+        self, owner_email: str
+    ) -> AsyncIterator[TaskRecord]:
+        async for item in self._query_owner(owner_email, "tasks_owner_email"):
+            yield TaskRecord.from_item(item)
+
+    @traced
+    async def get_task_records_updated_since(
+        self, owner_email: str, since: int
+    ) -> AsyncIterator[TaskRecord]:
+        async for item in self._query_owner(
+            owner_email,
+            "tasks_owner_email_updated_at",
+            range_condition=self.client.get_key_condition_greater_than(
+                "updated_at", since
             ),
-            index_name="tasks_owner_email",
+            sort_key=lambda item: item["updated_at"],
         ):
-            yield Task.model_validate(item)
+            yield TaskRecord.from_item(item)
@@ -0,0 +1,86 @@
+import re
+from collections import Counter
+from typing import AsyncIterator, Optional
+
+from app.schemas.task import Task
+from app.clients.dynamo_client import DynamoDBClient
+from app.tracing import traced
+
+TOKEN_PATTERN = re.compile(r"\w+")
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 64
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    return [
+        token[:MAX_TOKEN_LENGTH]
+        for token in TOKEN_PATTERN.findall((text or "").casefold())
+        if len(token) >= MIN_TOKEN_LENGTH
+    ]
+
+
+def token_weights(task: Task) -> dict[str, int]:
+    weights = Counter()
+    for token in tokenize(task.title):
+        weights[token] += TITLE_WEIGHT
+    for token in tokenize(task.description):
+        weights[token] += DESCRIPTION_WEIGHT
+    return dict(weights)
+
+
+def posting_id(token: str, task_id: str = "") -> str:
+    # "#" never appears in a token, so a token's postings are one key range.
+    return f"{token}#{task_id}"
+
+
+class TaskSearchRepository:
+    """
+    Inverted index of task titles and descriptions, one posting per token
+    and task keyed by owner_email (hash) and `<token>#<task_id>` (range) with
+    its `weight`. Prefix lookups read only the postings of matching tokens.
+    """
+
+    def __init__(self, dynamo_client: DynamoDBClient):
+        self.client = dynamo_client
+
+    @traced
+    async def put_postings(
+        self, owner_email: str, task_id: str, weights: dict[str, int]
+    ) -> None:
+        await self.client.batch_write(
+            items_to_put=[
+                {
+                    "owner_email": owner_email,
+                    "posting_id": posting_id(token, task_id),
+                    "weight": weight,
+                }
+                for token, weight in weights.items()
+            ]
+        )
+
+    @traced
+    async def delete_postings(
+        self, owner_email: str, task_id: str, tokens: list[str]
+    ) -> None:
+        await self.client.batch_write(
+            keys_to_delete=[
+                {"owner_email": owner_email, "posting_id": posting_id(token, task_id)}
+                for token in tokens
+            ]
+        )
+
+    @traced
+    async def get_postings(
+        self, owner_email: str, prefix: str
+    ) -> AsyncIterator[tuple[str, str, int]]:
+        """(token, task_id, weight) of every token starting with `prefix`."""
+        async for item in self.client.query(
+            key_conditions=self.client.get_key_condition_equals(
+                "owner_email", owner_email
+            )
+            & self.client.get_key_condition_begins_with("posting_id", prefix),
+        ):
+            token, task_id = item["posting_id"].rsplit("#", 1)
+            yield token, task_id, int(item["weight"])
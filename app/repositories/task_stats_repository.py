@@ -0,0 +1,92 @@
+import uuid
+from functools import reduce
+from operator import and_
+from typing import AsyncIterator, Optional
+
+from aiodynamo.expressions import F
+
+from app.schemas.task import TaskStats, TaskStatuses
+from app.clients.dynamo_client import DynamoDBClient
+from app.tracing import traced
+
+TOTAL_COUNTER = "total"
+# Changes on every write to the owner's tasks, see TaskService.
+LIST_VERSION = "list_version"
+
+
+def status_counter(status: TaskStatuses) -> str:
+    return f"status_{TaskStatuses(status).value}"
+
+
+def priority_counter(priority: int) -> str:
+    return f"priority_{int(priority)}"
+
+
+class TaskStatsRepository:
+    """
+    One item per owner with flat numeric counters (`total`, `status_<status>`,
+    `priority_<priority>`), updated with ADD so concurrent writers never lose
+    increments and missing counters start at zero. The item also carries the
+    owner's task list version.
+    """
+
+    def __init__(self, dynamo_client: DynamoDBClient):
+        self.client = dynamo_client
+
+    @traced
+    async def increment(self, owner_email: str, deltas: dict[str, int]) -> None:
+        deltas = {counter: delta for counter, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        update_expression = reduce(
+            and_, (F(counter).add(delta) for counter, delta in deltas.items())
+        )
+        await self.client.update_item({"owner_email": owner_email}, update_expression)
+
+    @traced
+    async def get_stats(self, owner_email: str) -> TaskStats:
+        item = await self.client.get_item({"owner_email": owner_email})
+        return self._to_stats(owner_email, item or {})
+
+    @traced
+    async def put_stats(self, owner_email: str, counters: dict[str, int]) -> None:
+        await self.client.put_item({"owner_email": owner_email, **counters})
+
+    @traced
+    async def touch_list_version(self, owner_email: str) -> None:
+        # A fresh random value rather than a counter, so a version lost when
+        # put_stats overwrites the item can never be handed out again.
+        await self.client.update_item(
+            {"owner_email": owner_email}, F(LIST_VERSION).set(uuid.uuid4().hex)
+        )
+
+    @traced
+    async def get_list_version(self, owner_email: str) -> Optional[str]:
+        item = await self.client.get_item(
+            {"owner_email": owner_email},
+            projection=self.client.get_projection([LIST_VERSION]),
+        )
+        return item.get(LIST_VERSION) if item else None
+
+    @traced
+    async def delete_stats(self, owner_email: str) -> None:
+        await self.client.delete_item({"owner_email": owner_email})
+
+    @traced
+    async def get_owner_emails(self) -> AsyncIterator[str]:
+        async for item in self.client.scan():
+            yield item["owner_email"]
+
+    def _to_stats(self, owner_email: str, item: dict) -> TaskStats:
+        return TaskStats(
+            owner_email=owner_email,
+            total=int(item.get(TOTAL_COUNTER, 0)),
+            by_status={
+                status: int(item.get(status_counter(status), 0))
+                for status in TaskStatuses
+            },
+            by_priority={
+                priority: int(item.get(priority_counter(priority), 0))
+                for priority in range(1, 6)
+            },
+        )
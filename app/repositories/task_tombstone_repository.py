@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import AsyncIterator
+
+from app import settings
+from app.schemas.task import Task, to_epoch_ms
+from app.clients.dynamo_client import DynamoDBClient
+from app.tracing import traced
+
+
+def tombstone_id(deleted_at: int, task_id: str = "") -> str:
+    # Zero padded so the range key sorts by deletion time.
+    return f"{deleted_at:015d}#{task_id}"
+
+
+class TaskTombstoneRepository:
+    """
+    Deleted task markers keyed by owner_email (hash) and
+    `<deleted_at ms>#<task_id>` (range), expired by DynamoDB TTL on `expires_at`.
+    """
+
+    def __init__(self, dynamo_client: DynamoDBClient):
+        self.client = dynamo_client
+
+    @traced
+    async def create_tombstone(self, task: Task, deleted_at: datetime) -> None:
+        deleted_at_ms = to_epoch_ms(deleted_at)
+        await self.client.put_item(
+            {
+                "owner_email": task.owner_email,
+                "tombstone_id": tombstone_id(deleted_at_ms, task.task_id),
+                "task_id": task.task_id,
+                "deleted_at": deleted_at_ms,
+                "expires_at": int(
+                    (deleted_at + settings.TASK_TOMBSTONE_RETENTION).timestamp()
+                ),
+            }
+        )
+
+    @traced
+    async def get_tombstones_since(
+        self, owner_email: str, since: int
+    ) -> AsyncIterator[dict]:
+        async for item in self.client.query(
+            key_conditions=self.client.get_key_condition_equals(
+                "owner_email", owner_email
+            )
+            & self.client.get_key_condition_greater_than(
+                "tombstone_id", tombstone_id(since)
+            ),
+        ):
+            yield item
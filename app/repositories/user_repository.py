@@ -3,12 +3,14 @@ from aiodynamo.expressions import UpdateExpression
 
 from app.schemas.user import UserCreate, User
 from app.clients.dynamo_client import DynamoDBClient
+from app.tracing import traced
 
 
 class UserRepository:
     def __init__(self, dynamo_client: DynamoDBClient):
         self.client = dynamo_client
 
+    @traced
     async def create_user(self, user: User) -> Optional[User]:
         existing_user = await self.client.get_item({"email": user.email})
         if existing_user:
@@ -17,10 +19,12 @@ class UserRepository:
         await self.client.put_item(user.model_dump())
         return existing_user or user
 
+    @traced
     async def get_user(self, email: str) -> Optional[User]:
         item = await self.client.get_item({"email": email})
         return User.model_validate(item) if item else None
 
+    @traced
     async def update_user(
         self, email: str, update_expression: UpdateExpression
     ) -> Optional[dict]:
@@ -29,5 +33,6 @@ class UserRepository:
         )
         return updated_item
 
+    @traced
     async def delete_user(self, email: str) -> None:
         await self.client.delete_item({"email": email})
@@ -0,0 +1,49 @@
+"""
+Fast JSON responses of pydantic models.
+
+Routes returning models let FastAPI validate them against response_model
+again and walk them with jsonable_encoder before json.dumps. Returning a
+ModelJSONResponse skips both: the models, already valid since we built
+them, go straight through pydantic-core's compiled serializer, with the
+same output as model_dump(mode="json"). response_model stays on the route
+for the OpenAPI schema.
+"""
+
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+class ModelJSONResponse(JSONResponse):
+    """
+    Renders a model or a list of models of the same type, anything else
+    through jsonable_encoder. `include` limits every model to these fields.
+    """
+
+    def __init__(self, content: Any, include: Optional[set[str]] = None, **kwargs):
+        self.include = include
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(
+                content, include=self.include
+            )
+        if isinstance(content, list) and content:
+            model = type(content[0])
+            if issubclass(model, BaseModel) and all(
+                type(item) is model for item in content
+            ):
+                return _list_adapter(model).dump_json(
+                    content,
+                    include={"__all__": self.include} if self.include else None,
+                )
+        return super().render(jsonable_encoder(content))
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+
+from app.permissions.permissions import check_user_has_access
+from app.profiling import RENDERERS, ProfileNotFoundError, profile_store
+from app.schemas.user import UserPermission
+from app.settings import security_scheme
+
+router = APIRouter(
+    prefix="/admin/profiles",
+    tags=["admin"],
+    dependencies=[
+        Depends(security_scheme),
+        Depends(check_user_has_access(permission=UserPermission.PROFILE_REQUESTS)),
+    ],
+)
+
+
+@router.get("")
+async def list_profiles():
+    """
+    Recent request profiles, newest first.
+    """
+    return await asyncio.to_thread(profile_store.list)
+
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: Literal["speedscope", "html", "text"] = Query(
+        "speedscope", description="speedscope JSON opens at https://speedscope.app"
+    ),
+):
+    """
+    Download a profile, named by the X-Profile-Id header of the response.
+    """
+    try:
+        content = await asyncio.to_thread(profile_store.render, profile_id, format)
+    except ProfileNotFoundError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    _, media_type, extension = RENDERERS[format]
+    return Response(
+        content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{profile_id}.{extension}"'
+        },
+    )
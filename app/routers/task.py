@@ -1,52 +1,265 @@
-from fastapi import HTTPException, Depends, Query, Request
+import json
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from fastapi import HTTPException, Depends, Query, Request, Response
 from fastapi import APIRouter
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from hashlib import blake2b
+from typing import Optional, Union
 from datetime import datetime
+from app import settings
+from app.clients.dynamo_client import DynamoPageRequest
+from app.responses import ModelJSONResponse
 from app.settings import security, security_scheme
 
-from app.schemas.task import TaskCreateRequest, TaskStatuses, TaskUpdateRequest, Task
+from app.schemas.task import (
+    TaskChanges,
+    TaskCreateRequest,
+    TaskStats,
+    TaskStatuses,
+    TaskUpdateRequest,
+    Task,
+    TaskPartial,
+    parse_task_fields,
+    to_epoch_ms,
+)
 from app.schemas.user import User
 from app.services.task_service import TaskService
-from app.services.utils import get_task_service
+from app.services.idempotency import IdempotentRequest, get_idempotent_request
+from app.services.task_events import task_event_broker
+from app.services.utils import (
+    get_task_service,
+    login_prefetcher,
+    task_write_buffer,
+)
 from app.strategies.task_filter_strategy import get_filter_strategy
 from app.strategies.task_sort_strategy import get_sort_strategy
+from app.strategies.task_query_strategy import TaskQueryError, get_query_strategy
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+FIELDS_QUERY_DESCRIPTION = "Comma-separated list of task attributes to return"
+
+
+def get_requested_fields(
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
+) -> Optional[list[str]]:
+    try:
+        return parse_task_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def partial_response(content, fields: Optional[list[str]]) -> ModelJSONResponse:
+    return ModelJSONResponse(content, include=set(fields) if fields else None)
+
+
+# Also changed by OverdueNotifier without touching updated_at.
+TASK_ETAG_FIELDS = ["updated_at", "notifier_id"]
+
+
+def make_etag(*parts) -> str:
+    digest = blake2b("|".join(map(str, parts)).encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def task_etag(task: Union[Task, TaskPartial], request: Request) -> str:
+    return make_etag(
+        task.task_id,
+        to_epoch_ms(task.updated_at),
+        task.notifier_id,
+        request.url.query,
+    )
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    tags = request.headers.get("if-none-match", "").split(",")
+    tags = {tag.strip().removeprefix("W/") for tag in tags}
+    return etag in tags or "*" in tags
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def not_modified(etag: str) -> Response:
+    return with_etag(Response(status_code=304), etag)
+
+
+def encode_archive_cursor(last_evaluated_key: dict) -> str:
+    return urlsafe_b64encode(json.dumps(last_evaluated_key).encode()).decode()
+
+
+def get_archive_page(
+    include_archived: bool = Query(
+        False, description="Include archived completed and cancelled tasks"
+    ),
+    archive_limit: int = Query(
+        settings.TASK_ARCHIVE_PAGE_SIZE,
+        ge=1,
+        le=1000,
+        description="Archived tasks included per request",
+    ),
+    archive_cursor: Optional[str] = Query(
+        None, description="X-Archive-Cursor of the previous response"
+    ),
+) -> Optional[DynamoPageRequest]:
+    if not include_archived:
+        return None
+    try:
+        last_evaluated_key = (
+            json.loads(urlsafe_b64decode(archive_cursor)) if archive_cursor else None
+        )
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid archive cursor")
+    if last_evaluated_key is not None and not isinstance(last_evaluated_key, dict):
+        raise HTTPException(status_code=400, detail="Invalid archive cursor")
+    return DynamoPageRequest(
+        records=archive_limit, last_evaluated_key=last_evaluated_key
+    )
+
+
+def prefers_respond_async(request: Request) -> bool:
+    preferences = request.headers.get("prefer", "").split(",")
+    return any(p.strip().lower() == "respond-async" for p in preferences)
+
 
 @router.post("", response_model=Task, dependencies=[Depends(security_scheme)])
 async def create_task(
     dto: TaskCreateRequest,
     current_user: User = Depends(security.get_current_subject),
     service: TaskService = Depends(get_task_service),
+    idempotency: IdempotentRequest = Depends(get_idempotent_request),
 ):
+    if idempotency.response:
+        return idempotency.response
     task = await service.create_task(dto, current_user)
-    return task
+    return await idempotency.save(task)
+
+
+@router.get("/stats", response_model=TaskStats, dependencies=[Depends(security_scheme)])
+async def get_task_stats(
+    service: TaskService = Depends(get_task_service),
+    current_user: User = Depends(security.get_current_subject),
+):
+    return await service.get_task_stats(current_user)
+
+
+@router.get("/events", dependencies=[Depends(security_scheme)])
+async def task_events(current_user: User = Depends(security.get_current_subject)):
+    """
+    Server-sent events stream of the current user's task changes. A `resync`
+    event means events were dropped and the client should call /tasks/changes.
+    """
+    return StreamingResponse(
+        task_event_broker.stream(current_user.email),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/changes", response_model=TaskChanges, dependencies=[Depends(security_scheme)]
+)
+async def get_task_changes(
+    since: Optional[str] = Query(
+        None, description="Cursor returned by the previous call, omit for a full sync"
+    ),
+    service: TaskService = Depends(get_task_service),
+    current_user: User = Depends(security.get_current_subject),
+):
+    if since is not None and not since.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return ModelJSONResponse(
+        await service.get_task_changes(
+            current_user, int(since) if since is not None else None
+        )
+    )
+
+
+@router.get(
+    "/search", response_model=list[Task], dependencies=[Depends(security_scheme)]
+)
+async def search_tasks(
+    q: str = Query(
+        ..., description="Words or word prefixes of titles and descriptions"
+    ),
+    limit: int = Query(20, ge=1, le=100),
+    include_archived: bool = Query(
+        False, description="Include archived completed and cancelled tasks"
+    ),
+    service: TaskService = Depends(get_task_service),
+    current_user: User = Depends(security.get_current_subject),
+):
+    return ModelJSONResponse(
+        await service.search_tasks(
+            current_user, q, limit=limit, include_archived=include_archived
+        )
+    )
 
 
 @router.get("/{task_id}", response_model=Task, dependencies=[Depends(security_scheme)])
 async def get_task(
+    request: Request,
     task_id: str,
+    include_archived: bool = Query(
+        False, description="Also look the task up in the archive"
+    ),
+    fields: Optional[list[str]] = Depends(get_requested_fields),
     service: TaskService = Depends(get_task_service),
     current_user: User = Depends(security.get_current_subject),
 ):
-    task = await service.get_task(task_id)
+    if "if-none-match" in request.headers:
+        # Revalidation reads only the attributes the ETag is derived from.
+        current = await service.get_task(
+            task_id, fields=TASK_ETAG_FIELDS, include_archived=include_archived
+        )
+        if current and current.owner_email == current_user.email:
+            etag = task_etag(current, request)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+    task = await service.get_task(
+        task_id,
+        fields=[*fields, *TASK_ETAG_FIELDS] if fields else None,
+        include_archived=include_archived,
+    )
     if not task or task.owner_email != current_user.email:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    return with_etag(partial_response(task, fields), task_etag(task, request))
 
 
 @router.put("/{task_id}", response_model=Task, dependencies=[Depends(security_scheme)])
 async def update_task(
+    request: Request,
+    response: Response,
     task_id: str,
     dto: TaskUpdateRequest,
     current_user: User = Depends(security.get_current_subject),
     service: TaskService = Depends(get_task_service),
+    idempotency: IdempotentRequest = Depends(get_idempotent_request),
 ):
-    task = await service.update_task(task_id, dto, current_user)
+    """
+    With `Prefer: respond-async` the update may be buffered and merged with
+    later updates of the task, answered with 202, see
+    app.services.task_write_buffer.
+    """
+    if idempotency.response:
+        return idempotency.response
+    write_behind = task_write_buffer.enabled and prefers_respond_async(request)
+    task = await service.update_task(
+        task_id, dto, current_user, write_behind=write_behind
+    )
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    if write_behind:
+        headers = {"Preference-Applied": "respond-async"}
+        response.status_code = 202
+        response.headers.update(headers)
+        return await idempotency.save(task, status_code=202, headers=headers)
+    return await idempotency.save(task)
 
 
 @router.delete("/{task_id}", dependencies=[Depends(security_scheme)])
@@ -54,13 +267,17 @@ async def delete_task(
     task_id: str,
     service: TaskService = Depends(get_task_service),
     current_user: User = Depends(security.get_current_subject),
+    idempotency: IdempotentRequest = Depends(get_idempotent_request),
 ):
+    if idempotency.response:
+        return idempotency.response
     await service.delete_task(task_id)
-    return {"detail": "Task deleted"}
+    return await idempotency.save({"detail": "Task deleted"})
 
 
 @router.get("", response_model=list[Task], dependencies=[Depends(security_scheme)])
 async def list_tasks(
+    request: Request,
     status: Optional[TaskStatuses] = Query(None, description="Filter tasks by status"),
     due_before: Optional[datetime] = Query(
         None, description="Filter tasks due before this date"
@@ -68,23 +285,69 @@ async def list_tasks(
     sort_by: Optional[str] = Query(
         None, description="Sort by 'created_at' or 'priority'"
     ),
+    archive_page: Optional[DynamoPageRequest] = Depends(get_archive_page),
+    q: Optional[str] = Query(
+        None,
+        description="Filter expression, e.g. 'status:pending priority>=3 due<2026-12-01'",
+    ),
+    sort: Optional[str] = Query(
+        None, description="Comma-separated sort fields, '-' for descending"
+    ),
+    fields: Optional[list[str]] = Depends(get_requested_fields),
     service: TaskService = Depends(get_task_service),
     current_user: User = Depends(security.get_current_subject),
 ):
-    filter_strategy = get_filter_strategy(status, due_before)
-    sort_strategy = get_sort_strategy(sort_by)
+    # Read before the tasks, a write in between only makes the ETag stale.
+    version = await service.get_list_version(current_user)
+    etag = make_etag(version, request.url.query) if version else None
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
 
-    tasks = await service.list_tasks(
-        filter_strategy=filter_strategy, sort_strategy=sort_strategy, user=current_user
+    default_listing = not (
+        q or sort or status or due_before or sort_by or archive_page or fields
     )
-    return tasks
+    if default_listing and version:
+        tasks = login_prefetcher.get_tasks(current_user.email, version)
+        if tasks is not None:
+            return with_etag(ModelJSONResponse(tasks), etag)
+
+    if q is not None or sort is not None:
+        try:
+            query_strategy = get_query_strategy(
+                q, sort or sort_by, status=status, due_before=due_before
+            )
+        except TaskQueryError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        tasks, archive_cursor = await service.query_tasks(
+            current_user,
+            query_strategy,
+            fields=fields,
+            archive_page=archive_page,
+        )
+    else:
+        tasks, archive_cursor = await service.list_tasks(
+            filter_strategy=get_filter_strategy(status, due_before),
+            sort_strategy=get_sort_strategy(sort_by),
+            user=current_user,
+            fields=fields,
+            archive_page=archive_page,
+        )
+    response = partial_response(tasks, fields)
+    if archive_cursor:
+        # Lists the next page of archived tasks, without the tasks.
+        response.headers["X-Archive-Cursor"] = encode_archive_cursor(archive_cursor)
+    return with_etag(response, etag) if etag else response
 
 
 @router.post("/{task_id}/complete", response_model=Task)
 async def mark_task_completed(
-    task_id: str, service: TaskService = Depends(get_task_service)
+    task_id: str,
+    service: TaskService = Depends(get_task_service),
+    idempotency: IdempotentRequest = Depends(get_idempotent_request),
 ):
+    if idempotency.response:
+        return idempotency.response
     task = await service.mark_task_completed(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    return await idempotency.save(task)
@@ -1,13 +1,16 @@
 import asyncio
+import contextvars
 from concurrent.futures import ThreadPoolExecutor
 from authx import TokenPayload
 from fastapi import APIRouter, Depends, HTTPException, Response, status
 
 from app.repositories.factories import user_repository_factory
-from app.services.utils import get_user_service
+from app.responses import ModelJSONResponse
+from app.services.utils import get_user_service, login_prefetcher
 from app.services.user_service import UserService
 from app.schemas.user import UserCreate, UserLogin, UserUpdate, User, UserPermission
 from app.settings import security
+from app.tracing import tracer
 from app.permissions.permissions import check_user_has_access
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -57,7 +60,7 @@ async def get_current_user(
     """
     Retrieve the current authenticated user's profile.
     """
-    return current_user
+    return ModelJSONResponse(current_user)
 
 
 @router.put(
@@ -120,7 +123,11 @@ async def async_get_user_from_uuid(uuid: str):
 
 
 @security.set_subject_getter
+@tracer.start_as_current_span("get_current_subject")
 def get_user_from_uuid(uuid: str):
+    user = login_prefetcher.get_user(uuid)
+    if user:
+        return user
     try:
         executor = ThreadPoolExecutor(max_workers=1)
         loop = asyncio.new_event_loop()
@@ -129,7 +136,12 @@ def get_user_from_uuid(uuid: str):
         def run_async_in_new_loop(coro):
             return loop.run_until_complete(coro)
 
-        future = executor.submit(run_async_in_new_loop, async_get_user_from_uuid(uuid))
+        # The copied context keeps the lookup's spans in the request's trace.
+        future = executor.submit(
+            contextvars.copy_context().run,
+            run_async_in_new_loop,
+            async_get_user_from_uuid(uuid),
+        )
         return future.result()
 
     finally:
@@ -1,8 +1,12 @@
 from enum import Enum
+from decimal import Decimal
 from typing import Optional
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field, field_serializer, field_validator
 
+from app import settings
+
 
 class TaskStatuses(str, Enum):
     PENDING = "pending"
@@ -50,9 +54,63 @@ class Task(BaseModel):
     created_at: datetime = Field(..., example="2021-01-01T00:00:00Z")
     updated_at: datetime = Field(..., example="2021-01-01T00:00:00Z")
 
+    @field_validator("due_date", "created_at", "updated_at", mode="before")
+    def datetime_from_storage(cls, v):
+        return parse_datetime(v) if isinstance(v, (str, int, float, Decimal)) else v
+
     @field_serializer("due_date", "created_at", "updated_at")
     def datetime_to_str(self, value):
-        return value.strftime("%Y-%m-%d %H:%M:%S.%f") if value else None
+        return convert_datetime(value) if value else None
+
+    def to_item(self) -> dict:
+        item = self.model_dump(exclude=set(TASK_DATETIME_FIELDS))
+        for field in TASK_DATETIME_FIELDS:
+            item[field] = to_storage_datetime(getattr(self, field))
+        return item
+
+
+class TaskPartial(BaseModel):
+    owner_email: Optional[str] = None
+    task_id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[TaskStatuses] = None
+    priority: Optional[int] = None
+    notifier_id: Optional[str] = None
+    due_date: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @field_validator("due_date", "created_at", "updated_at", mode="before")
+    def datetime_from_storage(cls, v):
+        return parse_datetime(v) if isinstance(v, (str, int, float, Decimal)) else v
+
+    @field_serializer("due_date", "created_at", "updated_at")
+    def datetime_to_str(self, value):
+        return convert_datetime(value) if value else None
+
+
+# Key attributes are always projected so ownership checks keep working.
+TASK_KEY_FIELDS = ("task_id", "owner_email")
+TASK_DATETIME_FIELDS = ("due_date", "created_at", "updated_at")
+
+
+class TaskStats(BaseModel):
+    owner_email: str = Field(..., example="owner_email")
+    total: int = Field(0, example=12)
+    by_status: dict[TaskStatuses, int] = Field(
+        default_factory=dict, example={"pending": 8, "completed": 4}
+    )
+    by_priority: dict[int, int] = Field(default_factory=dict, example={1: 10, 5: 2})
+
+
+class TaskChanges(BaseModel):
+    tasks: list[Task] = Field(default_factory=list)
+    deleted: list[str] = Field(default_factory=list, example=["task_id"])
+    cursor: str = Field(..., example="1735732800000")
+    full_resync: bool = Field(
+        False, description="Local state must be replaced instead of patched"
+    )
 
 
 class TaskServiceActions(str, Enum):
@@ -62,8 +120,102 @@ class TaskServiceActions(str, Enum):
     mark_task_completed = "mark_task_completed"
 
 
+@dataclass(slots=True)
+class TaskRecord:
+    """
+    Compact task loaded from trusted storage without pydantic validation.
+    Items in the tasks table were written from a validated `Task`, so the
+    constraints are not checked again. Convert with `to_task()` at the edge.
+    """
+
+    owner_email: str
+    task_id: str
+    title: str
+    description: Optional[str]
+    status: TaskStatuses
+    priority: int
+    notifier_id: Optional[str]
+    due_date: datetime
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_item(cls, item: dict) -> "TaskRecord":
+        get = item.get
+        return cls(
+            item["owner_email"],
+            item["task_id"],
+            item["title"],
+            get("description"),
+            _TASK_STATUSES[get("status", "pending")],
+            int(get("priority", 1)),
+            get("notifier_id"),
+            parse_datetime(item["due_date"]),
+            parse_datetime(item["created_at"]),
+            parse_datetime(item["updated_at"]),
+        )
+
+    def to_task(self) -> Task:
+        # Every field is already present and of its type, nothing to validate.
+        return Task.model_construct(
+            _fields_set=set(Task.model_fields),
+            owner_email=self.owner_email,
+            task_id=self.task_id,
+            title=self.title,
+            description=self.description,
+            status=self.status,
+            priority=self.priority,
+            notifier_id=self.notifier_id,
+            due_date=self.due_date,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+        )
+
+
+_TASK_STATUSES = {status.value: status for status in TaskStatuses}
+
+
 def convert_datetime(value):
-    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    # Same output as strftime("%Y-%m-%d %H:%M:%S.%f"), without the format parsing.
+    # Epoch ms keep no offset, so aware values are rendered in TIMEZONE, the
+    # caller's own offset is not echoed. Slicing off the UTC offset is cheaper
+    # than replace(tzinfo=None).
+    if value.tzinfo:
+        value = value.astimezone(settings.TIMEZONE)
+    return value.isoformat(" ", "microseconds")[:26]
+
+
+def to_epoch_ms(value: datetime) -> int:
+    if not value.tzinfo:
+        value = value.replace(tzinfo=settings.TIMEZONE)
+    return int(value.timestamp() * 1000)
+
+
+def to_storage_datetime(value: datetime):
+    if settings.TASK_TIMESTAMP_FORMAT == "string":
+        return convert_datetime(value)
+    return to_epoch_ms(value)
+
+
+def parse_datetime(value) -> datetime:
+    """
+    Reads both storage formats: epoch milliseconds and the legacy naive
+    strings, which were written in the application timezone.
+    """
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value)
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=settings.TIMEZONE)
+    return datetime.fromtimestamp(float(value) / 1000, tz=timezone.utc)
+
+
+def parse_task_fields(fields: Optional[str]) -> Optional[list[str]]:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in Task.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown task fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(requested))
 
 
 async def async_iterator_to_list(async_iterator):
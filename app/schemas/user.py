@@ -126,3 +126,4 @@ class UserPermission(str, Enum):
     DELETE_TASK = "delete_task"
     LIST_USERS = "list_users"
     DELETE_USERS = "delete_users"
+    PROFILE_REQUESTS = "profile_requests"
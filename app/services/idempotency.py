@@ -0,0 +1,156 @@
+import json
+import logging
+from hashlib import sha256
+from datetime import timedelta
+from typing import AsyncGenerator, Optional
+
+from authx.exceptions import AuthXException
+from fastapi import Header, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from redis.asyncio import Redis
+
+from app import settings
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = "in_progress"
+
+
+class IdempotencyStore:
+    """
+    Stores the response of a request under its Idempotency-Key. The key is
+    claimed with SET NX while the request runs so concurrent retries are
+    rejected instead of executed twice. The claim expires after `lock_ttl`,
+    the stored response after `ttl`.
+    """
+
+    def __init__(self, redis_url: str, ttl: timedelta, lock_ttl: timedelta):
+        self.redis = Redis.from_url(redis_url)
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[dict]:
+        """Returns the stored record, or None if the key was claimed now."""
+        record = {"state": IN_PROGRESS, "fingerprint": fingerprint}
+        if await self.redis.set(key, json.dumps(record), nx=True, ex=self.lock_ttl):
+            return None
+        stored = await self.redis.get(key)
+        # The key may have expired between SET NX and GET.
+        return json.loads(stored) if stored else await self.claim(key, fingerprint)
+
+    async def complete(
+        self,
+        key: str,
+        fingerprint: str,
+        status_code: int,
+        body,
+        headers: Optional[dict[str, str]] = None,
+    ) -> None:
+        record = {
+            "state": "completed",
+            "fingerprint": fingerprint,
+            "status_code": status_code,
+            "body": body,
+            "headers": headers or {},
+        }
+        await self.redis.set(key, json.dumps(record), ex=self.ttl)
+
+    async def release(self, key: str) -> None:
+        await self.redis.delete(key)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+idempotency_store = IdempotencyStore(
+    settings.REDIS_URL, settings.IDEMPOTENCY_KEY_TTL, settings.IDEMPOTENCY_LOCK_TTL
+)
+
+
+class IdempotentRequest:
+    def __init__(
+        self,
+        key: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+        response: Optional[JSONResponse] = None,
+    ):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.response = response
+
+    async def save(
+        self,
+        content,
+        status_code: int = status.HTTP_200_OK,
+        headers: Optional[dict[str, str]] = None,
+    ):
+        """`headers` set on the response are replayed along with it."""
+        if self.key:
+            await idempotency_store.complete(
+                self.key,
+                self.fingerprint,
+                status_code,
+                jsonable_encoder(content),
+                headers,
+            )
+        return content
+
+
+async def get_subject(request: Request) -> Optional[str]:
+    token = await settings.security.get_token_from_request(optional=True)(request)
+    if not token:
+        return None
+    try:
+        return settings.security.verify_token(token, verify_csrf=False).sub
+    except AuthXException:
+        return None
+
+
+async def get_idempotent_request(
+    request: Request,
+    idempotency_key: Optional[str] = Header(
+        None, description="Client generated unique key (e.g. UUID4) to retry safely"
+    ),
+) -> AsyncGenerator[IdempotentRequest, None]:
+    if not idempotency_key:
+        yield IdempotentRequest()
+        return
+
+    # Keys are scoped by user, requests without a valid access token share
+    # the keys of their path.
+    subject = await get_subject(request)
+    scope = f"{subject}:{request.method}" if subject else request.method
+    key = f"idempotency:{scope}:{request.url.path}:{idempotency_key}"
+    fingerprint = sha256(await request.body()).hexdigest()
+    record = await idempotency_store.claim(key, fingerprint)
+    if record:
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request",
+            )
+        if record["state"] == IN_PROGRESS:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is in progress",
+            )
+        yield IdempotentRequest(
+            response=JSONResponse(
+                content=record["body"],
+                status_code=record["status_code"],
+                # Records stored before headers were kept have none.
+                headers={
+                    **record.get("headers", {}),
+                    "Idempotent-Replayed": "true",
+                },
+            )
+        )
+        return
+
+    try:
+        yield IdempotentRequest(key=key, fingerprint=fingerprint)
+    except Exception:
+        # Failed requests are not stored, the client may retry them.
+        await idempotency_store.release(key)
+        raise
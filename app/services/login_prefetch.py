@@ -0,0 +1,139 @@
+"""
+Warms the caches read by the requests clients send right after logging in,
+GET /users/me and GET /tasks.
+
+UserService.authenticate_user starts a prefetch of the user's default task
+list as soon as the user is loaded and verifies the password meanwhile;
+a failed login cancels it. The list is cached with the list version read
+before it and list_tasks serves it only while the version is unchanged, so
+it is never staler than a fresh read. The logged in user is cached for the
+subject getter, dropped when updated or deleted in this process; other
+processes may serve it until it expires after LOGIN_PREFETCH_TTL.
+
+Prefetches are bounded: at most LOGIN_PREFETCH_CONCURRENCY run at once and
+logins past that are not prefetched, each is cancelled after
+LOGIN_PREFETCH_TIMEOUT and lists longer than LOGIN_PREFETCH_MAX_TASKS are
+not kept. Shutdown cancels the running ones.
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from app.metrics import LOGIN_PREFETCHES, PREFETCH_CACHE_REQUESTS
+from app.schemas.task import Task
+from app.schemas.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Entries expire `ttl` seconds after they are stored, the oldest are
+    evicted past `max_size`. Read from the subject getter's thread too.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self.entries.pop(key, None)
+            return None
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self.entries.pop(key, None)
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+
+class LoginPrefetcher:
+    def __init__(
+        self,
+        load_tasks: Callable[[User], Awaitable[tuple[Optional[str], list[Task]]]],
+        concurrency: int,
+        timeout: float,
+        ttl: float,
+        max_users: int,
+        max_tasks: int,
+    ):
+        """`load_tasks(user)` returns the list version and the task list."""
+        self.load_tasks = load_tasks
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_tasks = max_tasks
+        self.users = TTLCache(ttl, max_users)
+        self.task_lists = TTLCache(ttl, max_users)
+        self.running: dict[str, asyncio.Task] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.concurrency > 0
+
+    def start(self, user: User) -> Optional[asyncio.Task]:
+        """Returns the started prefetch, None if it was skipped."""
+        if not self.enabled or user.email in self.running:
+            return None
+        if len(self.running) >= self.concurrency:
+            LOGIN_PREFETCHES.labels("skipped").inc()
+            return None
+        prefetch = asyncio.create_task(self._prefetch(user))
+        self.running[user.email] = prefetch
+        prefetch.add_done_callback(lambda _: self.running.pop(user.email, None))
+        return prefetch
+
+    async def _prefetch(self, user: User) -> None:
+        try:
+            version, tasks = await asyncio.wait_for(self.load_tasks(user), self.timeout)
+        except asyncio.CancelledError:
+            LOGIN_PREFETCHES.labels("cancelled").inc()
+            raise
+        except asyncio.TimeoutError:
+            LOGIN_PREFETCHES.labels("timeout").inc()
+            return
+        except Exception:
+            LOGIN_PREFETCHES.labels("failed").inc()
+            logger.exception(f"Prefetching tasks of {user.email} failed")
+            return
+        if version is None or len(tasks) > self.max_tasks:
+            LOGIN_PREFETCHES.labels("skipped").inc()
+            return
+        self.task_lists.put(user.email, (version, tasks))
+        LOGIN_PREFETCHES.labels("completed").inc()
+
+    def put_user(self, user: User) -> None:
+        if self.enabled:
+            self.users.put(user.email, user)
+
+    def get_user(self, email: str) -> Optional[User]:
+        user = self.users.get(email)
+        PREFETCH_CACHE_REQUESTS.labels("users", "hit" if user else "miss").inc()
+        return user
+
+    def forget_user(self, email: str) -> None:
+        self.users.pop(email)
+
+    def get_tasks(self, email: str, version: str) -> Optional[list[Task]]:
+        """The prefetched default task list, if read at this list version."""
+        entry = self.task_lists.get(email)
+        hit = entry is not None and entry[0] == version
+        PREFETCH_CACHE_REQUESTS.labels("tasks", "hit" if hit else "miss").inc()
+        return entry[1] if hit else None
+
+    async def close(self) -> None:
+        for prefetch in self.running.values():
+            prefetch.cancel()
+        await asyncio.gather(*self.running.values(), return_exceptions=True)
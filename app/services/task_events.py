@@ -0,0 +1,126 @@
+import json
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "task-events:"
+
+
+class TaskEventSubscription:
+    """
+    Bounded buffer of events for one connected client. When the client falls
+    behind, new events are dropped and the client is told to resync instead.
+    """
+
+    def __init__(self, buffer_size: int):
+        # None in the queue wakes a waiting get() for a resync.
+        self.queue: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=buffer_size)
+        self.overflowed = False
+
+    def put(self, event: str) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def resync(self) -> None:
+        """Drops the buffered events, the client is told to resync."""
+        self.overflowed = True
+        # A full queue has no waiting get().
+        if not self.queue.full():
+            self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[str]:
+        """Returns the next event, or None when the client must resync."""
+        if not self.overflowed:
+            event = await self.queue.get()
+            if event is not None:
+                return event
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+        return None
+
+
+class TaskEventBroker:
+    """
+    Publishes task events to a Redis channel per owner and fans them out to
+    the clients connected to this worker, so events reach clients regardless
+    of which API worker handled the write.
+    """
+
+    def __init__(self, redis_url: str, buffer_size: int):
+        self.redis = Redis.from_url(redis_url)
+        self.buffer_size = buffer_size
+        self.subscriptions: dict[str, set[TaskEventSubscription]] = defaultdict(set)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, owner_email: str, event: dict) -> None:
+        await self.redis.publish(f"{CHANNEL_PREFIX}{owner_email}", json.dumps(event))
+
+    @asynccontextmanager
+    async def subscribe(self, owner_email: str) -> AsyncIterator[TaskEventSubscription]:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        subscription = TaskEventSubscription(self.buffer_size)
+        self.subscriptions[owner_email].add(subscription)
+        try:
+            yield subscription
+        finally:
+            self.subscriptions[owner_email].discard(subscription)
+            if not self.subscriptions[owner_email]:
+                del self.subscriptions[owner_email]
+
+    async def stream(self, owner_email: str) -> AsyncIterator[str]:
+        async with self.subscribe(owner_email) as subscription:
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(), settings.TASK_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    yield "event: resync\ndata: {}\n\n"
+                else:
+                    yield f"event: task\ndata: {event}\n\n"
+
+    async def close(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+        await self.redis.aclose()
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            self._dispatch(message["channel"], message["data"])
+            except RedisError as e:
+                logger.exception(f"Task events subscription failed: {e}")
+                for subscriptions in self.subscriptions.values():
+                    for subscription in subscriptions:
+                        subscription.resync()
+                await asyncio.sleep(1)
+
+    def _dispatch(self, channel: bytes, data: bytes) -> None:
+        owner_email = channel.decode().removeprefix(CHANNEL_PREFIX)
+        for subscription in self.subscriptions.get(owner_email, ()):
+            subscription.put(data.decode())
+
+
+task_event_broker = TaskEventBroker(
+    settings.REDIS_URL, settings.TASK_EVENTS_BUFFER_SIZE
+)
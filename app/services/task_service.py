@@ -1,20 +1,37 @@
+import asyncio
 from hashlib import sha256
+from collections import Counter
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from typing import Optional, List
+from typing import Optional, List, Tuple, Union
 from aiodynamo.expressions import F
 
+from app.clients.dynamo_client import DynamoPageRequest
 from app.observers.task_observers import TaskObserver
 from app.repositories.task_repository import TaskRepository
+from app.repositories.task_archive_repository import TaskArchiveRepository
+from app.repositories.task_stats_repository import TaskStatsRepository
+from app.repositories.task_tombstone_repository import TaskTombstoneRepository
+from app.repositories.task_search_repository import TaskSearchRepository, tokenize
+from app.services.task_write_buffer import TaskWriteBuffer
 from app.schemas.user import User
-from app.schemas.task import async_iterator_to_list, convert_datetime
+from app import settings
+from app.metrics import OBSERVER_SECONDS
+from app.tracing import traced, tracer
+from app.schemas.task import async_iterator_to_list, to_epoch_ms, to_storage_datetime
 from app.strategies.task_sort_strategy import TaskSortStrategy
 from app.strategies.task_filter_strategy import TaskFilterStrategy
+from app.strategies.task_query_strategy import TaskColumns, TaskQueryStrategy
 from app.schemas.task import (
     Task,
+    TaskChanges,
     TaskCreateRequest,
+    TaskPartial,
+    TaskRecord,
+    TaskStats,
     TaskUpdateRequest,
     TaskServiceActions,
+    TASK_KEY_FIELDS,
 )
 
 
@@ -29,13 +46,24 @@ class TaskService:
         self,
         repository: TaskRepository,
         observers: Optional[List[TaskObserver]] = None,
+        stats_repository: Optional[TaskStatsRepository] = None,
+        tombstone_repository: Optional[TaskTombstoneRepository] = None,
+        archive_repository: Optional[TaskArchiveRepository] = None,
+        search_repository: Optional[TaskSearchRepository] = None,
+        write_buffer: Optional[TaskWriteBuffer] = None,
     ):
         self.repository = repository
         self.observers = observers or []
+        self.stats_repository = stats_repository
+        self.tombstone_repository = tombstone_repository
+        self.archive_repository = archive_repository
+        self.search_repository = search_repository
+        self.write_buffer = write_buffer
 
     def create_task_id(self, title: str, owner_email: str) -> str:
         return sha256(f"{title}_{owner_email}".encode()).hexdigest()
 
+    @traced
     async def create_task(self, request: TaskCreateRequest, user: User) -> Task:
         task = Task(
             **request.model_dump(),
@@ -44,15 +72,30 @@ class TaskService:
             owner_email=user.email,
             task_id=self.create_task_id(request.title, user.email),
         )
-        await self.repository.create_task(task)
-        await self._notify_observers(TaskServiceActions.task_created, task, None)
+        # Creating a task with a title the owner already used replaces it.
+        old_task = await self.repository.create_task(task)
+        await self._notify_observers(TaskServiceActions.task_created, task, old_task)
+        await self._touch_list_version(task.owner_email)
         return task
 
+    @traced
     async def update_task(
-        self, task_id: str, dto: TaskUpdateRequest, user: User
+        self,
+        task_id: str,
+        dto: TaskUpdateRequest,
+        user: User,
+        write_behind: bool = False,
     ) -> Optional[Task]:
+        """
+        With `write_behind` the update goes to the write buffer, when it is
+        enabled, and the returned task is stored when its window closes.
+        """
+        write_behind = write_behind and self.write_buffer and self.write_buffer.enabled
+        pending = await self.write_buffer.get(task_id) if self.write_buffer else None
 
-        old_task = await self.repository.get_task(task_id)
+        old_task = (
+            pending.old_task if pending else await self.repository.get_task(task_id)
+        )
 
         if not old_task:
             raise TaskNotFoundError(f"Task with id {task_id} not found")
@@ -62,42 +105,270 @@ class TaskService:
                 f"User {user.email} does not have permission to update task {task_id}"
             )
 
+        if pending and not write_behind:
+            # Only an authorized update may take over the acknowledged one.
+            pending = await self.write_buffer.take(task_id)
+            if not pending:
+                # Written meanwhile, take() waited for that write.
+                old_task = await self.repository.get_task(task_id)
+                if not old_task:
+                    raise TaskNotFoundError(f"Task with id {task_id} not found")
+
         update_data = dto.model_dump(exclude_unset=True)
         update_data["updated_at"] = datetime.now(ZoneInfo("Europe/Warsaw"))
 
-        task = old_task.model_copy(deep=True)
+        def apply_update(base: Task) -> Task:
+            task = base.model_copy(deep=True)
+            for key, value in update_data.items():
+                setattr(task, key, value)
+            return task
+
+        if write_behind:
+            return self.write_buffer.add(task_id, old_task, apply_update)
 
-        for key, value in update_data.items():
-            setattr(task, key, value)
+        task = apply_update(pending.task if pending else old_task)
+        await self.write_update(task, old_task)
+        return task
 
+    async def write_update(self, task: Task, old_task: Task) -> None:
         await self.repository.create_task(task)
 
         await self._notify_observers(TaskServiceActions.task_updated, task, old_task)
+        await self._touch_list_version(task.owner_email)
 
+    @traced
+    async def get_task(
+        self,
+        task_id: str,
+        fields: Optional[List[str]] = None,
+        include_archived: bool = False,
+    ) -> Optional[dict]:
+        # Updates buffered in this process are visible to its reads.
+        buffered = self.write_buffer.peek(task_id) if self.write_buffer else None
+        if buffered:
+            if fields:
+                return TaskPartial.model_validate(
+                    buffered.model_dump(include={*fields, *TASK_KEY_FIELDS})
+                )
+            return buffered
+        task = await self.repository.get_task(task_id, fields=fields)
+        if not task and include_archived:
+            task = await self.archive_repository.get_task(task_id, fields=fields)
         return task
 
-    async def get_task(self, task_id: str) -> Optional[dict]:
-        return await self.repository.get_task(task_id)
-
+    @traced
     async def delete_task(self, task_id: str) -> None:
-        await self.repository.delete_task(task_id)
+        if self.write_buffer:
+            await self.write_buffer.take(task_id)
+        repository = self.repository
+        task = await repository.get_task(task_id)
+        if not task and self.archive_repository:
+            repository = self.archive_repository
+            task = await repository.get_task(task_id)
+        await repository.delete_task(task_id)
+        if task:
+            await self._notify_observers(TaskServiceActions.task_deleted, task, None)
+            await self._touch_list_version(task.owner_email)
+
+    @traced
+    async def get_task_stats(self, user: User) -> TaskStats:
+        return await self.stats_repository.get_stats(user.email)
+
+    @traced
+    async def get_list_version(self, user: User) -> Optional[str]:
+        """
+        Changes whenever one of the user's tasks is written, None until the
+        first write recorded since the stats item was (re)created.
+        """
+        return await self.stats_repository.get_list_version(user.email)
 
+    async def _touch_list_version(self, owner_email: str) -> None:
+        if self.stats_repository:
+            await self.stats_repository.touch_list_version(owner_email)
+
+    @traced
     async def list_tasks(
         self,
         user: User,
         filter_strategy: Optional[TaskFilterStrategy] = None,
         sort_strategy: Optional[TaskSortStrategy] = None,
-    ) -> List[dict]:
-        tasks = await async_iterator_to_list(
-            self.repository.get_task_by_owner(user.email)
+        fields: Optional[List[str]] = None,
+        archive_page: Optional[DynamoPageRequest] = None,
+    ) -> Tuple[List[dict], Optional[dict]]:
+        """
+        With `archive_page` one page of the owner's archived tasks is listed
+        along with the tasks, or alone when it continues from a key. The key
+        to continue the archive from is returned, None after its last page.
+        """
+        if fields:
+            fields = [
+                *fields,
+                *(filter_strategy.required_fields if filter_strategy else ()),
+                *(sort_strategy.required_fields if sort_strategy else ()),
+            ]
+        tasks = []
+        if self._lists_tasks(archive_page):
+            if fields:
+                tasks = await async_iterator_to_list(
+                    self.repository.get_task_by_owner(user.email, fields=fields)
+                )
+            else:
+                tasks = await async_iterator_to_list(
+                    self.repository.get_task_records_by_owner(user.email)
+                )
+        archived, archive_cursor = await self._get_archived_items(
+            user, archive_page, fields
         )
+        if fields:
+            tasks += [TaskPartial.model_validate(item) for item in archived]
+        else:
+            tasks += [TaskRecord.from_item(item) for item in archived]
         if filter_strategy:
             tasks = filter_strategy.filter(tasks)
         if sort_strategy:
             tasks = sort_strategy.sort(tasks)
-        return tasks
+        if not fields:
+            tasks = [task.to_task() for task in tasks]
+        return tasks, archive_cursor
+
+    @traced
+    async def query_tasks(
+        self,
+        user: User,
+        query_strategy: TaskQueryStrategy,
+        fields: Optional[List[str]] = None,
+        archive_page: Optional[DynamoPageRequest] = None,
+    ) -> Tuple[List[Union[Task, TaskPartial]], Optional[dict]]:
+        """
+        list_tasks evaluated on the storage items' columns, only the selected
+        items are turned into tasks.
+        """
+        if fields:
+            fields = [*fields, *query_strategy.required_fields]
+        items = []
+        if self._lists_tasks(archive_page):
+            items = await async_iterator_to_list(
+                self.repository.get_task_items_by_owner(user.email, fields=fields)
+            )
+        archived, archive_cursor = await self._get_archived_items(
+            user, archive_page, fields
+        )
+        items += archived
+        indices = query_strategy.select(TaskColumns(items))
+        if fields:
+            tasks = [TaskPartial.model_validate(items[i]) for i in indices.tolist()]
+        else:
+            tasks = [TaskRecord.from_item(items[i]).to_task() for i in indices.tolist()]
+        return tasks, archive_cursor
+
+    def _lists_tasks(self, archive_page: Optional[DynamoPageRequest]) -> bool:
+        # Continued archive pages only list archived tasks.
+        return not (archive_page and archive_page.last_evaluated_key)
+
+    async def _get_archived_items(
+        self,
+        user: User,
+        archive_page: Optional[DynamoPageRequest],
+        fields: Optional[List[str]],
+    ) -> Tuple[List[dict], Optional[dict]]:
+        if not archive_page:
+            return [], None
+        page = await self.archive_repository.get_task_items_page_by_owner(
+            user.email, archive_page, fields=fields
+        )
+        return page.items, page.last_evaluated_key
+
+    @traced
+    async def search_tasks(
+        self,
+        user: User,
+        query: str,
+        limit: int = 20,
+        include_archived: bool = False,
+    ) -> List[Task]:
+        """
+        Tasks containing a token starting with every query term, best first.
+        A term scores the weight of its best matching token in the task,
+        doubled for an exact match.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        scores: Optional[Counter] = None
+        for term in terms:
+            term_scores = Counter()
+            async for token, task_id, weight in self.search_repository.get_postings(
+                user.email, term
+            ):
+                score = weight * 2 if token == term else weight
+                term_scores[task_id] = max(term_scores[task_id], score)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = Counter(
+                    {
+                        task_id: score + term_scores[task_id]
+                        for task_id, score in scores.items()
+                        if task_id in term_scores
+                    }
+                )
+            if not scores:
+                return []
+
+        ranked = sorted(scores, key=lambda task_id: (-scores[task_id], task_id))
+        tasks = []
+        # Postings of tasks archived or deleted outside TaskService linger,
+        # the next ranked tasks take the place of theirs.
+        for start in range(0, len(ranked), limit):
+            found = await asyncio.gather(
+                *(
+                    self.get_task(task_id, include_archived=include_archived)
+                    for task_id in ranked[start : start + limit]
+                )
+            )
+            tasks += [task for task in found if task and task.owner_email == user.email]
+            if len(tasks) >= limit:
+                break
+        return tasks[:limit]
+
+    @traced
+    async def get_task_changes(self, user: User, since: Optional[int]) -> TaskChanges:
+        now = datetime.now(ZoneInfo("Europe/Warsaw"))
+        cursor = str(to_epoch_ms(now))
+
+        if since is None or since < to_epoch_ms(
+            now - settings.TASK_TOMBSTONE_RETENTION
+        ):
+            records = await async_iterator_to_list(
+                self.repository.get_task_records_by_owner(user.email)
+            )
+            return TaskChanges(
+                tasks=[record.to_task() for record in records],
+                cursor=cursor,
+                full_resync=True,
+            )
+
+        since -= int(settings.TASK_SYNC_OVERLAP.total_seconds() * 1000)
+        records = await async_iterator_to_list(
+            self.repository.get_task_records_updated_since(user.email, since)
+        )
+        tombstones = await async_iterator_to_list(
+            self.tombstone_repository.get_tombstones_since(user.email, since)
+        )
+        # A task returned by the index exists now, even if it was deleted and
+        # recreated under the same id since the cursor.
+        alive = {record.task_id for record in records}
+        deleted = [t["task_id"] for t in tombstones if t["task_id"] not in alive]
+        return TaskChanges(
+            tasks=[record.to_task() for record in records],
+            deleted=list(dict.fromkeys(deleted)),
+            cursor=cursor,
+        )
 
+    @traced
     async def mark_task_completed(self, task_id: str) -> Optional[dict]:
+        if self.write_buffer:
+            await self.write_buffer.flush(task_id)
         old_task = await self.repository.get_task(task_id)
         if not old_task:
             return None
@@ -105,17 +376,23 @@ class TaskService:
             task_id,
             F("status").set("completed")
             & F("updated_at").set(
-                convert_datetime(datetime.now(ZoneInfo("Europe/Warsaw")))
+                to_storage_datetime(datetime.now(ZoneInfo("Europe/Warsaw")))
             ),
         )
         if task:
             await self._notify_observers(
                 TaskServiceActions.mark_task_completed, task, old_task
             )
+            await self._touch_list_version(task.owner_email)
         return task
 
     async def _notify_observers(
         self, action: TaskServiceActions, task: Task, old_task: Optional[Task]
     ) -> None:
         for obs in self.observers:
-            await obs.update(action, task, old_task)
+            observer = type(obs).__name__
+            with (
+                tracer.start_as_current_span(f"{observer}.update"),
+                OBSERVER_SECONDS.labels(observer, action.value).time(),
+            ):
+                await obs.update(action, task, old_task)
@@ -0,0 +1,112 @@
+"""
+Write-behind buffer coalescing rapid updates of the same task.
+
+Clients opt in per request with `Prefer: respond-async` (see the update
+route). The first buffered update of a task opens a window of
+TASK_WRITE_BEHIND_WINDOW; updates arriving within it are applied to the
+buffered task instead of the stored one, and when it closes the task is
+written once and observers are notified once, with the task as stored
+before the window as `old_task`.
+
+Durability: a buffered update is acknowledged (202) before it is written.
+It is written when the window closes or on graceful shutdown (`close()`),
+and lost if the process dies in between or the write fails, which is
+logged. The buffer is per process, reads served by other processes see
+the stored task until the window closes. Completing or deleting a task and
+synchronous updates write or drop its buffered update first.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from app.metrics import TASK_UPDATES_COALESCED
+from app.schemas.task import Task
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingUpdate:
+    old_task: Task
+    task: Task
+    updates: int
+    timer: asyncio.TimerHandle
+
+
+class TaskWriteBuffer:
+    def __init__(self, window: float, write: Callable[[Task, Task], Awaitable[None]]):
+        """`write(task, old_task)` stores a task and notifies its observers."""
+        self.window = window
+        self.write = write
+        self.pending: dict[str, PendingUpdate] = {}
+        self.flushing: dict[str, asyncio.Task] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def peek(self, task_id: str) -> Optional[Task]:
+        pending = self.pending.get(task_id)
+        return pending.task if pending else None
+
+    async def get(self, task_id: str) -> Optional[PendingUpdate]:
+        await self._wait_flushing(task_id)
+        return self.pending.get(task_id)
+
+    def add(self, task_id: str, old_task: Task, update: Callable[[Task], Task]) -> Task:
+        """Applies `update` to the buffered task, or to `old_task` if none."""
+        pending = self.pending.get(task_id)
+        if pending:
+            pending.task = update(pending.task)
+            pending.updates += 1
+            return pending.task
+        timer = asyncio.get_running_loop().call_later(
+            self.window, self._start_flush, task_id
+        )
+        pending = PendingUpdate(old_task, update(old_task), 1, timer)
+        self.pending[task_id] = pending
+        return pending.task
+
+    async def take(self, task_id: str) -> Optional[PendingUpdate]:
+        """Removes the buffered update without writing it."""
+        await self._wait_flushing(task_id)
+        pending = self.pending.pop(task_id, None)
+        if pending:
+            pending.timer.cancel()
+        return pending
+
+    async def flush(self, task_id: str) -> None:
+        pending = await self.take(task_id)
+        if pending:
+            await self._write(task_id, pending)
+
+    async def close(self) -> None:
+        await asyncio.gather(
+            *(self.flush(task_id) for task_id in list(self.pending)),
+            *self.flushing.values(),
+        )
+
+    async def _wait_flushing(self, task_id: str) -> None:
+        flushing = self.flushing.get(task_id)
+        if flushing:
+            await asyncio.shield(flushing)
+
+    def _start_flush(self, task_id: str) -> None:
+        pending = self.pending.pop(task_id, None)
+        if not pending:
+            return
+        flushing = asyncio.create_task(self._write(task_id, pending))
+        self.flushing[task_id] = flushing
+        flushing.add_done_callback(lambda _: self.flushing.pop(task_id, None))
+
+    async def _write(self, task_id: str, pending: PendingUpdate) -> None:
+        try:
+            await self.write(pending.task, pending.old_task)
+        except Exception:
+            logger.exception(
+                f"Lost {pending.updates} buffered updates of task {task_id}"
+            )
+            return
+        TASK_UPDATES_COALESCED.inc(pending.updates - 1)
@@ -1,4 +1,5 @@
 import uuid
+import asyncio
 import logging
 from authx import AuthX
 from typing import Optional, List
@@ -8,14 +9,22 @@ from aiodynamo.expressions import UpdateExpression, F
 
 from app.schemas.user import UserCreate, UserUpdate, User
 from app.repositories.user_repository import UserRepository
+from app.services.login_prefetch import LoginPrefetcher
+from app.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
 class UserService:
-    def __init__(self, repository: UserRepository, security: AuthX):
+    def __init__(
+        self,
+        repository: UserRepository,
+        security: AuthX,
+        prefetcher: Optional[LoginPrefetcher] = None,
+    ):
         self.repository = repository
         self.security = security
+        self.prefetcher = prefetcher
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
@@ -27,6 +36,7 @@ class UserService:
     def generate_uid(self) -> str:
         return str(uuid.uuid4())
 
+    @traced
     async def create_user(self, user_create_request: UserCreate) -> User:
         user = User(
             **user_create_request.model_dump(exclude={"password"}),
@@ -36,12 +46,24 @@ class UserService:
 
         return await self.repository.create_user(user)
 
+    @traced
     async def authenticate_user(self, email: str, password: str) -> tuple[str, str]:
         user = await self.repository.get_user(email)
-        if not user or not self.verify_password(password, user.password):
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
+            )
+
+        # The task list loads while bcrypt runs off the event loop.
+        prefetch = self.prefetcher.start(user) if self.prefetcher else None
+        if not await asyncio.to_thread(self.verify_password, password, user.password):
+            if prefetch:
+                prefetch.cancel()
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
             )
+        if self.prefetcher:
+            self.prefetcher.put_user(user)
 
         access_token = self.security.create_access_token(
             uid=user.email, data={"roles": user.roles}
@@ -49,12 +71,14 @@ class UserService:
         refresh_token = self.security.create_refresh_token(uid=user.email)
         return access_token, refresh_token
 
+    @traced
     async def get_user(self, email: str) -> Optional[User]:
         user = await self.repository.get_user(email)
         if not user:
             raise Exception(f"User with email {email} not found")
         return user
 
+    @traced
     async def update_user(self, email: str, user_update: UserUpdate) -> Optional[User]:
         updates = {
             k: v
@@ -66,12 +90,17 @@ class UserService:
             update_expression += F(key).set(value)
 
         updated_user = await self.repository.update_user(email, update_expression)
+        if self.prefetcher:
+            self.prefetcher.forget_user(email)
         if not updated_user:
             raise Exception(f"User with email {email} not found")
         return User.model_validate(updated_user)
 
+    @traced
     async def delete_user(self, email: str) -> None:
         user = await self.repository.get_user(email)
         if not user:
             raise Exception(f"User with email {email} not found")
         await self.repository.delete_user(email)
+        if self.prefetcher:
+            self.prefetcher.forget_user(email)
@@ -1,25 +1,51 @@
 import os
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
+from contextlib import asynccontextmanager
 
+from app import settings
+from app.schemas.task import Task
+from app.schemas.user import User
 from app.settings import security
 from app.services.user_service import UserService
 from app.services.task_service import TaskService
-from app.repositories.factories import task_repository_factory, user_repository_factory
+from app.services.task_events import task_event_broker
+from app.services.task_write_buffer import TaskWriteBuffer
+from app.services.login_prefetch import LoginPrefetcher
+from app.repositories.factories import (
+    task_archive_repository_factory,
+    task_repository_factory,
+    task_search_repository_factory,
+    task_stats_repository_factory,
+    task_tombstone_repository_factory,
+    user_repository_factory,
+)
 from app.observers.task_observers import (
     OverdueNotifier,
     ChangeHistoryObserver,
     SlackNotifier,
     PriorityEscalationNotifier,
+    TaskEventsObserver,
+    TaskSearchObserver,
+    TaskStatsObserver,
+    TaskTombstoneObserver,
 )
 
 
 async def get_user_service() -> AsyncGenerator[UserService, None]:
     async with user_repository_factory() as repo:
-        yield UserService(repository=repo, security=security)
+        yield UserService(
+            repository=repo, security=security, prefetcher=login_prefetcher
+        )
 
 
 async def get_task_service() -> AsyncGenerator[TaskService, None]:
-    async with task_repository_factory() as repo:
+    async with (
+        task_repository_factory() as repo,
+        task_stats_repository_factory() as stats_repo,
+        task_tombstone_repository_factory() as tombstone_repo,
+        task_archive_repository_factory() as archive_repo,
+        task_search_repository_factory() as search_repo,
+    ):
         slack_notifier = SlackNotifier(
             webhook_url=os.getenv("SLACK_WEBHOOK_URL", "http://localhost:8080")
         )
@@ -28,6 +54,47 @@ async def get_task_service() -> AsyncGenerator[TaskService, None]:
             ChangeHistoryObserver(),
             slack_notifier,
             PriorityEscalationNotifier(slack_notifier=slack_notifier),
+            TaskStatsObserver(stats_repository=stats_repo),
+            TaskTombstoneObserver(tombstone_repository=tombstone_repo),
+            TaskEventsObserver(broker=task_event_broker),
+            TaskSearchObserver(search_repository=search_repo),
         ]
 
-        yield TaskService(repository=repo, observers=observers)
+        yield TaskService(
+            repository=repo,
+            observers=observers,
+            stats_repository=stats_repo,
+            tombstone_repository=tombstone_repo,
+            archive_repository=archive_repo,
+            search_repository=search_repo,
+            write_buffer=task_write_buffer,
+        )
+
+
+async def write_buffered_update(task: Task, old_task: Task) -> None:
+    # Runs after the request that buffered the update has finished.
+    async with asynccontextmanager(get_task_service)() as service:
+        await service.write_update(task, old_task)
+
+
+task_write_buffer = TaskWriteBuffer(
+    settings.TASK_WRITE_BEHIND_WINDOW, write_buffered_update
+)
+
+
+async def prefetch_task_list(user: User) -> tuple[Optional[str], list[Task]]:
+    # The version is read first, as list_tasks does for its ETag.
+    async with asynccontextmanager(get_task_service)() as service:
+        version = await service.get_list_version(user)
+        tasks, _ = await service.list_tasks(user)
+        return version, tasks
+
+
+login_prefetcher = LoginPrefetcher(
+    prefetch_task_list,
+    concurrency=settings.LOGIN_PREFETCH_CONCURRENCY,
+    timeout=settings.LOGIN_PREFETCH_TIMEOUT,
+    ttl=settings.LOGIN_PREFETCH_TTL,
+    max_users=settings.LOGIN_PREFETCH_MAX_USERS,
+    max_tasks=settings.LOGIN_PREFETCH_MAX_TASKS,
+)
@@ -1,5 +1,7 @@
 import os
+import json
 from datetime import timedelta
+from zoneinfo import ZoneInfo
 from authx import AuthX, AuthXConfig
 from fastapi.security import HTTPBearer
 from app.schemas.user import User, UserPermission
@@ -7,8 +9,122 @@ from app.schemas.user import User, UserPermission
 TABLE_ARNS = {
     "tasks": os.environ.get("TASKS_TABLE_NAME", "tasks"),
     "users": os.environ.get("USERS_TABLE_NAME", "users"),
+    "task_stats": os.environ.get("TASK_STATS_TABLE_NAME", "task_stats"),
+    "task_tombstones": os.environ.get("TASK_TOMBSTONES_TABLE_NAME", "task_tombstones"),
+    "tasks_archive": os.environ.get("TASKS_ARCHIVE_TABLE_NAME", "tasks_archive"),
+    "task_search": os.environ.get("TASK_SEARCH_TABLE_NAME", "task_search"),
 }
 
+# "aws" talks to DynamoDB, or DynamoDB Local through DYNAMO_ENDPOINT_URL.
+# "memory" keeps every table in process, see app.clients.memory_dynamo.
+DYNAMO_BACKEND = os.getenv("DYNAMO_BACKEND", "aws")
+# Latency and throttling added by the memory backend, a name from
+# app.clients.memory_dynamo.LATENCY_PROFILES.
+DYNAMO_LATENCY_PROFILE = os.getenv("DYNAMO_LATENCY_PROFILE", "none")
+
+# "epoch_ms" stores task datetimes as numbers, "string" keeps the legacy naive
+# "%Y-%m-%d %H:%M:%S.%f" strings while old readers are still deployed.
+# Reads always accept both.
+TASK_TIMESTAMP_FORMAT = os.getenv("TASK_TIMESTAMP_FORMAT", "epoch_ms")
+TIMEZONE = ZoneInfo("Europe/Warsaw")
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/1")
+# Events buffered per connected client before it is told to resync.
+TASK_EVENTS_BUFFER_SIZE = int(os.getenv("TASK_EVENTS_BUFFER_SIZE", "100"))
+TASK_EVENTS_HEARTBEAT_SECONDS = 15
+
+# Responses of requests sent with an Idempotency-Key header are replayed
+# for retries with the same key within this window.
+IDEMPOTENCY_KEY_TTL = timedelta(hours=int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24")))
+
+# A key claimed by a request that never completed, e.g. its process died,
+# is free again after this long.
+IDEMPOTENCY_LOCK_TTL = timedelta(
+    seconds=int(os.getenv("IDEMPOTENCY_LOCK_TTL_SECONDS", "60"))
+)
+
+# Deleted tasks are reported to syncing clients for this long. Clients whose
+# cursor is older get a full resync.
+TASK_TOMBSTONE_RETENTION = timedelta(
+    days=int(os.getenv("TASK_TOMBSTONE_RETENTION_DAYS", "30"))
+)
+# Changes are re-read this far behind the cursor to cover index replication lag.
+TASK_SYNC_OVERLAP = timedelta(seconds=5)
+
+# Completed and cancelled tasks not updated for this long are moved to the
+# archive table by app.jobs.task_archival.
+TASK_ARCHIVE_AFTER = timedelta(days=int(os.getenv("TASK_ARCHIVE_AFTER_DAYS", "30")))
+# Archived tasks listed with include_archived per request, the rest are
+# listed with the returned X-Archive-Cursor.
+TASK_ARCHIVE_PAGE_SIZE = int(os.getenv("TASK_ARCHIVE_PAGE_SIZE", "100"))
+
+# Owners whose tasks are spread over several index partitions, for example
+# '{"service@example.com": 16}'. Everyone else has a single shard. Shard
+# counts may only grow, reads query shards 0..N-1.
+TASK_OWNER_SHARDS: dict[str, int] = json.loads(os.getenv("TASK_OWNER_SHARDS", "{}"))
+# Read through the owner_shard indexes. Enable once they exist and
+# app.migrations.task_owner_shards has backfilled every item.
+TASK_SHARDED_READS = os.getenv("TASK_SHARDED_READS", "false").lower() == "true"
+
+# Updates sent with "Prefer: respond-async" to the same task within this
+# window are written once, see app.services.task_write_buffer. 0 disables it.
+TASK_WRITE_BEHIND_WINDOW = float(os.getenv("TASK_WRITE_BEHIND_WINDOW_MS", "0")) / 1000
+
+# Logins prefetch the user and their task list for the requests that follow,
+# see app.services.login_prefetch. A concurrency of 0 disables it.
+LOGIN_PREFETCH_CONCURRENCY = int(os.getenv("LOGIN_PREFETCH_CONCURRENCY", "8"))
+LOGIN_PREFETCH_TIMEOUT = float(os.getenv("LOGIN_PREFETCH_TIMEOUT_MS", "2000")) / 1000
+LOGIN_PREFETCH_TTL = float(os.getenv("LOGIN_PREFETCH_TTL_SECONDS", "10"))
+LOGIN_PREFETCH_MAX_USERS = int(os.getenv("LOGIN_PREFETCH_MAX_USERS", "1000"))
+LOGIN_PREFETCH_MAX_TASKS = int(os.getenv("LOGIN_PREFETCH_MAX_TASKS", "1000"))
+
+# Coroutines of I/O-bound Celery tasks running at once per worker process,
+# and how long shutdown waits for them, see app.celery.async_runtime.
+CELERY_ASYNC_CONCURRENCY = int(os.getenv("CELERY_ASYNC_CONCURRENCY", "256"))
+CELERY_ASYNC_SHUTDOWN_TIMEOUT = float(
+    os.getenv("CELERY_ASYNC_SHUTDOWN_TIMEOUT_SECONDS", "30")
+)
+
+# Port of the Celery worker's Prometheus metrics endpoint.
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "9808"))
+
+# "file" appends spans as JSON lines to TRACING_FILE, "otlp" sends them to
+# the collector at TRACING_OTLP_ENDPOINT, "none" disables tracing.
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_OTLP_ENDPOINT = os.getenv(
+    "TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"
+)
+
+# Requests are profiled when an admin sends the X-Profile header, and this
+# share of all requests is sampled. See app.profiling.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL_MS", "5")) / 1000
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/profiles")
+PROFILE_MAX_COUNT = int(os.getenv("PROFILE_MAX_COUNT", "50"))
+PROFILE_MAX_BYTES = int(os.getenv("PROFILE_MAX_MB", "50")) * 1024 * 1024
+
+# Requests running at once, requests waiting for a slot and the longest wait
+# in seconds per route class, see app.admission. Overridden per class with
+# e.g. '{"auth": {"concurrency": 2}}'. Opt-in, requests past the limits get
+# 503 with Retry-After.
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "false").lower() == "true"
+_admission_overrides = json.loads(os.getenv("ADMISSION_LIMITS", "{}"))
+# Logins hash passwords in asyncio.to_thread, as many at once as the default
+# executor has threads.
+_auth_threads = min(32, (os.cpu_count() or 1) + 4)
+ADMISSION_LIMITS = {
+    "auth": {
+        "concurrency": _auth_threads,
+        "queue_size": _auth_threads * 4,
+        "deadline": 5.0,
+    },
+    "reads": {"concurrency": 64, "queue_size": 256, "deadline": 2.0},
+    "writes": {"concurrency": 32, "queue_size": 128, "deadline": 5.0},
+}
+for _route_class, _limits in _admission_overrides.items():
+    ADMISSION_LIMITS[_route_class].update(_limits)
+
 auth_config = AuthXConfig(
     JWT_SECRET_KEY=os.getenv("JWT_SECRET_TOKEN", "changeme"),
     JWT_TOKEN_LOCATION=["cookies", "headers"],
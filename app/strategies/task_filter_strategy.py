@@ -2,16 +2,21 @@ from abc import ABC, abstractmethod
 from typing import List, Optional
 from datetime import datetime
 
+from app import settings
 from app.schemas.task import Task
 
 
 class TaskFilterStrategy(ABC):
+    required_fields: tuple[str, ...] = ()
+
     @abstractmethod
     def filter(self, tasks: List[Task]) -> List[Task]:
         pass
 
 
 class StatusFilterStrategy(TaskFilterStrategy):
+    required_fields = ("status",)
+
     def __init__(self, status: str):
         self.status = status
 
@@ -20,7 +25,11 @@ class StatusFilterStrategy(TaskFilterStrategy):
 
 
 class DueDateFilterStrategy(TaskFilterStrategy):
+    required_fields = ("due_date",)
+
     def __init__(self, due_before: datetime):
+        if not due_before.tzinfo:
+            due_before = due_before.replace(tzinfo=settings.TIMEZONE)
         self.due_before = due_before
 
     def filter(self, tasks: List[Task]) -> List[Task]:
@@ -30,6 +39,9 @@ class DueDateFilterStrategy(TaskFilterStrategy):
 class CompositeFilterStrategy(TaskFilterStrategy):
     def __init__(self, strategies: List[TaskFilterStrategy]):
         self.strategies = strategies
+        self.required_fields = tuple(
+            field for strategy in strategies for field in strategy.required_fields
+        )
 
     def filter(self, tasks: List[Task]) -> List[Task]:
         for strategy in self.strategies:
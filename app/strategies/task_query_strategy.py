@@ -0,0 +1,213 @@
+"""
+Filter and sort expressions evaluated on a columnar copy of a task batch.
+
+    q=status:pending priority>=3 due<2026-12-01
+    sort=-priority,created_at
+
+Terms of `q` are ANDed, `status` takes a comma-separated list of statuses,
+dates are ISO dates or datetimes in the application timezone when naive.
+`sort` fields are applied in order, a leading "-" sorts descending.
+
+Status codes, priorities and epoch millisecond timestamps are read from the
+storage items into NumPy arrays, the filter is a single boolean mask and
+the ordering a single stable lexsort, so only the selected rows have to be
+turned into tasks.
+"""
+
+import re
+import operator
+from operator import itemgetter
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from app import settings
+from app.schemas.task import TaskStatuses, parse_datetime, to_epoch_ms
+
+
+class TaskQueryError(ValueError): ...
+
+
+FIELD_ALIASES = {
+    "status": "status",
+    "priority": "priority",
+    "due": "due_date",
+    "due_date": "due_date",
+    "created": "created_at",
+    "created_at": "created_at",
+    "updated": "updated_at",
+    "updated_at": "updated_at",
+}
+DATETIME_FIELDS = ("due_date", "created_at", "updated_at")
+
+OPERATORS = {
+    ":": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+TERM = re.compile(r"^(\w+)(!=|>=|<=|:|=|>|<)(.+)$")
+
+STATUS_CODES = {status.value: code for code, status in enumerate(TaskStatuses)}
+
+
+def _epoch_ms(value) -> int:
+    # Legacy items keep naive timestamp strings, current ones epoch millis.
+    if isinstance(value, str):
+        return to_epoch_ms(parse_datetime(value))
+    return int(value)
+
+
+COLUMN_READERS = {
+    "status": (np.int8, lambda item: STATUS_CODES[item.get("status", "pending")]),
+    "priority": (np.int16, lambda item: int(item.get("priority", 1))),
+    **{
+        field: (np.int64, lambda item, field=field: _epoch_ms(item[field]))
+        for field in DATETIME_FIELDS
+    },
+}
+
+
+class TaskColumns:
+    """Columns of a batch of storage items, each read on first use."""
+
+    def __init__(self, items: list[dict]):
+        self.items = items
+        self._columns: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        column = self._columns.get(field)
+        if column is None:
+            column = self._columns[field] = self._read(field)
+        return column
+
+    def _read(self, field: str) -> np.ndarray:
+        dtype, read = COLUMN_READERS[field]
+        count = len(self.items)
+        if field != "status":
+            # Numbers, Decimals included, convert without a Python call per
+            # item. Legacy strings and missing attributes take the slow path.
+            try:
+                return np.fromiter(
+                    map(itemgetter(field), self.items), dtype=dtype, count=count
+                )
+            except (KeyError, TypeError, ValueError):
+                pass
+        return np.fromiter(map(read, self.items), dtype=dtype, count=count)
+
+
+class TaskQueryStrategy:
+    def __init__(
+        self,
+        conditions: list[tuple[str, str, object]],
+        sort_keys: list[tuple[str, bool]],
+    ):
+        self.conditions = conditions
+        self.sort_keys = sort_keys
+        self.required_fields = tuple(
+            dict.fromkeys(
+                [field for field, _, _ in conditions]
+                + [field for field, _ in sort_keys]
+            )
+        )
+
+    def mask(self, columns: TaskColumns) -> Optional[np.ndarray]:
+        mask = None
+        for field, op, value in self.conditions:
+            if isinstance(value, tuple):
+                matched = np.isin(columns[field], value)
+                if op == "!=":
+                    matched = ~matched
+            else:
+                matched = OPERATORS[op](columns[field], value)
+            mask = matched if mask is None else mask & matched
+        return mask
+
+    def select(self, columns: TaskColumns) -> np.ndarray:
+        """Indices of the matching items in the requested order."""
+        mask = self.mask(columns)
+        indices = np.arange(len(columns)) if mask is None else np.flatnonzero(mask)
+        if not self.sort_keys or not len(indices):
+            return indices
+        # lexsort takes the primary key last.
+        keys = []
+        for field, descending in reversed(self.sort_keys):
+            key = columns[field][indices].astype(np.int64)
+            keys.append(-key if descending else key)
+        return indices[np.lexsort(keys)]
+
+
+def _parse_value(field: str, op: str, raw: str):
+    if field == "status":
+        if op not in (":", "=", "!="):
+            raise TaskQueryError(f"Invalid operator for status: {op}")
+        statuses = raw.split(",")
+        unknown = [status for status in statuses if status not in STATUS_CODES]
+        if unknown:
+            raise TaskQueryError(f"Unknown task status: {', '.join(unknown)}")
+        return tuple(STATUS_CODES[status] for status in statuses)
+    if field == "priority":
+        try:
+            return int(raw)
+        except ValueError:
+            raise TaskQueryError(f"Invalid priority: {raw}")
+    try:
+        value = datetime.fromisoformat(raw)
+    except ValueError:
+        raise TaskQueryError(f"Invalid date for {field}: {raw}")
+    if not value.tzinfo:
+        value = value.replace(tzinfo=settings.TIMEZONE)
+    return to_epoch_ms(value)
+
+
+def parse_conditions(q: Optional[str]) -> list[tuple[str, str, object]]:
+    conditions = []
+    for term in (q or "").split():
+        match = TERM.match(term)
+        if not match or match.group(1) not in FIELD_ALIASES:
+            raise TaskQueryError(f"Invalid query term: {term}")
+        name, op, raw = match.groups()
+        field = FIELD_ALIASES[name]
+        conditions.append((field, op, _parse_value(field, op, raw)))
+    return conditions
+
+
+def parse_sort_keys(sort: Optional[str]) -> list[tuple[str, bool]]:
+    sort_keys = []
+    for key in (sort or "").split(","):
+        key = key.strip()
+        if not key:
+            continue
+        descending = key.startswith("-")
+        name = key.lstrip("-+")
+        if name not in FIELD_ALIASES or name == "status":
+            raise TaskQueryError(f"Invalid sort field: {name}")
+        sort_keys.append((FIELD_ALIASES[name], descending))
+    return sort_keys
+
+
+def get_query_strategy(
+    q: Optional[str] = None,
+    sort: Optional[str] = None,
+    status: Optional[str] = None,
+    due_before: Optional[datetime] = None,
+) -> TaskQueryStrategy:
+    """
+    Builds the strategy from the `q` and `sort` expressions. The `status` and
+    `due_before` filters of list_tasks are added to the conditions.
+    """
+    conditions = parse_conditions(q)
+    if status:
+        conditions.append(("status", ":", (STATUS_CODES[status],)))
+    if due_before:
+        if not due_before.tzinfo:
+            due_before = due_before.replace(tzinfo=settings.TIMEZONE)
+        conditions.append(("due_date", "<=", to_epoch_ms(due_before)))
+    return TaskQueryStrategy(conditions, parse_sort_keys(sort))
@@ -5,17 +5,23 @@ from app.schemas.task import Task
 
 
 class TaskSortStrategy(ABC):
+    required_fields: tuple[str, ...] = ()
+
     @abstractmethod
     def sort(self, tasks: List[Task]) -> List[Task]:
         pass
 
 
 class SortByCreatedAtStrategy(TaskSortStrategy):
+    required_fields = ("created_at",)
+
     def sort(self, tasks: List[Task]) -> List[Task]:
         return sorted(tasks, key=lambda t: t.created_at)
 
 
 class SortByPriorityStrategy(TaskSortStrategy):
+    required_fields = ("priority",)
+
     def sort(self, tasks: List[Task]) -> List[Task]:
         return sorted(tasks, key=lambda t: t.priority)
 
@@ -23,6 +29,9 @@ class SortByPriorityStrategy(TaskSortStrategy):
 class CompositeSortStrategy(TaskSortStrategy):
     def __init__(self, strategies: List[TaskSortStrategy]):
         self.strategies = strategies
+        self.required_fields = tuple(
+            field for strategy in strategies for field in strategy.required_fields
+        )
 
     def sort(self, tasks: List[Task]) -> List[Task]:
         for strategy in reversed(self.strategies):
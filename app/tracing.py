@@ -0,0 +1,87 @@
+"""
+OpenTelemetry tracing of the API and the Celery worker.
+
+Enabled with TRACING_EXPORTER: "file" appends spans as JSON lines to
+TRACING_FILE, "otlp" sends them to a collector at TRACING_OTLP_ENDPOINT.
+Routes, TaskService, repositories and DynamoDBClient calls get spans, and
+the trace context travels in Celery message headers to the worker.
+"""
+
+import inspect
+from functools import wraps
+
+from fastapi import FastAPI
+from opentelemetry import trace
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+from app import settings
+
+tracer = trace.get_tracer("app")
+
+
+def configure_tracing(service_name: str) -> bool:
+    """Installs the exporter and instruments Celery. Returns False if disabled."""
+    if settings.TRACING_EXPORTER == "file":
+        exporter = ConsoleSpanExporter(
+            service_name=service_name,
+            out=open(settings.TRACING_FILE, "a"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    elif settings.TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        exporter = OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    else:
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    # Loads Celery, only needed once tracing is enabled.
+    from opentelemetry.instrumentation.celery import CeleryInstrumentor
+
+    CeleryInstrumentor().instrument()
+    return True
+
+
+def instrument_app(app: FastAPI) -> None:
+    if configure_tracing("task-api"):
+        FastAPIInstrumentor.instrument_app(
+            app, excluded_urls="metrics", exclude_spans=["receive", "send"]
+        )
+
+
+def traced(func):
+    """
+    Records a span named after the class and method. Async generators get a
+    span covering the whole iteration that is not made current, context
+    cannot be kept across their yields.
+    """
+    if inspect.isasyncgenfunction(func):
+
+        @wraps(func)
+        async def generator_wrapper(self, *args, **kwargs):
+            span = tracer.start_span(f"{type(self).__name__}.{func.__name__}")
+            try:
+                async for item in func(self, *args, **kwargs):
+                    yield item
+            except Exception as e:
+                span.record_exception(e)
+                span.set_status(trace.StatusCode.ERROR)
+                raise
+            finally:
+                span.end()
+
+        return generator_wrapper
+
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        with tracer.start_as_current_span(f"{type(self).__name__}.{func.__name__}"):
+            return await func(self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,146 @@
+"""
+AdmissionQueue admits requests up to its concurrency, queues the rest in
+arrival order and sheds them with 503 and Retry-After when the queue is
+full, the expected wait is past the deadline, or the deadline passed.
+
+    python -m unittest discover tests
+"""
+
+import asyncio
+import unittest
+
+import httpx
+from starlette.responses import PlainTextResponse
+
+from app.admission import AdmissionControlMiddleware, AdmissionQueue, RequestShed
+
+DEADLINE = 0.05
+
+
+def make_app(finish: asyncio.Event):
+    async def app(scope, receive, send):
+        await finish.wait()
+        await PlainTextResponse("done")(scope, receive, send)
+
+    return app
+
+
+class AdmissionQueueTest(unittest.IsolatedAsyncioTestCase):
+    def make_queue(self, **limits) -> AdmissionQueue:
+        limits = {"concurrency": 1, "queue_size": 2, "deadline": DEADLINE, **limits}
+        return AdmissionQueue("reads", **limits)
+
+    async def test_waiters_are_admitted_in_order(self):
+        queue = self.make_queue(deadline=1.0)
+        await queue.acquire()
+        admitted = []
+
+        async def wait(name: str):
+            await queue.acquire()
+            admitted.append(name)
+
+        waiters = [asyncio.create_task(wait(name)) for name in ("first", "second")]
+        await asyncio.sleep(0)
+        self.assertEqual((queue.active, len(queue.waiters)), (1, 2))
+
+        queue.release(None)
+        await asyncio.sleep(0.01)
+        self.assertEqual(admitted, ["first"])
+        queue.release(None)
+        await asyncio.gather(*waiters)
+        self.assertEqual(admitted, ["first", "second"])
+        self.assertEqual((queue.active, len(queue.waiters)), (1, 0))
+
+    async def test_full_queue_is_shed(self):
+        queue = self.make_queue(queue_size=1)
+        await queue.acquire()
+        waiter = asyncio.create_task(queue.acquire())
+        await asyncio.sleep(0)
+
+        with self.assertRaises(RequestShed) as raised:
+            await queue.acquire()
+        self.assertEqual(raised.exception.reason, "queue_full")
+        self.assertEqual(raised.exception.retry_after, DEADLINE)
+        queue.release(None)
+        await waiter
+
+    async def test_expected_wait_past_the_deadline_is_shed(self):
+        queue = self.make_queue()
+        await queue.acquire()
+        queue.release(DEADLINE * 2)
+        await queue.acquire()
+
+        with self.assertRaises(RequestShed) as raised:
+            await queue.acquire()
+        self.assertEqual(raised.exception.reason, "deadline")
+        self.assertEqual(raised.exception.retry_after, DEADLINE * 2)
+        self.assertEqual(len(queue.waiters), 0)
+
+    async def test_deadline_passed_in_the_queue_is_shed(self):
+        queue = self.make_queue()
+        await queue.acquire()
+
+        with self.assertRaises(RequestShed) as raised:
+            await queue.acquire()
+        self.assertEqual(raised.exception.reason, "timeout")
+        self.assertEqual(len(queue.waiters), 0)
+
+        # The request shed in the queue holds no slot.
+        queue.release(None)
+        self.assertEqual(queue.active, 0)
+
+    async def test_cancelled_waiter_passes_its_slot_on(self):
+        queue = self.make_queue(deadline=1.0)
+        await queue.acquire()
+        cancelled = asyncio.create_task(queue.acquire())
+        waiter = asyncio.create_task(queue.acquire())
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        queue.release(None)
+        await waiter
+        self.assertEqual((queue.active, len(queue.waiters)), (1, 0))
+
+
+class AdmissionControlMiddlewareTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.finish = asyncio.Event()
+        limits = {"concurrency": 1, "queue_size": 0, "deadline": DEADLINE}
+        app = AdmissionControlMiddleware(
+            make_app(self.finish), {"auth": limits, "reads": limits, "writes": limits}
+        )
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_overload_gets_503(self):
+        running = asyncio.create_task(self.client.get("/tasks"))
+        await asyncio.sleep(0.01)
+
+        response = await self.client.get("/tasks")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        # Writes have their own limits.
+        writing = asyncio.create_task(self.client.post("/tasks"))
+        await asyncio.sleep(0.01)
+        self.finish.set()
+        self.assertEqual((await writing).status_code, 200)
+        self.assertEqual((await running).status_code, 200)
+
+    async def test_streams_are_exempt(self):
+        running = asyncio.create_task(self.client.get("/tasks"))
+        await asyncio.sleep(0.01)
+        streaming = asyncio.create_task(self.client.get("/tasks/events"))
+        await asyncio.sleep(0.01)
+        self.finish.set()
+
+        self.assertEqual((await streaming).status_code, 200)
+        self.assertEqual((await running).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Requests with an Idempotency-Key run once: retries replay the stored
+response, retries during the first run get 409, reuse of the key with
+another body 422, and failed requests may be retried.
+
+    python -m unittest discover tests
+
+Redis is replaced by a dict, no server is needed.
+"""
+
+import asyncio
+import unittest
+from typing import Optional
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Response
+
+from app import settings
+from app.services.idempotency import (
+    IN_PROGRESS,
+    IdempotentRequest,
+    get_idempotent_request,
+    idempotency_store,
+)
+
+
+class Redis:
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key: str, value: str, nx: bool = False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.values.get(key)
+
+    async def delete(self, key: str) -> None:
+        self.values.pop(key, None)
+
+
+def make_app(calls: list, running: asyncio.Event, finish: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/orders", status_code=201)
+    async def create_order(
+        order: dict,
+        response: Response,
+        idempotency: IdempotentRequest = Depends(get_idempotent_request),
+    ):
+        if idempotency.response:
+            return idempotency.response
+        calls.append(order)
+        if order.get("wait"):
+            running.set()
+            await finish.wait()
+        if order.get("fail"):
+            raise HTTPException(status_code=500, detail="Failed")
+        headers = {"Location": f"/orders/{len(calls)}"}
+        response.headers.update(headers)
+        return await idempotency.save(
+            {"order": len(calls)}, status_code=201, headers=headers
+        )
+
+    return app
+
+
+def authorization(email: str) -> dict:
+    token = settings.security.create_access_token(uid=email)
+    return {"Authorization": f"Bearer {token}"}
+
+
+class IdempotentRequestTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = idempotency_store.redis
+        idempotency_store.redis = Redis()
+        self.calls = []
+        self.running = asyncio.Event()
+        self.finish = asyncio.Event()
+        app = make_app(self.calls, self.running, self.finish)
+        transport = httpx.ASGITransport(app=app)
+        self.client = httpx.AsyncClient(transport=transport, base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        idempotency_store.redis = self.redis
+
+    async def post(self, order: dict, key: Optional[str] = "key", headers=None):
+        headers = {**(headers or {}), **({"Idempotency-Key": key} if key else {})}
+        return await self.client.post("/orders", json=order, headers=headers)
+
+    async def test_retry_replays_the_response(self):
+        first = await self.post({"item": "a"})
+        retry = await self.post({"item": "a"})
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual((first.status_code, first.json()), (201, {"order": 1}))
+        self.assertEqual((retry.status_code, retry.json()), (201, {"order": 1}))
+        self.assertNotIn("Idempotent-Replayed", first.headers)
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.headers["Location"], first.headers["Location"])
+
+    async def test_without_key_every_request_runs(self):
+        await self.post({"item": "a"}, key=None)
+        await self.post({"item": "a"}, key=None)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(idempotency_store.redis.values, {})
+
+    async def test_other_body_is_rejected(self):
+        await self.post({"item": "a"})
+        response = await self.post({"item": "b"})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(len(self.calls), 1)
+
+    async def test_retry_in_progress_is_rejected(self):
+        first = asyncio.create_task(self.post({"item": "a", "wait": True}))
+        await self.running.wait()
+        retry = await self.post({"item": "a", "wait": True})
+        self.finish.set()
+
+        self.assertEqual(retry.status_code, 409)
+        self.assertEqual((await first).status_code, 201)
+        self.assertEqual(len(self.calls), 1)
+        [record] = idempotency_store.redis.values.values()
+        self.assertNotIn(IN_PROGRESS, record)
+
+    async def test_failed_request_may_be_retried(self):
+        response = await self.post({"item": "a", "fail": True})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(idempotency_store.redis.values, {})
+
+        response = await self.post({"item": "a", "fail": True})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(self.calls), 2)
+
+    async def test_keys_are_scoped_by_user(self):
+        owner = authorization("owner@example.com")
+        other = authorization("other@example.com")
+        await self.post({"item": "a"}, headers=owner)
+        response = await self.post({"item": "a"}, headers=other)
+
+        self.assertEqual(len(self.calls), 2)
+        self.assertNotIn("Idempotent-Replayed", response.headers)
+        self.assertEqual(
+            sorted(key.split(":")[1] for key in idempotency_store.redis.values),
+            ["other@example.com", "owner@example.com"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Archived tasks are listed one page per request with include_archived: the
+X-Archive-Cursor of a response continues the archive, a malformed cursor
+gets 400.
+
+    python -m unittest discover tests
+
+The archive lives in the memory DynamoDB backend.
+"""
+
+import unittest
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app import settings
+from app.clients.dynamo_client import DynamoDBClient
+from app.clients.memory_dynamo import MemoryDynamo
+from app.repositories.task_archive_repository import TaskArchiveRepository
+from app.routers.task import encode_archive_cursor, get_archive_page
+from app.schemas.task import Task, TaskRecord, TaskStatuses
+from app.schemas.user import User
+from app.services.task_service import TaskService
+
+
+class TaskRepository:
+    def __init__(self, *tasks: Task):
+        self.tasks = tasks
+
+    async def get_task_records_by_owner(self, owner_email: str):
+        for task in self.tasks:
+            yield TaskRecord.from_item(task.to_item())
+
+
+def make_user(email: str) -> User:
+    return User(username=email.split("@")[0], email=email, password="password1")
+
+
+def make_task(owner_email: str, task_id: str, **fields) -> Task:
+    now = datetime.now(settings.TIMEZONE)
+    return Task(
+        **{
+            "owner_email": owner_email,
+            "task_id": task_id,
+            "title": "Task",
+            "due_date": now + timedelta(days=1),
+            "created_at": now,
+            "updated_at": now,
+            **fields,
+        }
+    )
+
+
+def archive_page(cursor=None, limit: int = settings.TASK_ARCHIVE_PAGE_SIZE):
+    return get_archive_page(
+        include_archived=True, archive_limit=limit, archive_cursor=cursor
+    )
+
+
+class GetArchivePageTest(unittest.TestCase):
+    def test_without_archive(self):
+        self.assertIsNone(
+            get_archive_page(
+                include_archived=False, archive_limit=10, archive_cursor=None
+            )
+        )
+
+    def test_first_page(self):
+        page = archive_page(limit=10)
+        self.assertEqual((page.records, page.last_evaluated_key), (10, None))
+
+    def test_cursor_round_trip(self):
+        key = {"task_id": "a", "owner_email": "owner@example.com"}
+        page = archive_page(encode_archive_cursor(key))
+        self.assertEqual(page.last_evaluated_key, key)
+
+    def test_invalid_cursors(self):
+        for cursor in (
+            "not base64!",
+            urlsafe_b64encode(b"not json").decode(),
+            urlsafe_b64encode(b'["task_id"]').decode(),
+            urlsafe_b64encode(b"\xff\xfe").decode(),
+        ):
+            with self.subTest(cursor=cursor), self.assertRaises(HTTPException) as e:
+                archive_page(cursor)
+            self.assertEqual(e.exception.status_code, 400)
+            self.assertEqual(e.exception.detail, "Invalid archive cursor")
+
+
+class ArchivePagingTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.owner = make_user("owner@example.com")
+        dynamo = MemoryDynamo()
+        archive_repository = TaskArchiveRepository(
+            DynamoDBClient(table=dynamo.table("tasks_archive"), client=dynamo)
+        )
+        for task_id in ("x", "y", "z"):
+            task = make_task(self.owner.email, task_id, status=TaskStatuses.COMPLETED)
+            await archive_repository.archive_item(task.to_item())
+        await archive_repository.archive_item(
+            make_task("other@example.com", "o").to_item()
+        )
+        self.service = TaskService(
+            repository=TaskRepository(make_task(self.owner.email, "a")),
+            archive_repository=archive_repository,
+        )
+
+    async def list_tasks(self, cursor=None) -> tuple[list[str], Optional[str]]:
+        tasks, key = await self.service.list_tasks(
+            self.owner, archive_page=archive_page(cursor, limit=2)
+        )
+        return (
+            sorted(task.task_id for task in tasks),
+            encode_archive_cursor(key) if key else None,
+        )
+
+    async def test_pages(self):
+        task_ids, cursor = await self.list_tasks()
+        self.assertEqual(len(task_ids), 3)
+        self.assertIn("a", task_ids)
+        self.assertIsNotNone(cursor)
+
+        # Continued pages hold only archived tasks.
+        more_task_ids, cursor = await self.list_tasks(cursor)
+        self.assertNotIn("a", more_task_ids)
+        self.assertEqual(sorted(task_ids + more_task_ids), ["a", "x", "y", "z"])
+        self.assertIsNone(cursor)
+
+    async def test_without_archive(self):
+        tasks, key = await self.service.list_tasks(self.owner)
+        self.assertEqual(([task.task_id for task in tasks], key), (["a"], None))
+
+
+if __name__ == "__main__":
+    unittest.main()
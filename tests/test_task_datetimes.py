@@ -0,0 +1,76 @@
+"""
+Task timestamps are stored as epoch milliseconds, or as legacy naive
+strings, and always rendered as "%Y-%m-%d %H:%M:%S.%f" wall-clock times of
+settings.TIMEZONE (Europe/Warsaw), without an offset.
+
+    python -m unittest discover tests
+"""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from app import settings
+from app.schemas.task import Task, TaskRecord, convert_datetime, to_epoch_ms
+
+
+def make_task(**fields) -> Task:
+    now = datetime.now(timezone.utc)
+    return Task(
+        **{
+            "owner_email": "owner@example.com",
+            "task_id": "task",
+            "title": "Task",
+            "due_date": now + timedelta(days=1),
+            "created_at": now,
+            "updated_at": now,
+            **fields,
+        }
+    )
+
+
+class ConvertDatetimeTest(unittest.TestCase):
+    def test_aware_datetimes_render_in_the_application_timezone(self):
+        # CET, UTC+1, in March.
+        value = datetime(2025, 3, 1, 10, 0, tzinfo=timezone.utc)
+        self.assertEqual(convert_datetime(value), "2025-03-01 11:00:00.000000")
+
+    def test_other_offsets_render_the_same_instant(self):
+        value = datetime(2025, 3, 1, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+        self.assertEqual(convert_datetime(value), "2025-03-01 11:00:00.000000")
+
+    def test_summer_time(self):
+        value = datetime(2025, 7, 1, 10, 0, 0, 123456, tzinfo=timezone.utc)
+        self.assertEqual(convert_datetime(value), "2025-07-01 12:00:00.123456")
+
+    def test_naive_datetimes_render_as_they_are(self):
+        value = datetime(2025, 3, 1, 10, 0)
+        self.assertEqual(convert_datetime(value), "2025-03-01 10:00:00.000000")
+
+
+class TaskDatetimeFormatTest(unittest.TestCase):
+    def test_response_matches_the_stored_task(self):
+        due_date = datetime(2030, 3, 1, 10, 0, tzinfo=timezone.utc)
+        task = make_task(due_date=due_date)
+        stored = TaskRecord.from_item(task.to_item()).to_task()
+
+        self.assertEqual(task.model_dump()["due_date"], "2030-03-01 11:00:00.000000")
+        self.assertEqual(stored.model_dump()["due_date"], "2030-03-01 11:00:00.000000")
+
+    def test_epoch_ms_storage(self):
+        due_date = datetime(2030, 3, 1, 10, 0, tzinfo=timezone.utc)
+        item = make_task(due_date=due_date).to_item()
+        self.assertEqual(item["due_date"], to_epoch_ms(due_date))
+
+    def test_legacy_strings_are_echoed(self):
+        item = make_task().to_item()
+        item["due_date"] = "2030-03-01 10:00:00.000000"
+        task = Task.model_validate(item)
+
+        self.assertEqual(task.due_date.tzinfo, settings.TIMEZONE)
+        self.assertEqual(task.model_dump()["due_date"], "2030-03-01 10:00:00.000000")
+        record = TaskRecord.from_item(item).to_task()
+        self.assertEqual(record.model_dump()["due_date"], "2030-03-01 10:00:00.000000")
+
+
+if __name__ == "__main__":
+    unittest.main()
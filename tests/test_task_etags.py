@@ -0,0 +1,139 @@
+"""
+GET /tasks/{task_id} answers with an ETag, revalidation with a matching
+If-None-Match gets 304 without a body.
+
+    python -m unittest discover tests
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import FastAPI
+from starlette.requests import Request
+
+from app import settings
+from app.routers import task as task_router
+from app.routers.task import etag_matches, make_etag
+from app.schemas.task import Task
+from app.schemas.user import User
+from app.services.task_service import TaskService
+from app.services.utils import get_task_service
+
+
+class TaskRepository:
+    def __init__(self, *tasks: Task):
+        self.tasks = {task.task_id: task for task in tasks}
+        self.reads = []
+
+    async def get_task(self, task_id: str, fields=None):
+        self.reads.append(fields)
+        return self.tasks.get(task_id)
+
+
+def make_user(email: str) -> User:
+    return User(username=email.split("@")[0], email=email, password="password1")
+
+
+def make_task(owner_email: str) -> Task:
+    now = datetime.now(settings.TIMEZONE)
+    return Task(
+        owner_email=owner_email,
+        task_id="task",
+        title="Task",
+        due_date=now + timedelta(days=1),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def make_request(if_none_match: str) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "headers": headers})
+
+
+class EtagMatchesTest(unittest.TestCase):
+    def test_make_etag(self):
+        etag = make_etag("task", 1)
+        self.assertRegex(etag, r'^"[0-9a-f]{24}"$')
+        self.assertEqual(etag, make_etag("task", 1))
+        self.assertNotEqual(etag, make_etag("task", 2))
+
+    def test_matches(self):
+        etag = make_etag("task", 1)
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            with self.subTest(header=header):
+                self.assertTrue(etag_matches(make_request(header), etag))
+
+    def test_no_match(self):
+        etag = make_etag("task", 1)
+        for header in ("", make_etag("task", 2), etag.strip('"')):
+            with self.subTest(header=header):
+                self.assertFalse(etag_matches(make_request(header), etag))
+
+
+class TaskRevalidationTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.owner = make_user("owner@example.com")
+        self.task = make_task(self.owner.email)
+        self.repository = TaskRepository(self.task)
+        service = TaskService(repository=self.repository)
+
+        app = FastAPI()
+        app.include_router(task_router.router)
+        app.dependency_overrides[get_task_service] = lambda: service
+        app.dependency_overrides[settings.security.get_current_subject] = lambda: (
+            self.current_user
+        )
+        self.current_user = self.owner
+        transport = httpx.ASGITransport(app=app)
+        self.client = httpx.AsyncClient(
+            transport=transport,
+            base_url="http://test",
+            headers={"Authorization": "Bearer token"},
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def get(self, url: str = "/tasks/task", **headers):
+        return await self.client.get(url, headers=headers)
+
+    async def test_revalidation(self):
+        response = await self.get()
+        etag = response.headers["ETag"]
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Cache-Control"], "private, no-cache")
+
+        self.repository.reads.clear()
+        response = await self.get(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(self.repository.reads, [task_router.TASK_ETAG_FIELDS])
+
+    async def test_changed_task_is_sent(self):
+        etag = (await self.get()).headers["ETag"]
+        self.task.updated_at += timedelta(seconds=1)
+
+        response = await self.get(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    async def test_etag_depends_on_the_query(self):
+        etag = (await self.get()).headers["ETag"]
+        response = await self.get("/tasks/task?fields=title", **{"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"title": "Task"})
+
+    async def test_other_users_get_404(self):
+        etag = (await self.get()).headers["ETag"]
+        self.current_user = make_user("other@example.com")
+
+        response = await self.get(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+TaskEventSubscription buffers the events of one connected client, a client
+that fell behind or missed events while Redis was down is told to resync.
+
+    python -m unittest discover tests
+
+The broker test needs no Redis server: nothing listens on its port.
+"""
+
+import asyncio
+import unittest
+
+from app.services.task_events import TaskEventBroker, TaskEventSubscription
+
+TIMEOUT = 1.0
+
+
+class TaskEventSubscriptionTest(unittest.IsolatedAsyncioTestCase):
+    async def test_events_in_order(self):
+        subscription = TaskEventSubscription(buffer_size=2)
+        subscription.put("a")
+        subscription.put("b")
+        self.assertEqual(await subscription.get(), "a")
+        self.assertEqual(await subscription.get(), "b")
+
+    async def test_overflow_drops_events(self):
+        subscription = TaskEventSubscription(buffer_size=2)
+        for event in ("a", "b", "c"):
+            subscription.put(event)
+
+        self.assertIsNone(await subscription.get())
+        subscription.put("d")
+        self.assertEqual(await subscription.get(), "d")
+
+    async def test_resync_wakes_a_waiting_client(self):
+        subscription = TaskEventSubscription(buffer_size=2)
+        waiting = asyncio.create_task(subscription.get())
+        await asyncio.sleep(0)
+
+        subscription.resync()
+        self.assertIsNone(await asyncio.wait_for(waiting, TIMEOUT))
+        # One resync, later events are delivered.
+        subscription.put("a")
+        self.assertEqual(await subscription.get(), "a")
+
+    async def test_resync_drops_buffered_events(self):
+        subscription = TaskEventSubscription(buffer_size=2)
+        subscription.put("a")
+        subscription.resync()
+        subscription.put("b")
+
+        self.assertIsNone(await subscription.get())
+        self.assertTrue(subscription.queue.empty())
+
+
+class TaskEventBrokerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_failed_subscription_sends_resync(self):
+        broker = TaskEventBroker("redis://127.0.0.1:1/0", buffer_size=2)
+        try:
+            with self.assertLogs("app.services.task_events", "ERROR"):
+                async with broker.subscribe("owner@example.com") as subscription:
+                    event = await asyncio.wait_for(subscription.get(), TIMEOUT)
+        finally:
+            await broker.close()
+        self.assertIsNone(event)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+The q= and sort= expressions of GET /tasks: parsing, its errors, and
+their evaluation on storage items.
+
+    python -m unittest discover tests
+"""
+
+import unittest
+from datetime import datetime
+
+from app import settings
+from app.schemas.task import to_epoch_ms
+from app.strategies.task_query_strategy import (
+    STATUS_CODES,
+    TaskColumns,
+    TaskQueryError,
+    get_query_strategy,
+    parse_conditions,
+    parse_sort_keys,
+)
+
+
+def epoch_ms(*args) -> int:
+    return to_epoch_ms(datetime(*args, tzinfo=settings.TIMEZONE))
+
+
+def make_item(task_id: str, status: str, priority: int, due_date, **fields) -> dict:
+    return {
+        "task_id": task_id,
+        "status": status,
+        "priority": priority,
+        "due_date": due_date,
+        "created_at": epoch_ms(2026, 1, 1),
+        "updated_at": epoch_ms(2026, 1, 1),
+        **fields,
+    }
+
+
+class ParseConditionsTest(unittest.TestCase):
+    def test_terms(self):
+        self.assertEqual(
+            parse_conditions("status:pending,completed priority>=3 due<2026-12-01"),
+            [
+                ("status", ":", (STATUS_CODES["pending"], STATUS_CODES["completed"])),
+                ("priority", ">=", 3),
+                ("due_date", "<", epoch_ms(2026, 12, 1)),
+            ],
+        )
+
+    def test_empty(self):
+        self.assertEqual(parse_conditions(None), [])
+        self.assertEqual(parse_conditions("  "), [])
+
+    def test_aliases(self):
+        conditions = parse_conditions("created>2026-01-01 updated_at<=2026-02-01")
+        self.assertEqual(
+            [(field, op) for field, op, _ in conditions],
+            [("created_at", ">"), ("updated_at", "<=")],
+        )
+
+    def test_dates_with_offset(self):
+        [(_, _, value)] = parse_conditions("due>=2026-06-01T10:00:00+00:00")
+        self.assertEqual(
+            value, to_epoch_ms(datetime.fromisoformat("2026-06-01T10:00:00+00:00"))
+        )
+
+    def test_errors(self):
+        for q, message in [
+            ("owner:someone", "Invalid query term: owner:someone"),
+            ("priority", "Invalid query term: priority"),
+            ("status>pending", "Invalid operator for status: >"),
+            ("status:done,pending", "Unknown task status: done"),
+            ("priority>=high", "Invalid priority: high"),
+            ("due<tomorrow", "Invalid date for due_date: tomorrow"),
+        ]:
+            with self.subTest(q=q), self.assertRaises(TaskQueryError) as raised:
+                parse_conditions(q)
+            self.assertEqual(str(raised.exception), message)
+
+    def test_errors_are_value_errors(self):
+        with self.assertRaises(ValueError):
+            parse_conditions("priority>=high")
+
+
+class ParseSortKeysTest(unittest.TestCase):
+    def test_sort_keys(self):
+        self.assertEqual(
+            parse_sort_keys("-priority, created,+due"),
+            [("priority", True), ("created_at", False), ("due_date", False)],
+        )
+
+    def test_errors(self):
+        for sort in ("status", "-title", "owner_email"):
+            with self.subTest(sort=sort), self.assertRaises(TaskQueryError):
+                parse_sort_keys(sort)
+
+
+class TaskQueryStrategyTest(unittest.TestCase):
+    def setUp(self):
+        self.items = [
+            make_item("a", "pending", 3, epoch_ms(2026, 3, 1)),
+            make_item("b", "completed", 5, epoch_ms(2026, 2, 1)),
+            make_item("c", "pending", 5, epoch_ms(2026, 4, 1)),
+            # Legacy items keep naive strings in the application timezone.
+            make_item("d", "cancelled", 1, "2026-01-15 12:00:00.000000"),
+            make_item("e", "pending", 1, epoch_ms(2026, 1, 20)),
+        ]
+
+    def select(self, **kwargs) -> list[str]:
+        strategy = get_query_strategy(**kwargs)
+        indices = strategy.select(TaskColumns(self.items))
+        return [self.items[i]["task_id"] for i in indices.tolist()]
+
+    def test_filter(self):
+        self.assertEqual(self.select(q="status:pending priority>=3"), ["a", "c"])
+        self.assertEqual(self.select(q="status!=pending"), ["b", "d"])
+        self.assertEqual(self.select(q="due<2026-02-01"), ["d", "e"])
+
+    def test_sort(self):
+        self.assertEqual(self.select(sort="-priority,due"), ["b", "c", "a", "d", "e"])
+        self.assertEqual(self.select(sort="due"), ["d", "e", "b", "a", "c"])
+
+    def test_filter_and_sort(self):
+        self.assertEqual(self.select(q="priority>1", sort="-due"), ["c", "a", "b"])
+
+    def test_list_filters_are_added(self):
+        self.assertEqual(
+            self.select(status="pending", due_before=datetime(2026, 3, 1)),
+            ["a", "e"],
+        )
+
+    def test_no_match(self):
+        self.assertEqual(self.select(q="priority>5", sort="due"), [])
+
+    def test_required_fields(self):
+        strategy = get_query_strategy(q="status:pending due<2026-01-01", sort="-due")
+        self.assertEqual(strategy.required_fields, ("status", "due_date"))
+
+
+if __name__ == "__main__":
+    unittest.main()
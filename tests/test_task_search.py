@@ -0,0 +1,141 @@
+"""
+Search over the inverted index kept by TaskSearchObserver: every query term
+must prefix a token of the task, title tokens weigh more than description
+tokens and exact matches twice as much as prefixes.
+
+    python -m unittest discover tests
+
+The index lives in the memory DynamoDB backend.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app import settings
+from app.clients.dynamo_client import DynamoDBClient
+from app.clients.memory_dynamo import MemoryDynamo
+from app.observers.task_observers import TaskSearchObserver
+from app.repositories.task_search_repository import (
+    MAX_TOKEN_LENGTH,
+    TaskSearchRepository,
+    tokenize,
+)
+from app.schemas.task import Task, TaskServiceActions
+from app.schemas.user import User
+from app.services.task_service import TaskService
+
+
+class TaskRepository:
+    def __init__(self):
+        self.tasks = {}
+
+    async def get_task(self, task_id: str, fields=None):
+        return self.tasks.get(task_id)
+
+
+def make_user(email: str) -> User:
+    return User(username=email.split("@")[0], email=email, password="password1")
+
+
+def make_task(
+    owner_email: str, task_id: str, title: str, description: Optional[str] = None
+) -> Task:
+    now = datetime.now(settings.TIMEZONE)
+    return Task(
+        owner_email=owner_email,
+        task_id=task_id,
+        title=title,
+        description=description,
+        due_date=now + timedelta(days=1),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+class TokenizeTest(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("Fix the Łódź-build, a 2nd TIME!"),
+            ["fix", "the", "łódź", "build", "2nd", "time"],
+        )
+        self.assertEqual(tokenize(None), [])
+        self.assertEqual(tokenize("x" * 100), ["x" * MAX_TOKEN_LENGTH])
+
+
+class TaskSearchTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        dynamo = MemoryDynamo()
+        self.search_repository = TaskSearchRepository(
+            DynamoDBClient(table=dynamo.table("task_search"), client=dynamo)
+        )
+        self.observer = TaskSearchObserver(self.search_repository)
+        self.repository = TaskRepository()
+        self.service = TaskService(
+            repository=self.repository, search_repository=self.search_repository
+        )
+        self.owner = make_user("owner@example.com")
+
+    async def add(self, task_id: str, title: str, description: Optional[str] = None):
+        task = make_task(self.owner.email, task_id, title, description)
+        self.repository.tasks[task_id] = task
+        await self.observer.update(TaskServiceActions.task_created, task)
+        return task
+
+    async def search(self, query: str, limit: int = 20) -> list[str]:
+        tasks = await self.service.search_tasks(self.owner, query, limit=limit)
+        return [task.task_id for task in tasks]
+
+    async def test_title_weighs_more_than_description(self):
+        await self.add("a", "Groceries", "report the receipts")
+        await self.add("b", "Quarterly report")
+        self.assertEqual(await self.search("report"), ["b", "a"])
+
+    async def test_exact_match_weighs_more_than_prefix(self):
+        await self.add("a", "Reporting")
+        await self.add("b", "Report")
+        self.assertEqual(await self.search("rep"), ["a", "b"])
+        self.assertEqual(await self.search("report"), ["b", "a"])
+
+    async def test_every_term_must_match(self):
+        await self.add("a", "Quarterly report")
+        await self.add("b", "Report", "for the board")
+        await self.add("c", "Board meeting")
+        self.assertEqual(await self.search("report board"), ["b"])
+        self.assertEqual(await self.search("report missing"), [])
+        self.assertEqual(await self.search("!"), [])
+
+    async def test_ties_are_ordered_by_task_id(self):
+        for task_id in ("c", "a", "b"):
+            await self.add(task_id, "Report")
+        self.assertEqual(await self.search("report"), ["a", "b", "c"])
+
+    async def test_limit(self):
+        for task_id in ("a", "b", "c"):
+            await self.add(task_id, "Report")
+        self.assertEqual(await self.search("report", limit=2), ["a", "b"])
+
+    async def test_missing_tasks_give_their_place_to_the_next(self):
+        for task_id in ("a", "b", "c", "d", "e"):
+            await self.add(task_id, "Report")
+        # Deleted without TaskService, their postings linger.
+        del self.repository.tasks["a"]
+        del self.repository.tasks["b"]
+        self.assertEqual(await self.search("report", limit=2), ["c", "d"])
+
+    async def test_updates_replace_the_postings(self):
+        old_task = await self.add("a", "Quarterly report")
+        task = old_task.model_copy(update={"title": "Annual report"})
+        self.repository.tasks["a"] = task
+        await self.observer.update(TaskServiceActions.task_updated, task, old_task)
+
+        self.assertEqual(await self.search("quarterly"), [])
+        self.assertEqual(await self.search("annual report"), ["a"])
+
+        await self.observer.update(TaskServiceActions.task_deleted, task)
+        postings = [item async for item in self.search_repository.client.scan()]
+        self.assertEqual(postings, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+TaskStatsObserver keeps the per-owner counters of TaskStatsRepository in
+sync: created tasks are counted, updates move a task between status and
+priority counters, deleted tasks are subtracted.
+
+    python -m unittest discover tests
+
+The counters live in the memory DynamoDB backend.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from app import settings
+from app.clients.dynamo_client import DynamoDBClient
+from app.clients.memory_dynamo import MemoryDynamo
+from app.observers.task_observers import TaskStatsObserver
+from app.repositories.task_stats_repository import TaskStatsRepository
+from app.schemas.task import Task, TaskServiceActions, TaskStatuses
+
+OWNER = "owner@example.com"
+
+
+def make_task(task_id: str, **fields) -> Task:
+    now = datetime.now(settings.TIMEZONE)
+    return Task(
+        **{
+            "owner_email": OWNER,
+            "task_id": task_id,
+            "title": "Task",
+            "due_date": now + timedelta(days=1),
+            "created_at": now,
+            "updated_at": now,
+            **fields,
+        }
+    )
+
+
+class TaskStatsObserverTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        dynamo = MemoryDynamo()
+        self.repository = TaskStatsRepository(
+            DynamoDBClient(table=dynamo.table("task_stats"), client=dynamo)
+        )
+        self.observer = TaskStatsObserver(self.repository)
+
+    async def counts(self) -> tuple:
+        stats = await self.repository.get_stats(OWNER)
+        by_status = {status.value: count for status, count in stats.by_status.items()}
+        by_priority = {
+            priority: count for priority, count in stats.by_priority.items() if count
+        }
+        return stats.total, by_status, by_priority
+
+    async def test_created_tasks_are_counted(self):
+        await self.observer.update(TaskServiceActions.task_created, make_task("a"))
+        await self.observer.update(
+            TaskServiceActions.task_created, make_task("b", priority=3)
+        )
+
+        self.assertEqual(
+            await self.counts(),
+            (2, {"pending": 2, "completed": 0, "cancelled": 0}, {1: 1, 3: 1}),
+        )
+
+    async def test_updates_move_the_task(self):
+        old_task = make_task("a")
+        await self.observer.update(TaskServiceActions.task_created, old_task)
+        task = old_task.model_copy(
+            update={"status": TaskStatuses.COMPLETED, "priority": 5}
+        )
+        await self.observer.update(
+            TaskServiceActions.mark_task_completed, task, old_task
+        )
+
+        self.assertEqual(
+            await self.counts(),
+            (1, {"pending": 0, "completed": 1, "cancelled": 0}, {5: 1}),
+        )
+
+    async def test_replaced_task_is_counted_once(self):
+        old_task = make_task("a")
+        await self.observer.update(TaskServiceActions.task_created, old_task)
+        task = make_task("a", priority=2)
+        await self.observer.update(TaskServiceActions.task_created, task, old_task)
+
+        self.assertEqual(
+            await self.counts(),
+            (1, {"pending": 1, "completed": 0, "cancelled": 0}, {2: 1}),
+        )
+
+    async def test_deleted_tasks_are_subtracted(self):
+        task = make_task("a", status=TaskStatuses.CANCELLED, priority=4)
+        await self.observer.update(TaskServiceActions.task_created, make_task("b"))
+        await self.observer.update(TaskServiceActions.task_created, task)
+        await self.observer.update(TaskServiceActions.task_deleted, task)
+
+        self.assertEqual(
+            await self.counts(),
+            (1, {"pending": 1, "completed": 0, "cancelled": 0}, {1: 1}),
+        )
+
+    async def test_unchanged_counters_are_not_written(self):
+        task = make_task("a")
+        await self.observer.update(TaskServiceActions.task_updated, task, task)
+        self.assertIsNone(await self.repository.client.get_item({"owner_email": OWNER}))
+
+    async def test_owners_without_tasks_have_zero_counts(self):
+        self.assertEqual(
+            await self.counts(),
+            (0, {"pending": 0, "completed": 0, "cancelled": 0}, {}),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Updates buffered by TaskWriteBuffer are acknowledged with 202 before they
+are written, nothing but the owner's own later writes may drop them.
+
+    python -m unittest discover tests
+"""
+
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+
+from app import settings
+from app.schemas.task import Task, TaskUpdateRequest
+from app.schemas.user import User
+from app.services.task_service import InsufficientPermissionsError, TaskService
+from app.services.task_write_buffer import TaskWriteBuffer
+
+WINDOW = 0.05
+
+
+class TaskRepository:
+    def __init__(self, *tasks: Task):
+        self.tasks = {task.task_id: task for task in tasks}
+
+    async def get_task(self, task_id: str, fields=None):
+        return self.tasks.get(task_id)
+
+    async def create_task(self, task: Task):
+        self.tasks[task.task_id] = task
+
+
+def make_user(email: str) -> User:
+    return User(username=email.split("@")[0], email=email, password="password1")
+
+
+def make_task(owner_email: str) -> Task:
+    now = datetime.now(settings.TIMEZONE)
+    return Task(
+        owner_email=owner_email,
+        task_id="task",
+        title="Task",
+        due_date=now + timedelta(days=1),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+class TaskWriteBehindTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.owner = make_user("owner@example.com")
+        self.other = make_user("other@example.com")
+        self.repository = TaskRepository(make_task(self.owner.email))
+        self.service = TaskService(repository=self.repository)
+        self.service.write_buffer = TaskWriteBuffer(WINDOW, self.service.write_update)
+
+    async def test_unauthorized_update_keeps_buffered_update(self):
+        await self.service.update_task(
+            "task", TaskUpdateRequest(priority=4), self.owner, write_behind=True
+        )
+        with self.assertRaises(InsufficientPermissionsError):
+            await self.service.update_task(
+                "task", TaskUpdateRequest(priority=2), self.other
+            )
+
+        self.assertEqual(self.service.write_buffer.peek("task").priority, 4)
+        await asyncio.sleep(WINDOW * 4)
+        self.assertEqual(self.repository.tasks["task"].priority, 4)
+
+    async def test_owner_update_merges_buffered_update(self):
+        await self.service.update_task(
+            "task", TaskUpdateRequest(priority=4), self.owner, write_behind=True
+        )
+        task = await self.service.update_task(
+            "task", TaskUpdateRequest(title="Renamed"), self.owner
+        )
+
+        self.assertIsNone(self.service.write_buffer.peek("task"))
+        self.assertEqual((task.title, task.priority), ("Renamed", 4))
+        stored = self.repository.tasks["task"]
+        self.assertEqual((stored.title, stored.priority), ("Renamed", 4))
+
+    async def test_buffered_updates_are_written_once(self):
+        for priority in (2, 3, 4):
+            await self.service.update_task(
+                "task",
+                TaskUpdateRequest(priority=priority),
+                self.owner,
+                write_behind=True,
+            )
+        self.assertEqual(self.repository.tasks["task"].priority, 1)
+
+        await asyncio.sleep(WINDOW * 4)
+        self.assertEqual(self.repository.tasks["task"].priority, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()